@@ -0,0 +1,54 @@
+"""add duplicate clusters, price history and stored AI analyses
+
+Revision ID: 0a6d2e8c4f15
+Revises: f5c81e3a9b27
+Create Date: 2026-10-19 16:27:09.482215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a6d2e8c4f15'
+down_revision = 'f5c81e3a9b27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('imoveis', sa.Column('cluster_id', sa.Integer(), nullable=True))
+    op.create_index('ix_imoveis_cluster_id', 'imoveis', ['cluster_id'], unique=False)
+
+    op.create_table('price_history',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('imovel_id', sa.Integer(), nullable=False),
+    sa.Column('load_id', sa.Integer(), nullable=True),
+    sa.Column('preco', sa.Numeric(precision=12, scale=2, asdecimal=False), nullable=True),
+    sa.Column('valor_avaliacao', sa.Numeric(precision=12, scale=2, asdecimal=False), nullable=True),
+    sa.Column('observed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['imovel_id'], ['imoveis.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['load_id'], ['listing_loads.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_price_history_imovel_observed', 'price_history', ['imovel_id', 'observed_at'], unique=False)
+
+    op.create_table('property_analyses',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('cluster_id', sa.Integer(), nullable=False),
+    sa.Column('numero_imovel', sa.String(length=32), nullable=False),
+    sa.Column('valor_venda', sa.Float(), nullable=True),
+    sa.Column('analysis', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_property_analyses_cluster_id'), 'property_analyses', ['cluster_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_property_analyses_cluster_id'), table_name='property_analyses')
+    op.drop_table('property_analyses')
+    op.drop_index('ix_price_history_imovel_observed', table_name='price_history')
+    op.drop_table('price_history')
+    op.drop_index('ix_imoveis_cluster_id', table_name='imoveis')
+    op.drop_column('imoveis', 'cluster_id')
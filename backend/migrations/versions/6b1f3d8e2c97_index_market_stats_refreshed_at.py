@@ -0,0 +1,23 @@
+"""index market_stats.refreshed_at
+
+Revision ID: 6b1f3d8e2c97
+Revises: 8e4b2d6f1a53
+Create Date: 2026-10-20 11:03:41.217655
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '6b1f3d8e2c97'
+down_revision = '8e4b2d6f1a53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f('ix_market_stats_refreshed_at'), 'market_stats', ['refreshed_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_market_stats_refreshed_at'), table_name='market_stats')
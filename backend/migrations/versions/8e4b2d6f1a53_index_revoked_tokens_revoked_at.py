@@ -0,0 +1,23 @@
+"""index revoked_tokens.revoked_at
+
+Revision ID: 8e4b2d6f1a53
+Revises: 3c9e1f7a2b64
+Create Date: 2026-10-20 10:12:08.431902
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4b2d6f1a53'
+down_revision = '3c9e1f7a2b64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f('ix_revoked_tokens_revoked_at'), 'revoked_tokens', ['revoked_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_revoked_tokens_revoked_at'), table_name='revoked_tokens')
@@ -0,0 +1,73 @@
+"""create imoveis table with full-text search index
+
+Revision ID: 8f3c2a91d7e4
+Revises: 5323549f1223
+Create Date: 2026-10-19 10:12:41.503118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f3c2a91d7e4'
+down_revision = '5323549f1223'
+branch_labels = None
+depends_on = None
+
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('pt_unaccent', coalesce(bairro, '')), 'A') || "
+    "setweight(to_tsvector('pt_unaccent', coalesce(endereco, '')), 'B') || "
+    "setweight(to_tsvector('pt_unaccent', coalesce(descricao, '')), 'C')"
+)
+
+
+def upgrade():
+    op.create_table('imoveis',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('numero_imovel', sa.String(length=32), nullable=False),
+    sa.Column('uf', sa.String(length=2), nullable=False),
+    sa.Column('cidade', sa.String(length=120), nullable=False),
+    sa.Column('bairro', sa.String(length=120), nullable=True),
+    sa.Column('endereco', sa.Text(), nullable=False),
+    sa.Column('preco', sa.Numeric(precision=12, scale=2), nullable=True),
+    sa.Column('valor_avaliacao', sa.Numeric(precision=12, scale=2), nullable=True),
+    sa.Column('desconto', sa.Numeric(precision=5, scale=2), nullable=True),
+    sa.Column('descricao', sa.Text(), nullable=True),
+    sa.Column('modalidade_venda', sa.String(length=80), nullable=True),
+    sa.Column('link_acesso', sa.Text(), nullable=True),
+    sa.Column('tipo_imovel', sa.String(length=40), nullable=True),
+    sa.Column('quartos', sa.Integer(), nullable=True),
+    sa.Column('vagas_garagem', sa.Integer(), nullable=True),
+    sa.Column('area_total', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('area_privativa', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('area_terreno', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('aceita_financiamento', sa.Boolean(), nullable=True),
+    sa.Column('status_ocupacao', sa.String(length=40), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('numero_imovel')
+    )
+    op.create_index('ix_imoveis_uf_cidade', 'imoveis', ['uf', 'cidade'], unique=False)
+    op.create_index('ix_imoveis_tipo_preco', 'imoveis', ['tipo_imovel', 'preco'], unique=False)
+
+    if op.get_bind().dialect.name == 'postgresql':
+        # Configuração portuguesa sem acentos: "Sao Paulo" encontra "São Paulo"
+        op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+        op.execute("CREATE TEXT SEARCH CONFIGURATION pt_unaccent (COPY = portuguese)")
+        op.execute(
+            "ALTER TEXT SEARCH CONFIGURATION pt_unaccent "
+            "ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem"
+        )
+        op.execute(f"CREATE INDEX ix_imoveis_search ON imoveis USING GIN (({SEARCH_VECTOR}))")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_imoveis_search")
+        op.execute("DROP TEXT SEARCH CONFIGURATION IF EXISTS pt_unaccent")
+    op.drop_index('ix_imoveis_tipo_preco', table_name='imoveis')
+    op.drop_index('ix_imoveis_uf_cidade', table_name='imoveis')
+    op.drop_table('imoveis')
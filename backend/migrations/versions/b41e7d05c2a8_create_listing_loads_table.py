@@ -0,0 +1,35 @@
+"""create listing_loads audit table
+
+Revision ID: b41e7d05c2a8
+Revises: 8f3c2a91d7e4
+Create Date: 2026-10-19 11:02:17.284410
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b41e7d05c2a8'
+down_revision = '8f3c2a91d7e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('listing_loads',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('source', sa.String(length=255), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('rows_read', sa.Integer(), nullable=False),
+    sa.Column('rows_rejected', sa.Integer(), nullable=False),
+    sa.Column('rows_upserted', sa.Integer(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('listing_loads')
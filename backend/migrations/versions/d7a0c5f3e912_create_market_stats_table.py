@@ -0,0 +1,45 @@
+"""create market_stats aggregate table
+
+Revision ID: d7a0c5f3e912
+Revises: b41e7d05c2a8
+Create Date: 2026-10-19 12:20:05.118730
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a0c5f3e912'
+down_revision = 'b41e7d05c2a8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('market_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('uf', sa.String(length=2), nullable=False),
+    sa.Column('cidade', sa.String(length=120), nullable=False),
+    sa.Column('bairro', sa.String(length=120), nullable=False),
+    sa.Column('tipo_imovel', sa.String(length=40), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('preco_mean', sa.Float(), nullable=True),
+    sa.Column('preco_p25', sa.Float(), nullable=True),
+    sa.Column('preco_p50', sa.Float(), nullable=True),
+    sa.Column('preco_p75', sa.Float(), nullable=True),
+    sa.Column('desconto_mean', sa.Float(), nullable=True),
+    sa.Column('desconto_p25', sa.Float(), nullable=True),
+    sa.Column('desconto_p50', sa.Float(), nullable=True),
+    sa.Column('desconto_p75', sa.Float(), nullable=True),
+    sa.Column('preco_m2_p25', sa.Float(), nullable=True),
+    sa.Column('preco_m2_p50', sa.Float(), nullable=True),
+    sa.Column('preco_m2_p75', sa.Float(), nullable=True),
+    sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('uf', 'cidade', 'bairro', 'tipo_imovel', name='uq_market_stats_key')
+    )
+
+
+def downgrade():
+    op.drop_table('market_stats')
@@ -0,0 +1,31 @@
+"""add geolocation columns to imoveis
+
+Revision ID: e2b9f4a17c30
+Revises: d7a0c5f3e912
+Create Date: 2026-10-19 13:41:52.660391
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b9f4a17c30'
+down_revision = 'd7a0c5f3e912'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('imoveis', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('imoveis', sa.Column('longitude', sa.Float(), nullable=True))
+    op.add_column('imoveis', sa.Column('geohash', sa.String(length=12), nullable=True))
+    op.create_index('ix_imoveis_geohash', 'imoveis', ['geohash'], unique=False,
+                    postgresql_ops={'geohash': 'varchar_pattern_ops'})
+
+
+def downgrade():
+    op.drop_index('ix_imoveis_geohash', table_name='imoveis')
+    op.drop_column('imoveis', 'geohash')
+    op.drop_column('imoveis', 'longitude')
+    op.drop_column('imoveis', 'latitude')
@@ -0,0 +1,47 @@
+"""create listing_financials precomputed metrics table
+
+Revision ID: f5c81e3a9b27
+Revises: e2b9f4a17c30
+Create Date: 2026-10-19 15:02:41.337109
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5c81e3a9b27'
+down_revision = 'e2b9f4a17c30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('listing_financials',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('imovel_id', sa.Integer(), nullable=False),
+    sa.Column('profile', sa.String(length=32), nullable=False),
+    sa.Column('system', sa.String(length=8), nullable=False),
+    sa.Column('interest_rate', sa.Float(), nullable=False),
+    sa.Column('loan_term', sa.Integer(), nullable=False),
+    sa.Column('down_payment', sa.Float(), nullable=False),
+    sa.Column('principal', sa.Float(), nullable=False),
+    sa.Column('first_payment', sa.Float(), nullable=False),
+    sa.Column('last_payment', sa.Float(), nullable=False),
+    sa.Column('total_interest', sa.Float(), nullable=False),
+    sa.Column('documentation_costs', sa.Float(), nullable=False),
+    sa.Column('total_initial_cost', sa.Float(), nullable=False),
+    sa.Column('estimated_rent', sa.Float(), nullable=False),
+    sa.Column('gross_yield', sa.Float(), nullable=False),
+    sa.Column('rates_version', sa.String(length=16), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['imovel_id'], ['imoveis.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('imovel_id', 'profile', name='uq_listing_financials_imovel_profile')
+    )
+    op.create_index('ix_listing_financials_rates_version', 'listing_financials', ['rates_version'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_listing_financials_rates_version', table_name='listing_financials')
+    op.drop_table('listing_financials')
@@ -0,0 +1,68 @@
+"""
+Benchmark de hashing de senhas: logins por segundo por núcleo
+
+Para cada método (formato do werkzeug) mede a verificação de senha na
+thread atual (custo de um núcleo) e pelo pool de processos com várias
+threads concorrentes, como num pico de logins.
+
+Uso (a partir de backend/):
+    python scripts/benchmark_password_hashing.py
+    python scripts/benchmark_password_hashing.py --methods scrypt:16384:8:1 pbkdf2:sha256:600000 \
+        --logins 200 --concurrency 32 --workers 4
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from src.services.password_hasher import PasswordHasher  # noqa: E402
+
+DEFAULT_METHODS = ['scrypt:32768:8:1', 'scrypt:16384:8:1', 'pbkdf2:sha256:600000', 'pbkdf2:sha256:260000']
+PASSWORD = 'correct horse battery staple'
+
+
+def bench_inline(method: str, logins: int) -> float:
+    hasher = PasswordHasher(method=method, workers=0)
+    stored = generate_password_hash(PASSWORD, method=method)
+    started = time.perf_counter()
+    for _ in range(logins):
+        hasher.verify(stored, PASSWORD)
+    return logins / (time.perf_counter() - started)
+
+
+def bench_pool(method: str, logins: int, workers: int, concurrency: int) -> float:
+    hasher = PasswordHasher(method=method, workers=workers)
+    stored = generate_password_hash(PASSWORD, method=method)
+    hasher.verify(stored, PASSWORD)  # sobe os processos do pool fora da medição
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as threads:
+        list(threads.map(lambda _: hasher.verify(stored, PASSWORD), range(logins)))
+    elapsed = time.perf_counter() - started
+    hasher.shutdown()
+    return logins / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--methods', nargs='+', default=DEFAULT_METHODS)
+    parser.add_argument('--logins', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--concurrency', type=int, default=16)
+    args = parser.parse_args()
+
+    print(f"{'método':<26}{'logins/s (1 núcleo)':>22}{'logins/s (pool)':>18}{'por núcleo':>12}")
+    for method in args.methods:
+        inline = bench_inline(method, max(10, args.logins // 4))
+        pooled = bench_pool(method, args.logins, args.workers, args.concurrency)
+        print(f"{method:<26}{inline:>22.1f}{pooled:>18.1f}{pooled / args.workers:>12.1f}")
+    print(f"\nPool: {args.workers} processos, {args.concurrency} logins simultâneos")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Comandos de linha de comando (``flask imoveis ...`` e ``flask auth ...``)
+"""
+
+import click
+from flask.cli import AppGroup
+
+from src.services.listing_loader import ListingLoader
+from src.services.market_stats import MarketStatsService
+from src.services.geo_service import GeoService
+from src.services.dedup_service import DedupService
+from src.services.listing_financials import ListingFinancialsService
+from src.services.market_rates import market_rates
+from src.services.token_revocation import revocation_list
+
+imoveis_cli = AppGroup('imoveis', help='Manutenção da base de imóveis')
+
+
+@imoveis_cli.command('load')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--encoding', default='utf-8', show_default=True, help='Codificação do arquivo CSV')
+@click.option('--batch-size', default=5000, show_default=True, help='Tamanho do lote no SQLite')
+def load_command(path, encoding, batch_size):
+    """Carrega a lista de imóveis da Caixa (CSV separado por ';')"""
+    audit = ListingLoader(batch_size=batch_size).load_file(path, encoding=encoding)
+    elapsed = (audit.finished_at - audit.started_at).total_seconds()
+    click.echo(
+        f"Carga {audit.id}: {audit.status} - {audit.rows_read} lidos, "
+        f"{audit.rows_upserted} gravados, {audit.rows_rejected} rejeitados em {elapsed:.1f}s"
+    )
+    if audit.status != 'success':
+        raise click.ClickException(audit.error or 'Falha na carga')
+
+
+@imoveis_cli.command('refresh-stats')
+@click.option('--uf', 'ufs', multiple=True, help='Restringe às UFs informadas (repetível)')
+def refresh_stats_command(ufs):
+    """Recalcula os agregados de mercado (market_stats)"""
+    rows = MarketStatsService().refresh(ufs=ufs or None)
+    click.echo(f"{rows} agregados gravados")
+
+
+@imoveis_cli.command('geocode')
+def geocode_command():
+    """Preenche coordenadas dos imóveis sem geohash usando o gazetteer local"""
+    updated = GeoService().geocode_missing()
+    click.echo(f"{updated} imóveis geocodificados")
+
+
+@imoveis_cli.command('dedup')
+@click.option('--uf', 'ufs', multiple=True, help='Restringe às UFs informadas (repetível)')
+def dedup_command(ufs):
+    """Agrupa relistagens do mesmo imóvel físico (cluster_id)"""
+    result = DedupService().run(ufs=ufs or None)
+    click.echo(f"{result['listings']} imóveis, {result['duplicates']} relistagens, {result['updated']} alterados")
+
+
+@imoveis_cli.command('refresh-financials')
+@click.option('--all', 'full', is_flag=True, help='Recalcula todos, não só os desatualizados')
+def refresh_financials_command(full):
+    """Recalcula as métricas de financiamento pré-calculadas (listing_financials)"""
+    service = ListingFinancialsService()
+    rows = service.refresh() if full else service.refresh_stale()
+    click.echo(f"{rows} métricas gravadas (taxas {market_rates.version})")
+
+
+@imoveis_cli.command('set-rate')
+@click.argument('name')
+@click.argument('value', type=float)
+@click.option('--section', default='financing', show_default=True, help='Seção do arquivo de taxas')
+def set_rate_command(name, value, section):
+    """Altera uma taxa de mercado e recalcula as métricas afetadas"""
+    try:
+        version = market_rates.update(section, {name: value})
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    rows = ListingFinancialsService().refresh_stale()
+    click.echo(f"Taxas na versão {version}; {rows} métricas recalculadas")
+
+
+auth_cli = AppGroup('auth', help='Manutenção da autenticação')
+
+
+@auth_cli.command('purge-revoked-tokens')
+def purge_revoked_tokens_command():
+    """Apaga revogações de tokens que já expiraram"""
+    click.echo(f"{revocation_list.purge_expired()} revogações vencidas removidas")
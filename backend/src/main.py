@@ -1,6 +1,5 @@
 import os
 import sys
-import logging
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -17,13 +16,27 @@ from flask_migrate import Migrate
 from werkzeug.middleware.proxy_fix import ProxyFix  # ✅ Importante
 
 from src.models.user import db
+from src.models.imovel import Imovel  # noqa: F401 (registra o modelo)
+from src.models.listing_load import ListingLoad  # noqa: F401
+from src.models.market_stat import MarketStat  # noqa: F401
+from src.models.listing_financial import ListingFinancial  # noqa: F401
+from src.models.price_point import PricePoint  # noqa: F401
+from src.models.property_analysis import PropertyAnalysis  # noqa: F401
+from src.models.revoked_token import RevokedToken  # noqa: F401
 from src.routes.auth import auth_bp
 from src.routes.user import user_bp
 from src.routes.analysis import analysis_bp
 from src.routes.financing import financing_bp
+from src.routes.imoveis import imoveis_bp
+from src.routes.market import market_bp
+from src.routes.metrics import metrics_bp
+from src.routes.profiling import profiling_bp
+from src.cli import imoveis_cli, auth_cli
+from src.services.db_pool import database_probe, engine_options, pool_config, pool_metrics
+from src.services import metrics, profiler, structured_logging, tracing
 
-# 📝 Logging básico
-logging.basicConfig(level=logging.INFO)
+# 📝 Logs em JSON, gravados numa thread de fundo (LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_RATES)
+structured_logging.configure_logging()
 
 # 🔐 Configurar a chave secreta do Flask
 secret_key = os.environ.get("SECRET_KEY") or os.urandom(24).hex()
@@ -38,6 +51,8 @@ database_url = os.environ.get("DATABASE_URL")
 if not database_url:
     raise ValueError("DATABASE_URL não definido no .env")
 app.config["SQLALCHEMY_DATABASE_URI"] = database_url
+# Pool por worker: DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE...
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(database_url)
 
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
@@ -48,25 +63,48 @@ app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_port=1)
 CORS(app)
 db.init_app(app)
 migrate = Migrate(app, db)
+metrics.init_app(app)
+structured_logging.init_app(app)
+profiler.init_app(app)  # sem hooks se o profiling estiver desligado
+with app.app_context():
+    pool_metrics.attach(db.engine)
+    tracing.init_app(app, db.engine)
 
 # 🔗 Blueprints
 app.register_blueprint(auth_bp, url_prefix='/api')
 app.register_blueprint(user_bp, url_prefix='/api')
 app.register_blueprint(analysis_bp, url_prefix='/api/analysis')
 app.register_blueprint(financing_bp, url_prefix='/api/financing')
+app.register_blueprint(imoveis_bp, url_prefix='/api/imoveis')
+app.register_blueprint(market_bp, url_prefix='/api/market')
+app.register_blueprint(metrics_bp)
+app.register_blueprint(profiling_bp, url_prefix='/api/admin')
+
+# 🧰 Comandos CLI (flask imoveis load ...)
+app.cli.add_command(imoveis_cli)
+app.cli.add_command(auth_cli)
 
 # ✅ Health Check
 @app.route('/health')
 def health_check():
+    database = database_probe.check(db.engine)
+    healthy = database['status'] == 'connected'
     return jsonify({
-        'status': 'healthy',
+        'status': 'healthy' if healthy else 'unhealthy',
         'timestamp': datetime.utcnow().isoformat(),
         'services': {
             'bedrock': 'available',
-            'database': 'connected',
+            'database': database['status'],
             'cache': 'active'
+        },
+        'database': {
+            **database,
+            'pool': {
+                'config': pool_config(app.config['SQLALCHEMY_ENGINE_OPTIONS']),
+                'metrics': pool_metrics.snapshot(db.engine),
+            }
         }
-    })
+    }), 200 if healthy else 503
 
 # 🌐 Rota para servir arquivos estáticos (ex: React build)
 @app.route('/', defaults={'path': ''})
@@ -0,0 +1,123 @@
+from datetime import datetime
+
+from sqlalchemy import DDL, event
+
+from src.models.user import db
+
+
+class Imovel(db.Model):
+    __tablename__ = 'imoveis'
+
+    id = db.Column(db.Integer, primary_key=True)
+    numero_imovel = db.Column(db.String(32), unique=True, nullable=False)
+    uf = db.Column(db.String(2), nullable=False)
+    cidade = db.Column(db.String(120), nullable=False)
+    bairro = db.Column(db.String(120))
+    endereco = db.Column(db.Text, nullable=False)
+    preco = db.Column(db.Numeric(12, 2, asdecimal=False))
+    valor_avaliacao = db.Column(db.Numeric(12, 2, asdecimal=False))
+    desconto = db.Column(db.Numeric(5, 2, asdecimal=False))
+    descricao = db.Column(db.Text)
+    modalidade_venda = db.Column(db.String(80))
+    link_acesso = db.Column(db.Text)
+
+    # Dados extraídos da descrição
+    tipo_imovel = db.Column(db.String(40))
+    quartos = db.Column(db.Integer)
+    vagas_garagem = db.Column(db.Integer)
+    area_total = db.Column(db.Numeric(10, 2, asdecimal=False))
+    area_privativa = db.Column(db.Numeric(10, 2, asdecimal=False))
+    area_terreno = db.Column(db.Numeric(10, 2, asdecimal=False))
+
+    aceita_financiamento = db.Column(db.Boolean)
+    status_ocupacao = db.Column(db.String(40))
+
+    # Geolocalização (centroide do gazetteer local)
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    geohash = db.Column(db.String(12))
+
+    # Mesmo imóvel físico em outras ofertas: id do representante do grupo
+    cluster_id = db.Column(db.Integer)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_imoveis_uf_cidade', 'uf', 'cidade'),
+        db.Index('ix_imoveis_tipo_preco', 'tipo_imovel', 'preco'),
+        db.Index('ix_imoveis_geohash', 'geohash', postgresql_ops={'geohash': 'varchar_pattern_ops'}),
+        db.Index('ix_imoveis_cluster_id', 'cluster_id'),
+    )
+
+    def __repr__(self):
+        return f'<Imovel {self.numero_imovel}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'numero_imovel': self.numero_imovel,
+            'uf': self.uf,
+            'cidade': self.cidade,
+            'bairro': self.bairro,
+            'endereco': self.endereco,
+            'preco': self.preco,
+            'valor_avaliacao': self.valor_avaliacao,
+            'desconto': self.desconto,
+            'descricao': self.descricao,
+            'modalidade_venda': self.modalidade_venda,
+            'link_acesso': self.link_acesso,
+            'tipo_imovel': self.tipo_imovel,
+            'quartos': self.quartos,
+            'vagas_garagem': self.vagas_garagem,
+            'area_total': self.area_total,
+            'area_privativa': self.area_privativa,
+            'area_terreno': self.area_terreno,
+            'aceita_financiamento': self.aceita_financiamento,
+            'status_ocupacao': self.status_ocupacao,
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'cluster_id': self.cluster_id,
+        }
+
+
+# Índice de busca textual no SQLite (FTS5 com conteúdo externo). No PostgreSQL
+# o índice GIN equivalente é criado pela migração create_imoveis_table.
+_SQLITE_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS imoveis_fts USING fts5(
+        bairro, endereco, descricao,
+        content='imoveis', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS imoveis_fts_ai AFTER INSERT ON imoveis BEGIN
+        INSERT INTO imoveis_fts(rowid, bairro, endereco, descricao)
+        VALUES (new.id, new.bairro, new.endereco, new.descricao);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS imoveis_fts_ad AFTER DELETE ON imoveis BEGIN
+        INSERT INTO imoveis_fts(imoveis_fts, rowid, bairro, endereco, descricao)
+        VALUES ('delete', old.id, old.bairro, old.endereco, old.descricao);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS imoveis_fts_au AFTER UPDATE ON imoveis BEGIN
+        INSERT INTO imoveis_fts(imoveis_fts, rowid, bairro, endereco, descricao)
+        VALUES ('delete', old.id, old.bairro, old.endereco, old.descricao);
+        INSERT INTO imoveis_fts(rowid, bairro, endereco, descricao)
+        VALUES (new.id, new.bairro, new.endereco, new.descricao);
+    END
+    """,
+]
+
+for _statement in _SQLITE_FTS_DDL:
+    event.listen(Imovel.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+
+event.listen(
+    Imovel.__table__,
+    'before_drop',
+    DDL('DROP TABLE IF EXISTS imoveis_fts').execute_if(dialect='sqlite'),
+)
@@ -0,0 +1,57 @@
+from datetime import datetime
+
+from src.models.user import db
+
+
+class ListingFinancial(db.Model):
+    """
+    Métricas de financiamento pré-calculadas por imóvel e perfil
+
+    Um perfil combina sistema (SAC/Price), taxa e entrada (ex.:
+    ``caixa_sac_20``). ``rates_version`` identifica as taxas de mercado
+    usadas; linhas de outra versão são consideradas desatualizadas.
+    """
+    __tablename__ = 'listing_financials'
+
+    id = db.Column(db.Integer, primary_key=True)
+    imovel_id = db.Column(db.Integer, db.ForeignKey('imoveis.id', ondelete='CASCADE'), nullable=False)
+    profile = db.Column(db.String(32), nullable=False)
+    system = db.Column(db.String(8), nullable=False)
+
+    interest_rate = db.Column(db.Float, nullable=False)
+    loan_term = db.Column(db.Integer, nullable=False)
+    down_payment = db.Column(db.Float, nullable=False)
+    principal = db.Column(db.Float, nullable=False)
+    first_payment = db.Column(db.Float, nullable=False)
+    last_payment = db.Column(db.Float, nullable=False)
+    total_interest = db.Column(db.Float, nullable=False)
+    documentation_costs = db.Column(db.Float, nullable=False)
+    total_initial_cost = db.Column(db.Float, nullable=False)
+    estimated_rent = db.Column(db.Float, nullable=False)
+    gross_yield = db.Column(db.Float, nullable=False)
+
+    rates_version = db.Column(db.String(16), nullable=False)
+    computed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('imovel_id', 'profile', name='uq_listing_financials_imovel_profile'),
+        db.Index('ix_listing_financials_rates_version', 'rates_version'),
+    )
+
+    def to_dict(self):
+        return {
+            'profile': self.profile,
+            'system': self.system,
+            'interest_rate': self.interest_rate,
+            'loan_term': self.loan_term,
+            'down_payment': self.down_payment,
+            'principal': self.principal,
+            'first_payment': self.first_payment,
+            'last_payment': self.last_payment,
+            'total_interest': self.total_interest,
+            'documentation_costs': self.documentation_costs,
+            'total_initial_cost': self.total_initial_cost,
+            'estimated_rent': self.estimated_rent,
+            'gross_yield': self.gross_yield,
+            'rates_version': self.rates_version,
+        }
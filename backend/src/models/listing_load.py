@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from src.models.user import db
+
+
+class ListingLoad(db.Model):
+    """Registro de auditoria de cada carga da lista de imóveis"""
+    __tablename__ = 'listing_loads'
+
+    id = db.Column(db.Integer, primary_key=True)
+    source = db.Column(db.String(255), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='running')  # running|success|failed
+    rows_read = db.Column(db.Integer, nullable=False, default=0)
+    rows_rejected = db.Column(db.Integer, nullable=False, default=0)
+    rows_upserted = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<ListingLoad {self.id} {self.status}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'source': self.source,
+            'status': self.status,
+            'rows_read': self.rows_read,
+            'rows_rejected': self.rows_rejected,
+            'rows_upserted': self.rows_upserted,
+            'error': self.error,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
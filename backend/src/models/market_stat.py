@@ -0,0 +1,58 @@
+from datetime import datetime
+
+from src.models.user import db
+
+
+class MarketStat(db.Model):
+    """
+    Estatísticas de mercado pré-calculadas
+
+    Cada linha agrega os imóveis de um recorte uf/cidade/bairro/tipo. String
+    vazia em uma dimensão significa "todos" (ex.: uf='SP', cidade='' é o
+    total do estado; tudo vazio é o total nacional).
+    """
+    __tablename__ = 'market_stats'
+
+    id = db.Column(db.Integer, primary_key=True)
+    uf = db.Column(db.String(2), nullable=False, default='')
+    cidade = db.Column(db.String(120), nullable=False, default='')
+    bairro = db.Column(db.String(120), nullable=False, default='')
+    tipo_imovel = db.Column(db.String(40), nullable=False, default='')
+
+    count = db.Column(db.Integer, nullable=False, default=0)
+    preco_mean = db.Column(db.Float)
+    preco_p25 = db.Column(db.Float)
+    preco_p50 = db.Column(db.Float)
+    preco_p75 = db.Column(db.Float)
+    desconto_mean = db.Column(db.Float)
+    desconto_p25 = db.Column(db.Float)
+    desconto_p50 = db.Column(db.Float)
+    desconto_p75 = db.Column(db.Float)
+    preco_m2_p25 = db.Column(db.Float)
+    preco_m2_p50 = db.Column(db.Float)
+    preco_m2_p75 = db.Column(db.Float)
+
+    refreshed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        db.UniqueConstraint('uf', 'cidade', 'bairro', 'tipo_imovel', name='uq_market_stats_key'),
+    )
+
+    def __repr__(self):
+        return f'<MarketStat {self.uf}/{self.cidade}/{self.bairro}/{self.tipo_imovel}>'
+
+    def to_dict(self):
+        return {
+            'uf': self.uf or None,
+            'cidade': self.cidade or None,
+            'bairro': self.bairro or None,
+            'tipo_imovel': self.tipo_imovel or None,
+            'count': self.count,
+            'preco': {'mean': self.preco_mean, 'p25': self.preco_p25,
+                      'p50': self.preco_p50, 'p75': self.preco_p75},
+            'desconto': {'mean': self.desconto_mean, 'p25': self.desconto_p25,
+                         'p50': self.desconto_p50, 'p75': self.desconto_p75},
+            'preco_m2': {'p25': self.preco_m2_p25, 'p50': self.preco_m2_p50,
+                         'p75': self.preco_m2_p75},
+            'refreshed_at': self.refreshed_at.isoformat() if self.refreshed_at else None,
+        }
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from src.models.user import db
+
+
+class PricePoint(db.Model):
+    """
+    Observação de preço de um imóvel em uma carga
+
+    Só é gravada quando o preço ou a avaliação mudam em relação à última
+    observação do mesmo imóvel. O histórico do imóvel físico junta as
+    observações de todas as ofertas do mesmo ``Imovel.cluster_id``.
+    """
+    __tablename__ = 'price_history'
+
+    id = db.Column(db.Integer, primary_key=True)
+    imovel_id = db.Column(db.Integer, db.ForeignKey('imoveis.id', ondelete='CASCADE'), nullable=False)
+    load_id = db.Column(db.Integer, db.ForeignKey('listing_loads.id', ondelete='SET NULL'))
+    preco = db.Column(db.Numeric(12, 2, asdecimal=False))
+    valor_avaliacao = db.Column(db.Numeric(12, 2, asdecimal=False))
+    observed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_price_history_imovel_observed', 'imovel_id', 'observed_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'imovel_id': self.imovel_id,
+            'load_id': self.load_id,
+            'preco': self.preco,
+            'valor_avaliacao': self.valor_avaliacao,
+            'observed_at': self.observed_at.isoformat() if self.observed_at else None,
+        }
@@ -0,0 +1,30 @@
+import json
+from datetime import datetime
+
+from src.models.user import db
+
+
+class PropertyAnalysis(db.Model):
+    """
+    Análise de IA gravada por imóvel físico (``Imovel.cluster_id``)
+
+    Permite reaproveitar a análise quando o mesmo imóvel volta com outro
+    número de oferta e preço praticamente igual.
+    """
+    __tablename__ = 'property_analyses'
+
+    id = db.Column(db.Integer, primary_key=True)
+    cluster_id = db.Column(db.Integer, nullable=False, index=True)
+    numero_imovel = db.Column(db.String(32), nullable=False)
+    valor_venda = db.Column(db.Float)
+    analysis = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'cluster_id': self.cluster_id,
+            'numero_imovel': self.numero_imovel,
+            'valor_venda': self.valor_venda,
+            'analysis': json.loads(self.analysis),
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from src.models.user import db
+
+
+class RevokedToken(db.Model):
+    """
+    Token JWT revogado antes de expirar (logout ou rotação do refresh token)
+
+    Identificado pela claim ``jti``. Cada processo mantém os jtis em memória
+    e relê as linhas gravadas desde a última sincronização (``revoked_at``);
+    linhas vencidas podem ser apagadas, pois o token já seria rejeitado
+    pela expiração.
+    """
+    __tablename__ = 'revoked_tokens'
+
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), unique=True, nullable=False)
+    user_id = db.Column(db.Integer, nullable=True)
+    token_type = db.Column(db.String(16), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def to_dict(self):
+        return {
+            'jti': self.jti,
+            'user_id': self.user_id,
+            'token_type': self.token_type,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+            'revoked_at': self.revoked_at.isoformat() if self.revoked_at else None,
+        }
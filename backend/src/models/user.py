@@ -10,6 +10,26 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password = db.Column(db.String(255), nullable=False)  # nova coluna para senha
 
+    @classmethod
+    def find_conflict(cls, username, email, exclude_id=None):
+        """
+        Campo único já usado por outro usuário ('username', 'email' ou None)
+
+        Uma só consulta para os dois campos; usada antes de trabalho caro
+        (hash de senha) e para explicar um IntegrityError.
+        """
+        query = db.session.query(cls.username, cls.email).filter(
+            db.or_(cls.username == username, cls.email == email)
+        )
+        if exclude_id is not None:
+            query = query.filter(cls.id != exclude_id)
+        conflicts = query.limit(2).all()
+        if any(row.username == username for row in conflicts):
+            return 'username'
+        if conflicts:
+            return 'email'
+        return None
+
     def __repr__(self):
         return f'<User {self.username}>'
 
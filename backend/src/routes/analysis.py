@@ -1,7 +1,14 @@
 from flask import Blueprint, request, jsonify
+from src.routes.profiling import admin_required
 from src.services.bedrock_service import BedrockService
+from src.services.market_stats import MarketStatsService
+from src.services.comps_service import comps_engine
+from src.services.analysis_store import analysis_store
+from src.services.bid_simulator import bid_simulator
+from src.services.portfolio_optimizer import PortfolioConstraints, portfolio_optimizer
+from src.services.scoring import quick_score, ranking_engine
+from src.services.scoring_rules import rule_engine
 import logging
-import traceback
 
 logger = logging.getLogger(__name__)
 
@@ -9,6 +16,7 @@ analysis_bp = Blueprint('analysis', __name__)
 
 # Inicializa serviços
 bedrock_service = BedrockService()
+market_stats_service = MarketStatsService()
 
 @analysis_bp.route('/property-analysis', methods=['POST'])
 def analyze_property():
@@ -45,8 +53,24 @@ def analyze_property():
         else:
             property_data['desconto_percentual'] = 0
         
-        # Realiza análise com IA
-        analysis = bedrock_service.analyze_property_opportunity(property_data)
+        # Mesmo imóvel físico já analisado (relistagem com preço equivalente)
+        stored = analysis_store.find(property_data.get('codigo'), property_data.get('valor_venda'))
+        if stored:
+            analysis = stored['analysis']
+            analysis['property_data'] = property_data
+            analysis['timestamp'] = property_data.get('timestamp')
+            return jsonify({
+                'success': True,
+                'analysis': analysis,
+                'reused': True,
+                'reused_from': stored['numero_imovel']
+            })
+        
+        # Realiza análise com IA, com os comparáveis como contexto de valor
+        comps_context = comps_engine.prompt_context(property_data)
+        analysis = bedrock_service.analyze_property_opportunity(property_data, comps_context)
+        if not bedrock_service.is_fallback_analysis(analysis):
+            analysis_store.save(property_data.get('codigo'), property_data.get('valor_venda'), analysis)
         
         # Adiciona dados calculados
         analysis['property_data'] = property_data
@@ -58,8 +82,7 @@ def analyze_property():
         })
         
     except Exception as e:
-        logger.error(f"Property analysis error: {e}")
-        logger.error(traceback.format_exc())
+        logger.exception("Property analysis error: %s", e)
         
         return jsonify({
             'error': 'Erro interno do servidor',
@@ -80,11 +103,21 @@ def get_market_insights():
         "common_types": ["type1", "type2"],
         "period": "string"
     }
+    
+    Campos omitidos são preenchidos a partir de /api/market/stats; basta
+    enviar {"uf": "SP"} ou {"cidade": "RECIFE", "uf": "PE"}.
     """
     try:
-        market_data = request.get_json()
+        market_data = request.get_json(silent=True) or {}
         
-        if not market_data:
+        # Sem agregados no body, usa as estatísticas pré-calculadas do recorte
+        if 'total_properties' not in market_data:
+            summary = market_stats_service.market_summary(
+                uf=market_data.get('uf', ''), cidade=market_data.get('cidade', '')
+            )
+            market_data = {**summary, **market_data}
+        
+        if not market_data.get('total_properties'):
             return jsonify({
                 'error': 'Dados de mercado são obrigatórios'
             }), 400
@@ -99,8 +132,7 @@ def get_market_insights():
         })
         
     except Exception as e:
-        logger.error(f"Market insights error: {e}")
-        logger.error(traceback.format_exc())
+        logger.exception("Market insights error: %s", e)
         
         return jsonify({
             'error': 'Erro interno do servidor',
@@ -160,14 +192,74 @@ def analyze_portfolio():
         })
         
     except Exception as e:
-        logger.error(f"Portfolio analysis error: {e}")
-        logger.error(traceback.format_exc())
+        logger.exception("Portfolio analysis error: %s", e)
         
         return jsonify({
             'error': 'Erro interno do servidor',
             'message': str(e)
         }), 500
 
+@analysis_bp.route('/portfolio-optimizer', methods=['POST'])
+def optimize_portfolio():
+    """
+    Seleciona os imóveis de maior lucro esperado que cabem no orçamento
+
+    Body:
+    {
+        "budget": number,                 // capital próprio disponível
+        "profile": "caixa_sac_20",        // perfil de financiamento
+        "interest_rate": number,          // opcional, sobrepõe o perfil
+        "down_payment_pct": number,       // opcional, sobrepõe o perfil
+        "horizon_months": 12,
+        "max_per_city": number,
+        "max_per_type": number,
+        "max_properties": number,
+        "min_discount": number,
+        "ufs": ["SP"], "cidades": ["string"], "tipos": ["string"],
+        "imovel_ids": [number],           // opcional, restringe os candidatos
+        "analyze": false                  // envia o portfólio escolhido para análise com IA
+    }
+    """
+    try:
+        data = request.get_json()
+
+        if not data or data.get('budget') is None:
+            return jsonify({
+                'error': 'Orçamento (budget) é obrigatório'
+            }), 400
+
+        try:
+            constraints = PortfolioConstraints.from_dict(data)
+            imovel_ids = data.get('imovel_ids')
+            if imovel_ids is not None:
+                imovel_ids = [int(i) for i in imovel_ids]
+        except (TypeError, ValueError) as e:
+            return jsonify({
+                'error': 'Parâmetros inválidos',
+                'message': str(e)
+            }), 400
+
+        result = portfolio_optimizer.optimize(constraints, imovel_ids)
+
+        if data.get('analyze') and result['selected']:
+            result['analysis'] = bedrock_service.analyze_investment_portfolio([
+                {**item, 'codigo': item['numero_imovel'], 'valor_venda': item['preco']}
+                for item in result['selected']
+            ])
+
+        return jsonify({
+            'success': True,
+            **result
+        })
+
+    except Exception as e:
+        logger.exception("Portfolio optimizer error: %s", e)
+
+        return jsonify({
+            'error': 'Erro interno do servidor',
+            'message': str(e)
+        }), 500
+
 @analysis_bp.route('/auction-strategy', methods=['POST'])
 def generate_auction_strategy():
     """
@@ -179,7 +271,8 @@ def generate_auction_strategy():
             "codigo": "string",
             "valor_venda": number,
             "desconto_percentual": number,
-            "cidade": "string"
+            "cidade": "string",
+            "uf": "string (opcional; sem ela os comparáveis são buscados pelo nome da cidade)"
         },
         "user_profile": {
             "experience_level": "iniciante|intermediario|avancado",
@@ -200,19 +293,86 @@ def generate_auction_strategy():
         property_data = data['property_data']
         user_profile = data['user_profile']
         
+        # Escada de lances local como base numérica para a estratégia
+        try:
+            bid_ladder = bid_simulator.simulate(property_data, user_profile)
+            bid_context = bid_simulator.prompt_context(bid_ladder)
+        except ValueError:
+            bid_ladder, bid_context = None, ''
+        
         # Gera estratégia com IA
-        strategy = bedrock_service.generate_auction_strategy(property_data, user_profile)
+        comps_context = comps_engine.prompt_context(property_data)
+        strategy = bedrock_service.generate_auction_strategy(property_data, user_profile, comps_context,
+                                                             bid_context)
         
         return jsonify({
             'success': True,
             'strategy': strategy,
+            'bid_ladder': bid_ladder,
             'property_data': property_data,
             'user_profile': user_profile
         })
         
     except Exception as e:
-        logger.error(f"Auction strategy error: {e}")
-        logger.error(traceback.format_exc())
+        logger.exception("Auction strategy error: %s", e)
+        
+        return jsonify({
+            'error': 'Erro interno do servidor',
+            'message': str(e)
+        }), 500
+
+@analysis_bp.route('/bid-ladder', methods=['POST'])
+def simulate_bid_ladder():
+    """
+    Rentabilidade por lance, do valor mínimo ao valor de avaliação
+    
+    Body:
+    {
+        "property_data": {
+            "valor_venda": number,          // lance mínimo
+            "valor_avaliacao": number,      // opcional (ou desconto_percentual)
+            "sale_price": number,           // opcional, padrão = avaliação
+            "monthly_rent": number,
+            "maintenance_reforms": number
+        },
+        "user_profile": {
+            "available_capital": number,
+            "risk_tolerance": "conservador|moderado|agressivo",
+            "target_return": number,        // % a.a., opcional (padrão CDI + prêmio)
+            "down_payment_pct": number,
+            "interest_rate": number
+        },
+        "steps": 41
+    }
+    
+    Sem IA: rápido o bastante para recalcular a cada ajuste do usuário.
+    """
+    try:
+        data = request.get_json()
+        
+        if not data or not data.get('property_data'):
+            return jsonify({
+                'error': 'Dados do imóvel são obrigatórios'
+            }), 400
+        
+        try:
+            ladder = bid_simulator.simulate(
+                data['property_data'], data.get('user_profile') or {},
+                steps=int(data.get('steps', 41))
+            )
+        except (TypeError, ValueError) as e:
+            return jsonify({
+                'error': 'Parâmetros inválidos',
+                'message': str(e)
+            }), 400
+        
+        return jsonify({
+            'success': True,
+            'bid_ladder': ladder
+        })
+        
+    except Exception as e:
+        logger.exception("Bid ladder error: %s", e)
         
         return jsonify({
             'error': 'Erro interno do servidor',
@@ -242,107 +402,106 @@ def calculate_quick_score():
                 'error': 'Dados do imóvel são obrigatórios'
             }), 400
         
-        score = 0
-        factors = []
-        
-        # Fator desconto (0-40 pontos)
-        valor_avaliacao = data.get('valor_avaliacao', 0)
-        valor_venda = data.get('valor_venda', 0)
-        
-        if valor_avaliacao > 0:
-            desconto = ((valor_avaliacao - valor_venda) / valor_avaliacao) * 100
-            
-            if desconto >= 40:
-                score += 40
-                factors.append(f"Excelente desconto: {desconto:.1f}%")
-            elif desconto >= 30:
-                score += 35
-                factors.append(f"Ótimo desconto: {desconto:.1f}%")
-            elif desconto >= 20:
-                score += 25
-                factors.append(f"Bom desconto: {desconto:.1f}%")
-            elif desconto >= 10:
-                score += 15
-                factors.append(f"Desconto moderado: {desconto:.1f}%")
-            else:
-                score += 5
-                factors.append(f"Desconto baixo: {desconto:.1f}%")
-        
-        # Fator financiamento (0-20 pontos)
-        if data.get('aceita_financiamento'):
-            score += 20
-            factors.append("Aceita financiamento")
-        else:
-            factors.append("Apenas à vista")
+        return jsonify({
+            'success': True,
+            'quick_analysis': quick_score(data)
+        })
         
-        # Fator ocupação (0-20 pontos)
-        if data.get('situacao_ocupacao') == 'desocupado':
-            score += 20
-            factors.append("Imóvel desocupado")
-        else:
-            factors.append("Imóvel ocupado - verificar situação")
-        
-        # Fator área (0-10 pontos)
-        area = data.get('area_total', 0)
-        if area >= 100:
-            score += 10
-            factors.append(f"Boa área: {area}m²")
-        elif area >= 50:
-            score += 7
-            factors.append(f"Área adequada: {area}m²")
-        elif area > 0:
-            score += 3
-            factors.append(f"Área compacta: {area}m²")
-        
-        # Fator localização (0-10 pontos) - simplificado
-        cidade = data.get('cidade', '').lower()
-        capitais = ['são paulo', 'rio de janeiro', 'belo horizonte', 'brasília', 
-                   'salvador', 'fortaleza', 'recife', 'porto alegre', 'curitiba']
-        
-        if any(cap in cidade for cap in capitais):
-            score += 10
-            factors.append("Localização em capital")
-        else:
-            score += 5
-            factors.append("Localização interior")
-        
-        # Classifica o score
-        if score >= 80:
-            classification = "Excelente oportunidade"
-            recommendation = "forte_compra"
-        elif score >= 65:
-            classification = "Boa oportunidade"
-            recommendation = "compra"
-        elif score >= 50:
-            classification = "Oportunidade regular"
-            recommendation = "neutro"
-        elif score >= 35:
-            classification = "Oportunidade com ressalvas"
-            recommendation = "cautela"
-        else:
-            classification = "Oportunidade de risco"
-            recommendation = "evitar"
+    except Exception as e:
+        logger.exception("Quick score error: %s", e)
+        
+        return jsonify({
+            'error': 'Erro interno do servidor',
+            'message': str(e)
+        }), 500
+
+@analysis_bp.route('/rank', methods=['POST'])
+def rank_properties():
+    """
+    Ranqueia o catálogo inteiro pelo score rápido
+    
+    Body (todos opcionais):
+    {
+        "uf": "SP",
+        "cidade": "string",
+        "tipo_imovel": "Apartamento",
+        "min_price": number,
+        "max_price": 300000,
+        "aceita_financiamento": boolean,
+        "limit": 100
+    }
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        try:
+            limit = int(data.get('limit', 100))
+            min_price, max_price = (
+                float(data[key]) if data.get(key) is not None else None for key in ('min_price', 'max_price')
+            )
+        except (TypeError, ValueError) as e:
+            return jsonify({
+                'error': 'Parâmetros inválidos',
+                'message': str(e)
+            }), 400
+        
+        if not 1 <= limit <= 1000:
+            return jsonify({
+                'error': 'limit deve estar entre 1 e 1000'
+            }), 400
+        
+        results = ranking_engine.rank(
+            uf=data.get('uf'),
+            cidade=data.get('cidade'),
+            tipo_imovel=data.get('tipo_imovel'),
+            min_price=min_price,
+            max_price=max_price,
+            aceita_financiamento=data.get('aceita_financiamento'),
+            limit=limit,
+        )
         
         return jsonify({
             'success': True,
-            'quick_analysis': {
-                'score': min(100, score),
-                'classification': classification,
-                'recommendation': recommendation,
-                'factors': factors,
-                'desconto_percentual': desconto if valor_avaliacao > 0 else 0
-            }
+            'count': len(results),
+            'results': results
         })
         
     except Exception as e:
-        logger.error(f"Quick score error: {e}")
-        logger.error(traceback.format_exc())
+        logger.exception("Rank error: %s", e)
         
         return jsonify({
             'error': 'Erro interno do servidor',
             'message': str(e)
         }), 500
 
+@analysis_bp.route('/scoring-rules', methods=['GET'])
+def get_scoring_rules():
+    """Regras de score em vigor e histórico de versões carregadas"""
+    rules = rule_engine.current()
+    return jsonify({
+        'success': True,
+        'rules': rules.describe(),
+        'history': rule_engine.history
+    })
+
+@analysis_bp.route('/scoring-rules/reload', methods=['POST'])
+@admin_required
+def reload_scoring_rules():
+    """Força a releitura do arquivo de regras (exige o token de administração)"""
+    try:
+        rules = rule_engine.reload()
+        return jsonify({
+            'success': True,
+            'version': rules.version,
+            'checksum': rules.checksum
+        })
+    except Exception as e:
+        logger.error("Scoring rules reload error: %s", e)
+        return jsonify({
+            'error': 'Regras de score inválidas',
+            'message': str(e)
+        }), 400
+
 @analysis_bp.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
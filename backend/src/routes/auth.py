@@ -1,11 +1,17 @@
 from datetime import datetime, timedelta
+from functools import wraps
 
 import logging
+import os
+import uuid
 
 import jwt
-from flask import Blueprint, request, jsonify, current_app
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Blueprint, request, jsonify, current_app, g
+from sqlalchemy.exc import IntegrityError
 from src.models.user import db, User
+from src.services.password_hasher import HashingBusyError, password_hasher
+from src.services.principal_cache import UserPrincipal, principal_cache
+from src.services.token_revocation import revocation_list
 
 
 logger = logging.getLogger(__name__)
@@ -14,14 +20,49 @@ logger = logging.getLogger(__name__)
 auth_bp = Blueprint('auth', __name__)
 
 
-def _generate_token(user_id: int, expires_in: int = 3600) -> str:
+ACCESS_TOKEN_TTL = int(os.environ.get("ACCESS_TOKEN_TTL", 3600))  # segundos
+REFRESH_TOKEN_TTL = int(os.environ.get("REFRESH_TOKEN_TTL", 30 * 24 * 3600))
+
+
+def _generate_token(user, expires_in: int = ACCESS_TOKEN_TTL, token_type: str = "access") -> str:
+    # username/email nas claims permitem o modo sem estado (AUTH_STATELESS);
+    # jti identifica o token na lista de revogação
+    principal = user if isinstance(user, UserPrincipal) else UserPrincipal.from_user(user)
     payload = {
-        "user_id": user_id,
+        **principal.claims(),
+        "type": token_type,
+        "jti": uuid.uuid4().hex,
         "exp": datetime.utcnow() + timedelta(seconds=expires_in),
     }
     return jwt.encode(payload, current_app.config["SECRET_KEY"], algorithm="HS256")
 
 
+def _token_pair(user) -> dict:
+    return {
+        "token": _generate_token(user),
+        "refresh_token": _generate_token(user, REFRESH_TOKEN_TTL, "refresh"),
+        "expires_in": ACCESS_TOKEN_TTL,
+    }
+
+
+def _decode(token: str, token_type: str) -> dict:
+    """Decodifica e valida tipo e revogação; levanta jwt.InvalidTokenError"""
+    data = jwt.decode(token, current_app.config["SECRET_KEY"], algorithms=["HS256"])
+    # Tokens anteriores à claim "type" são de acesso
+    if data.get("type", "access") != token_type:
+        raise jwt.InvalidTokenError("Wrong token type")
+    if revocation_list.is_revoked(data.get("jti")):
+        raise jwt.InvalidTokenError("Token revoked")
+    return data
+
+
+def _revoke(data: dict) -> bool:
+    """Revoga o token das claims; False se ele já estava revogado"""
+    return revocation_list.revoke(
+        data.get("jti"), datetime.utcfromtimestamp(data["exp"]), data.get("type", "access"), data.get("user_id")
+    )
+
+
 def _token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -31,14 +72,14 @@ def _token_required(f):
             return jsonify({"error": "Token is missing"}), 401
         token = parts[1]
         try:
-            data = jwt.decode(
-                token, current_app.config["SECRET_KEY"], algorithms=["HS256"]
-            )
-            current_user = User.query.get(data.get("user_id"))
+            data = _decode(token, "access")
+            # Usuário do cache de principals (sem consulta ao banco a cada requisição)
+            current_user = principal_cache.resolve(data)
             if not current_user:
                 raise ValueError("User not found")
         except Exception:
             return jsonify({"error": "Invalid or expired token"}), 401
+        g.token_claims = data
         return f(current_user, *args, **kwargs)
 
     return decorated
@@ -57,26 +98,25 @@ def register():
         if not data.get('username') or not data.get('email') or not data.get('password'):
             return jsonify({'error': 'Username, email and password are required'}), 400
 
-        if User.query.filter_by(email=data['email']).first() or User.query.filter_by(username=data['username']).first():
+        # Uma consulta para e-mail e usuário, antes do hash (caro); a restrição única cobre a corrida
+        if User.find_conflict(data['username'], data['email']):
             return jsonify({'error': 'User already exists'}), 409
 
-        hashed_password = generate_password_hash(data['password'])
+        hashed_password = password_hasher.hash(data['password'])
         new_user = User(username=data['username'], email=data['email'], password=hashed_password)
 
         db.session.add(new_user)
-        db.session.commit()
-
-
-        token = jwt.encode(
-            {'user_id': new_user.id, 'exp': datetime.utcnow() + timedelta(hours=1)},
-            current_app.config['SECRET_KEY'],
-            algorithm='HS256'
-        )
-
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({'error': 'User already exists'}), 409
 
-        return jsonify({'token': token, 'user': new_user.to_dict()}), 201
+        return jsonify({**_token_pair(new_user), 'user': new_user.to_dict()}), 201
+    except HashingBusyError:
+        return jsonify({'error': 'Server busy, try again'}), 503
     except Exception as e:
-        logger.error(f"Error registering user: {e}")
+        logger.error("Error registering user: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 
@@ -91,17 +131,80 @@ def login():
 
         user = User.query.filter_by(email=data['email'], username=data['username']).first()
 
-        if not user or not check_password_hash(user.password, data['password']):
+        if not user:
+            return jsonify({'error': 'Invalid credentials'}), 401
+
+        valid, new_hash = password_hasher.verify(user.password, data['password'])
+        if not valid:
             return jsonify({'error': 'Invalid credentials'}), 401
 
-        token = jwt.encode(
-            {'user_id': user.id, 'exp': datetime.utcnow() + timedelta(hours=1)},
-            current_app.config['SECRET_KEY'],
-            algorithm='HS256'
-        )
+        # Hash gravado com método/custo antigo: troca pelo atual
+        if new_hash:
+            user.password = new_hash
+            db.session.commit()
 
-        return jsonify({'token': token, 'user': user.to_dict()}), 200
+        return jsonify({**_token_pair(user), 'user': user.to_dict()}), 200
+    except HashingBusyError:
+        return jsonify({'error': 'Server busy, try again'}), 503
     except Exception as e:
-        logger.error(f"Error during login: {e}")
+        logger.error("Error during login: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
+
+
+@auth_bp.route("/token/refresh", methods=["POST"])
+def refresh_token():
+    """
+    Troca um refresh token por um novo par (rotação)
+
+    Body: {"refresh_token": "..."}. O refresh token usado é revogado antes
+    de emitir o novo par: cada refresh token vale uma única vez, mesmo que
+    a lista em memória de outro worker ainda não tenha sincronizado. O novo
+    par não exige senha, então o hash não é recalculado.
+    """
+    try:
+        data = request.get_json() or {}
+        if not data.get('refresh_token'):
+            return jsonify({'error': 'Refresh token is required'}), 400
+
+        try:
+            claims = _decode(data['refresh_token'], "refresh")
+        except jwt.InvalidTokenError:
+            return jsonify({'error': 'Invalid or expired token'}), 401
+
+        # Sempre do banco (mesmo com AUTH_STATELESS): um refresh estende a
+        # sessão por mais REFRESH_TOKEN_TTL e não pode confiar só nas claims
+        user = db.session.get(User, claims.get('user_id'))
+        if not user:
+            return jsonify({'error': 'Invalid or expired token'}), 401
+        principal = UserPrincipal.from_user(user)
+
+        if not _revoke(claims):
+            # Já usado (reuso ou corrida com outra requisição)
+            return jsonify({'error': 'Invalid or expired token'}), 401
+        return jsonify({**_token_pair(principal), 'user': principal.to_dict()}), 200
+    except Exception as e:
+        logger.error("Error refreshing token: %s", e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@auth_bp.route("/logout", methods=["POST"])
+@_token_required
+def logout(current_user):
+    """Revoga o token de acesso atual e, se enviado, o refresh token"""
+    try:
+        _revoke(g.token_claims)
+
+        refresh = (request.get_json(silent=True) or {}).get('refresh_token')
+        if refresh:
+            try:
+                claims = _decode(refresh, "refresh")
+                if claims.get("user_id") == current_user.id:
+                    _revoke(claims)
+            except jwt.InvalidTokenError:
+                pass
+
+        return jsonify({'message': 'Logged out'}), 200
+    except Exception as e:
+        logger.error("Error during logout: %s", e)
+        return jsonify({'error': 'Internal server error'}), 500
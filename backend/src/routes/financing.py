@@ -7,8 +7,18 @@ from src.services.financing_calculator import (
     calculate_property_financing,
     FinancingCalculatorService,
 )
+from src.services.listing_financials import listing_financials_service
+from src.services.market_rates import market_rates
+from src.services.tax_engine import TaxProfile, capital_gains_tax, compute_capital_gains
+from src.services.viability_service import (
+    viability_service,
+    PRAZO_LOCACAO_ANOS,
+    VARIACAO_SENSIBILIDADE,
+)
 import logging
 
+import numpy as np
+
 # Module logger
 logger = logging.getLogger(__name__)
 
@@ -69,14 +79,14 @@ def calculate_financing():
         result = calculate_property_financing(data)
         
         if result['success']:
-            logger.info(f"Cálculo de financiamento realizado com sucesso para imóvel de R$ {data['property_value']}")
+            logger.info("Cálculo de financiamento realizado com sucesso para imóvel de R$ %s", data['property_value'])
             return jsonify(result), 200
         else:
-            logger.error(f"Erro no cálculo de financiamento: {result.get('error', 'Erro desconhecido')}")
+            logger.error("Erro no cálculo de financiamento: %s", result.get('error', 'Erro desconhecido'))
             return jsonify(result), 400
             
     except Exception as e:
-        logger.error(f"Erro inesperado no cálculo de financiamento: {str(e)}")
+        logger.error("Erro inesperado no cálculo de financiamento: %s", e)
         return jsonify({
             'success': False,
             'error': 'Erro interno do servidor',
@@ -158,7 +168,8 @@ def sensitivity_analysis():
                 'total_investment': result.total_investment,
                 'comparisons': result.comparisons,
                 'breakdown': result.breakdown,
-                'timeline': result.timeline
+                'timeline': result.timeline,
+                'cash_flow': result.cash_flow
             }
         
         response = {
@@ -174,11 +185,11 @@ def sensitivity_analysis():
             }
         }
         
-        logger.info(f"Análise de sensibilidade realizada com sucesso para imóvel de R$ {data['property_value']}")
+        logger.info("Análise de sensibilidade realizada com sucesso para imóvel de R$ %s", data['property_value'])
         return jsonify(response), 200
         
     except Exception as e:
-        logger.error(f"Erro na análise de sensibilidade: {str(e)}")
+        logger.error("Erro na análise de sensibilidade: %s", e)
         return jsonify({
             'success': False,
             'error': 'Erro interno do servidor',
@@ -189,6 +200,9 @@ def sensitivity_analysis():
 def quick_estimate():
     """
     Estimativa rápida de financiamento com dados básicos
+
+    Com apenas ``imovel_id`` no payload, retorna as métricas pré-calculadas
+    do imóvel para os perfis padrão (Caixa SAC/Price, entrada de 20%/30%).
     """
     try:
         data = request.get_json()
@@ -198,10 +212,32 @@ def quick_estimate():
                 'success': False,
                 'error': 'Dados não fornecidos'
             }), 400
+
+        if data.get('imovel_id') is not None and 'property_value' not in data:
+            try:
+                imovel_id = int(data['imovel_id'])
+            except (TypeError, ValueError) as e:
+                return jsonify({
+                    'success': False,
+                    'error': 'Dados inválidos',
+                    'message': str(e)
+                }), 400
+            financials = listing_financials_service.get(imovel_id)
+            if not financials:
+                return jsonify({
+                    'success': False,
+                    'error': 'Imóvel não encontrado ou sem preço'
+                }), 404
+            return jsonify({
+                'success': True,
+                'precomputed': True,
+                'rates_version': market_rates.version,
+                'financials': financials
+            }), 200
         
         property_value = float(data.get('property_value', 0))
         down_payment = float(data.get('down_payment', 0))
-        interest_rate = float(data.get('interest_rate', 7.1))
+        interest_rate = float(data.get('interest_rate', market_rates.financing_rate('caixa_sac')))
         loan_term = int(data.get('loan_term', 360))
         
         if property_value <= 0:
@@ -254,63 +290,245 @@ def quick_estimate():
             }
         }
         
-        logger.info(f"Estimativa rápida calculada para imóvel de R$ {property_value}")
+        logger.info("Estimativa rápida calculada para imóvel de R$ %s", property_value)
         return jsonify(response), 200
         
     except Exception as e:
-        logger.error(f"Erro na estimativa rápida: {str(e)}")
+        logger.error("Erro na estimativa rápida: %s", e)
         return jsonify({
             'success': False,
             'error': 'Erro interno do servidor',
             'message': 'Ocorreu um erro inesperado na estimativa rápida'
         }), 500
 
+MAX_TAX_BATCH = 100000
+
+@financing_bp.route('/capital-gains-tax', methods=['POST'])
+def calculate_capital_gains_tax():
+    """
+    Imposto de Renda sobre ganho de capital na venda (pessoa física)
+    
+    Exemplo de payload (uma venda):
+    {
+        "gain": 120000,
+        "sale_price": 600000,
+        "holding_months": 24,
+        "acquisition_year": null,
+        "profile": {
+            "only_property": false,
+            "sold_property_last_5_years": false,
+            "residential": true,
+            "reinvest_fraction": 0
+        }
+    }
+    
+    Em lote: "sales": [{"gain", "sale_price", "holding_months"}, ...] com o
+    mesmo "profile" para todas.
+    """
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({
+                'success': False,
+                'error': 'Dados não fornecidos'
+            }), 400
+        
+        profile = TaxProfile.from_dict(data.get('profile'))
+        acquisition_year = data.get('acquisition_year')
+        
+        sales = data.get('sales')
+        if sales is None:
+            if 'gain' not in data or 'sale_price' not in data:
+                return jsonify({
+                    'success': False,
+                    'error': 'Campos obrigatórios ausentes',
+                    'missing_fields': [f for f in ('gain', 'sale_price') if f not in data]
+                }), 400
+            result = capital_gains_tax(
+                float(data['gain']), float(data['sale_price']), int(data.get('holding_months', 0)),
+                profile, int(acquisition_year) if acquisition_year else None
+            )
+            return jsonify({'success': True, 'tax': result}), 200
+        
+        if not isinstance(sales, list) or not sales or len(sales) > MAX_TAX_BATCH:
+            return jsonify({
+                'success': False,
+                'error': f'sales deve ser uma lista com 1 a {MAX_TAX_BATCH} vendas'
+            }), 400
+        
+        result = compute_capital_gains(
+            np.array([float(s.get('gain', 0)) for s in sales]),
+            np.array([float(s.get('sale_price', 0)) for s in sales]),
+            np.array([float(s.get('holding_months', 0)) for s in sales]),
+            profile,
+            int(acquisition_year) if acquisition_year else None
+        )
+        
+        return jsonify({
+            'success': True,
+            'count': len(sales),
+            'total_tax': round(float(result['tax'].sum()), 2),
+            'taxes': np.round(result['tax'], 2).tolist(),
+            'taxable_gains': np.round(result['taxable_gain'], 2).tolist(),
+            'exempt': result['exempt'].tolist()
+        }), 200
+        
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'success': False,
+            'error': 'Dados inválidos',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        logger.error("Erro no cálculo de imposto sobre ganho de capital: %s", e)
+        return jsonify({
+            'success': False,
+            'error': 'Erro interno do servidor',
+            'message': 'Ocorreu um erro inesperado no cálculo do imposto'
+        }), 500
+
+MAX_VIABILITY_BATCH = 10000
+VIABILITY_REQUIRED_FIELDS = ('valor_arrematacao', 'valor_aluguel_mensal', 'valor_venda_estimado')
+
+def _viability_request():
+    """Valida o payload de viabilidade; retorna (dados, resposta de erro)"""
+    data = request.get_json()
+    if not data:
+        return None, (jsonify({'success': False, 'error': 'Dados não fornecidos'}), 400)
+
+    properties = data.get('properties')
+    if not isinstance(properties, list) or not properties or len(properties) > MAX_VIABILITY_BATCH:
+        return None, (jsonify({
+            'success': False,
+            'error': f'properties deve ser uma lista com 1 a {MAX_VIABILITY_BATCH} imóveis'
+        }), 400)
+
+    for index, prop in enumerate(properties):
+        missing = [f for f in VIABILITY_REQUIRED_FIELDS if not isinstance(prop, dict) or f not in prop]
+        if missing:
+            return None, (jsonify({
+                'success': False,
+                'error': 'Campos obrigatórios ausentes',
+                'index': index,
+                'missing_fields': missing
+            }), 400)
+    return data, None
+
+@financing_bp.route('/viability', methods=['POST'])
+def calculate_viability():
+    """
+    Viabilidade de locação e revenda para uma lista de imóveis
+
+    Exemplo de payload:
+    {
+        "properties": [{
+            "id": 1,
+            "valor_arrematacao": 180000,
+            "valor_reforma": 25000,
+            "valor_aluguel_mensal": 1800,
+            "valor_venda_estimado": 280000,
+            "custos_adicionais": {"documentacao": 3000},
+            "prazo_venda_meses": 8
+        }],
+        "prazo_anos": 10,
+        "variacao_percentual": 20,
+        "profile": {"only_property": false}
+    }
+    """
+    try:
+        data, error = _viability_request()
+        if error:
+            return error
+
+        reports = viability_service.relatorio_lote(
+            data['properties'],
+            prazo_anos=int(data.get('prazo_anos', PRAZO_LOCACAO_ANOS)),
+            variacao_percentual=float(data.get('variacao_percentual', VARIACAO_SENSIBILIDADE)),
+            tax_profile=TaxProfile.from_dict(data.get('profile'))
+        )
+
+        return jsonify({
+            'success': True,
+            'count': len(reports),
+            'rates_version': market_rates.version,
+            'results': reports
+        }), 200
+
+    except (TypeError, ValueError, AttributeError) as e:
+        return jsonify({
+            'success': False,
+            'error': 'Dados inválidos',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        logger.error("Erro no cálculo de viabilidade: %s", e)
+        return jsonify({
+            'success': False,
+            'error': 'Erro interno do servidor',
+            'message': 'Ocorreu um erro inesperado no cálculo de viabilidade'
+        }), 500
+
+@financing_bp.route('/viability/compare', methods=['POST'])
+def compare_viability():
+    """
+    Apenas a comparação locação x revenda e a estratégia recomendada
+
+    Mesmo payload de /viability; a resposta traz, por imóvel, o ROI anual
+    de cada estratégia, o payback da locação e a recomendação.
+    """
+    try:
+        data, error = _viability_request()
+        if error:
+            return error
+
+        reports = viability_service.relatorio_lote(
+            data['properties'],
+            prazo_anos=int(data.get('prazo_anos', PRAZO_LOCACAO_ANOS)),
+            tax_profile=TaxProfile.from_dict(data.get('profile'))
+        )
+
+        return jsonify({
+            'success': True,
+            'count': len(reports),
+            'rates_version': market_rates.version,
+            'results': [
+                {'id': report['id'], **report['metricas_resumo']}
+                for report in reports
+            ]
+        }), 200
+
+    except (TypeError, ValueError, AttributeError) as e:
+        return jsonify({
+            'success': False,
+            'error': 'Dados inválidos',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        logger.error("Erro na comparação de estratégias: %s", e)
+        return jsonify({
+            'success': False,
+            'error': 'Erro interno do servidor',
+            'message': 'Ocorreu um erro inesperado na comparação de estratégias'
+        }), 500
+
 @financing_bp.route('/market-rates', methods=['GET'])
 def get_market_rates():
     """
     Retorna taxas de mercado atualizadas para comparação
     """
     try:
-        # Em produção, essas taxas viriam de APIs externas ou banco de dados
-        market_rates = {
-            'financing': {
-                'caixa_sac': 7.1,  # % ao ano
-                'caixa_price': 7.3,  # % ao ano
-                'banco_brasil': 7.5,  # % ao ano
-                'itau': 8.2,  # % ao ano
-                'bradesco': 8.0,  # % ao ano
-                'santander': 8.1  # % ao ano
-            },
-            'investments': {
-                'cdi': 12.5,  # % ao ano
-                'selic': 11.75,  # % ao ano
-                'savings': 6.2,  # % ao ano
-                'cdb': 12.8,  # % ao ano
-                'lci_lca': 10.5,  # % ao ano
-                'stocks_ibovespa': 15.0  # % ao ano (média histórica)
-            },
-            'real_estate': {
-                'average_yield': 6.5,  # % ao ano
-                'appreciation_rate': 5.2,  # % ao ano
-                'vacancy_rate': 8.5,  # %
-                'management_fee': 8.0  # % sobre aluguel
-            },
-            'economic_indicators': {
-                'inflation_ipca': 4.68,  # % ao ano
-                'inflation_igpm': 5.12,  # % ao ano
-                'dollar_rate': 5.15,  # BRL/USD
-                'unemployment_rate': 8.2  # %
-            },
-            'last_updated': '2024-01-15T10:00:00Z'
-        }
+        # Taxas do arquivo de taxas de mercado (recarregado quando alterado)
+        rates = market_rates.current()
         
         return jsonify({
             'success': True,
-            'market_rates': market_rates
+            'market_rates': rates,
+            'version': market_rates.version
         }), 200
         
     except Exception as e:
-        logger.error(f"Erro ao obter taxas de mercado: {str(e)}")
+        logger.error("Erro ao obter taxas de mercado: %s", e)
         return jsonify({
             'success': False,
             'error': 'Erro interno do servidor',
@@ -410,11 +628,11 @@ def generate_amortization_table():
             }
         }
         
-        logger.info(f"Tabela de amortização gerada para financiamento de R$ {principal} ({system.upper()})")
+        logger.info("Tabela de amortização gerada para financiamento de R$ %s (%s)", principal, system.upper())
         return jsonify(response), 200
         
     except Exception as e:
-        logger.error(f"Erro ao gerar tabela de amortização: {str(e)}")
+        logger.error("Erro ao gerar tabela de amortização: %s", e)
         return jsonify({
             'success': False,
             'error': 'Erro interno do servidor',
@@ -0,0 +1,258 @@
+from flask import Blueprint, request, jsonify
+from src.services.search_service import ListingSearchService
+from src.services.geo_service import GeoService
+from src.services.listing_financials import listing_financials_service
+from src.services.comps_service import comps_engine
+from src.services.dedup_service import DedupService
+from src.models.imovel import Imovel
+from src.models.user import db
+import logging
+
+logger = logging.getLogger(__name__)
+
+imoveis_bp = Blueprint('imoveis', __name__)
+
+search_service = ListingSearchService()
+geo_service = GeoService()
+dedup_service = DedupService()
+
+MAX_GEO_RESULTS = 500
+
+
+@imoveis_bp.route('/search', methods=['GET'])
+def search_imoveis():
+    """
+    Busca textual ranqueada sobre descrição, bairro e endereço
+
+    Query params:
+        q: texto livre (obrigatório)
+        uf, cidade: filtros opcionais
+        limit (padrão 20, máx. 100), offset
+    """
+    try:
+        query = (request.args.get('q') or '').strip()
+        if not query:
+            return jsonify({
+                'error': 'Parâmetro q é obrigatório'
+            }), 400
+
+        results = search_service.search(
+            query,
+            uf=request.args.get('uf'),
+            cidade=request.args.get('cidade'),
+            limit=request.args.get('limit', 20, type=int),
+            offset=request.args.get('offset', 0, type=int),
+        )
+
+        return jsonify({
+            'success': True,
+            'query': query,
+            'count': len(results),
+            'results': results
+        })
+
+    except Exception as e:
+        logger.exception("Search error: %s", e)
+
+        return jsonify({
+            'error': 'Erro interno do servidor',
+            'message': str(e)
+        }), 500
+
+
+@imoveis_bp.route('/nearby', methods=['GET'])
+def nearby_imoveis():
+    """
+    Imóveis num raio, ordenados por distância
+
+    Query params:
+        lat, lon: ponto central, ou imovel_id para usar a posição de um imóvel
+        radius_km (padrão 5), limit (padrão 50), uf, tipo_imovel
+    """
+    try:
+        latitude = request.args.get('lat', type=float)
+        longitude = request.args.get('lon', type=float)
+        imovel_id = request.args.get('imovel_id', type=int)
+
+        if imovel_id is not None:
+            imovel = db.session.get(Imovel, imovel_id)
+            if not imovel:
+                return jsonify({'error': 'Imóvel não encontrado'}), 404
+            if imovel.latitude is None:
+                return jsonify({'error': 'Imóvel sem geolocalização'}), 422
+            latitude, longitude = imovel.latitude, imovel.longitude
+
+        if latitude is None or longitude is None:
+            return jsonify({'error': 'Informe lat e lon ou imovel_id'}), 400
+
+        radius_km = request.args.get('radius_km', 5.0, type=float)
+        if not 0 < radius_km <= 100:
+            return jsonify({'error': 'radius_km deve estar entre 0 e 100'}), 400
+
+        results = geo_service.nearby(
+            latitude, longitude, radius_km,
+            limit=min(request.args.get('limit', 50, type=int), MAX_GEO_RESULTS),
+            uf=request.args.get('uf'),
+            tipo_imovel=request.args.get('tipo_imovel'),
+        )
+
+        return jsonify({
+            'success': True,
+            'center': {'lat': latitude, 'lon': longitude},
+            'radius_km': radius_km,
+            'count': len(results),
+            'results': results
+        })
+
+    except Exception as e:
+        logger.exception("Nearby search error: %s", e)
+
+        return jsonify({
+            'error': 'Erro interno do servidor',
+            'message': str(e)
+        }), 500
+
+
+@imoveis_bp.route('/bbox', methods=['GET'])
+def bbox_imoveis():
+    """
+    Imóveis dentro de um retângulo (ex.: área visível do mapa)
+
+    Query params:
+        min_lat, min_lon, max_lat, max_lon (obrigatórios), limit, uf, tipo_imovel
+    """
+    try:
+        bounds = [request.args.get(name, type=float) for name in ('min_lat', 'min_lon', 'max_lat', 'max_lon')]
+        if any(value is None for value in bounds):
+            return jsonify({'error': 'min_lat, min_lon, max_lat e max_lon são obrigatórios'}), 400
+
+        min_lat, min_lon, max_lat, max_lon = bounds
+        if min_lat > max_lat or min_lon > max_lon:
+            return jsonify({'error': 'Retângulo inválido'}), 400
+
+        results = geo_service.within_bbox(
+            min_lat, min_lon, max_lat, max_lon,
+            limit=min(request.args.get('limit', 100, type=int), MAX_GEO_RESULTS),
+            uf=request.args.get('uf'),
+            tipo_imovel=request.args.get('tipo_imovel'),
+        )
+
+        return jsonify({
+            'success': True,
+            'count': len(results),
+            'results': results
+        })
+
+    except Exception as e:
+        logger.exception("Bounding box search error: %s", e)
+
+        return jsonify({
+            'error': 'Erro interno do servidor',
+            'message': str(e)
+        }), 500
+
+
+@imoveis_bp.route('/<int:imovel_id>/financials', methods=['GET'])
+def imovel_financials(imovel_id):
+    """Métricas de financiamento pré-calculadas do imóvel, por perfil"""
+    try:
+        imovel = db.session.get(Imovel, imovel_id)
+        if not imovel:
+            return jsonify({'error': 'Imóvel não encontrado'}), 404
+
+        return jsonify({
+            'success': True,
+            'imovel_id': imovel_id,
+            'financials': listing_financials_service.get(imovel_id)
+        })
+
+    except Exception as e:
+        logger.exception("Listing financials error: %s", e)
+
+        return jsonify({
+            'error': 'Erro interno do servidor',
+            'message': str(e)
+        }), 500
+
+
+@imoveis_bp.route('/<int:imovel_id>/comps', methods=['GET'])
+def imovel_comps(imovel_id):
+    """
+    Imóveis comparáveis (mesma cidade, tipo, área, quartos e preço/m²)
+
+    Query params:
+        k: número de comparáveis (padrão 10, máx. 50)
+    """
+    try:
+        imovel = db.session.get(Imovel, imovel_id)
+        if not imovel:
+            return jsonify({'error': 'Imóvel não encontrado'}), 404
+
+        result = comps_engine.find(imovel.to_dict(), k=request.args.get('k', 10, type=int))
+        return jsonify({'success': True, 'imovel_id': imovel_id, **result})
+
+    except Exception as e:
+        logger.exception("Comps error: %s", e)
+
+        return jsonify({
+            'error': 'Erro interno do servidor',
+            'message': str(e)
+        }), 500
+
+
+@imoveis_bp.route('/comps', methods=['POST'])
+def comps_for_listing():
+    """
+    Comparáveis para um imóvel informado no corpo (fora do catálogo)
+
+    Body: uf, cidade (obrigatórios), tipo_imovel, bairro, area_total,
+    quartos, preco ou valor_venda, k
+    """
+    try:
+        data = request.get_json() or {}
+        if not data.get('uf') or not data.get('cidade'):
+            return jsonify({'error': 'uf e cidade são obrigatórios'}), 400
+
+        try:
+            k = int(data.get('k', 10))
+        except (TypeError, ValueError) as e:
+            return jsonify({
+                'error': 'Parâmetros inválidos',
+                'message': str(e)
+            }), 400
+
+        result = comps_engine.find(data, k=k)
+        return jsonify({'success': True, **result})
+
+    except Exception as e:
+        logger.exception("Comps error: %s", e)
+
+        return jsonify({
+            'error': 'Erro interno do servidor',
+            'message': str(e)
+        }), 500
+
+
+@imoveis_bp.route('/<int:imovel_id>/history', methods=['GET'])
+def imovel_price_history(imovel_id):
+    """Histórico de preços do imóvel físico, incluindo relistagens com outro número"""
+    try:
+        imovel = db.session.get(Imovel, imovel_id)
+        if not imovel:
+            return jsonify({'error': 'Imóvel não encontrado'}), 404
+
+        return jsonify({
+            'success': True,
+            'imovel_id': imovel_id,
+            'cluster_id': dedup_service.cluster_of(imovel),
+            'relistings': [other.numero_imovel for other in dedup_service.duplicates(imovel)],
+            'history': dedup_service.price_history(imovel)
+        })
+
+    except Exception as e:
+        logger.exception("Price history error: %s", e)
+
+        return jsonify({
+            'error': 'Erro interno do servidor',
+            'message': str(e)
+        }), 500
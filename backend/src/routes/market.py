@@ -0,0 +1,58 @@
+from flask import Blueprint, request, jsonify
+from src.services.market_stats import MarketStatsService
+import logging
+
+logger = logging.getLogger(__name__)
+
+market_bp = Blueprint('market', __name__)
+
+market_stats_service = MarketStatsService()
+
+STATS_MAX_AGE = 300  # segundos
+
+
+@market_bp.route('/stats', methods=['GET'])
+def get_market_stats():
+    """
+    Estatísticas pré-calculadas de mercado
+
+    Query params:
+        uf, cidade, bairro, tipo_imovel: recorte (todos opcionais)
+        group_by: uf|cidade|bairro|tipo_imovel - lista o nível abaixo do recorte
+        limit: máximo de linhas em group_by (padrão 50)
+
+    Após um refresh, os workers passam a servir os agregados novos em até
+    MARKET_STATS_VERSION_INTERVAL segundos (mais o max-age do Cache-Control).
+    """
+    try:
+        uf = request.args.get('uf', '')
+        cidade = request.args.get('cidade', '')
+        bairro = request.args.get('bairro', '')
+        tipo_imovel = request.args.get('tipo_imovel', '')
+        group_by = request.args.get('group_by')
+
+        if group_by:
+            try:
+                stats = market_stats_service.breakdown(
+                    group_by, uf=uf, cidade=cidade, tipo_imovel=tipo_imovel,
+                    limit=min(request.args.get('limit', 50, type=int), 500),
+                )
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            response = jsonify({'success': True, 'group_by': group_by, 'stats': stats})
+        else:
+            stats = market_stats_service.get(uf=uf, cidade=cidade, bairro=bairro, tipo_imovel=tipo_imovel)
+            if stats is None:
+                return jsonify({'error': 'Nenhuma estatística para o recorte informado'}), 404
+            response = jsonify({'success': True, 'stats': stats})
+
+        response.headers['Cache-Control'] = f'public, max-age={STATS_MAX_AGE}'
+        return response
+
+    except Exception as e:
+        logger.exception("Market stats error: %s", e)
+
+        return jsonify({
+            'error': 'Erro interno do servidor',
+            'message': str(e)
+        }), 500
@@ -0,0 +1,11 @@
+from flask import Blueprint, Response
+
+from src.services.metrics import registry
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Métricas de todos os workers no formato texto do Prometheus"""
+    return Response(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,37 @@
+from functools import wraps
+
+from flask import Blueprint, jsonify, request, send_from_directory
+
+from src.services.profiler import ADMIN_HEADER, PROFILE_EXTENSIONS, profiler
+
+profiling_bp = Blueprint('profiling', __name__)
+
+
+def admin_required(f):
+    """Exige o token de administração (``PROFILING_ADMIN_TOKEN``) em ``X-Admin-Token``"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if not profiler.admin_token:
+            return jsonify({'error': 'Administração não habilitada'}), 404
+        if not profiler.authorized(request.headers.get(ADMIN_HEADER)):
+            return jsonify({'error': 'Acesso negado'}), 403
+        return f(*args, **kwargs)
+
+    return decorated
+
+
+@profiling_bp.route('/profiles', methods=['GET'])
+@admin_required
+def list_profiles():
+    """Perfis gravados, do mais recente ao mais antigo"""
+    profiles = profiler.list_profiles()
+    return jsonify({'profiles': profiles, 'count': len(profiles)})
+
+
+@profiling_bp.route('/profiles/<path:name>', methods=['GET'])
+@admin_required
+def download_profile(name):
+    """Baixa um ``.prof`` (pstats/snakeviz) ou ``.collapsed`` (flamegraph)"""
+    if '/' in name or not name.endswith(PROFILE_EXTENSIONS):
+        return jsonify({'error': 'Perfil não encontrado'}), 404
+    return send_from_directory(profiler.directory, name, as_attachment=True)
@@ -1,7 +1,10 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+import json
 import logging
-import traceback
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from src.models.user import User, db
+from src.services.principal_cache import principal_cache
 
 logger = logging.getLogger(__name__)
 
@@ -12,17 +15,87 @@ ERROR_MESSAGES = {
     'INTERNAL_ERROR': 'Erro interno do servidor'
 }
 
+CONFLICT_ERRORS = {
+    'username': ERROR_MESSAGES['USERNAME_EXISTS'],
+    'email': ERROR_MESSAGES['EMAIL_EXISTS'],
+}
+
 user_bp = Blueprint('user', __name__)
 
 
+def _commit_unique(username, email, exclude_id=None):
+    """
+    Grava a sessão contando com as restrições únicas do banco
+
+    Retorna a mensagem de conflito (username/email já usados) ou None. Sem
+    consulta prévia: a checagem só acontece quando o INSERT/UPDATE falha.
+    """
+    try:
+        db.session.commit()
+        return None
+    except IntegrityError:
+        db.session.rollback()
+        conflict = User.find_conflict(username, email, exclude_id)
+        if conflict is None:
+            raise
+        return CONFLICT_ERRORS[conflict]
+
+
+USER_FIELDS = ('id', 'username', 'email')
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 200
+
+
 @user_bp.route('/users', methods=['GET'])
 def get_users():
+    """
+    Lista usuários por páginas de id (keyset), com JSON em streaming
+
+    Query params:
+        after_id: último id da página anterior (padrão 0)
+        limit (padrão 100, máx. 1000)
+        fields: colunas separadas por vírgula (id, username, email); id sempre incluso
+
+    Resposta: {"users": [...], "count": n, "next_after_id": id ou null}
+    """
     try:
-        users = User.query.all()
-        return jsonify([user.to_dict() for user in users])
+        after_id = request.args.get('after_id', 0, type=int)
+        limit = min(max(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+        requested = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()]
+        invalid = [f for f in requested if f not in USER_FIELDS]
+        if invalid:
+            return jsonify({'error': 'Campos inválidos', 'invalid_fields': invalid}), 400
+        fields = ['id'] + [f for f in USER_FIELDS if f in requested and f != 'id'] if requested else list(USER_FIELDS)
+
+        # Só as colunas pedidas, sem objetos ORM; uma linha extra indica se há próxima página
+        statement = (
+            select(*(getattr(User, f) for f in fields))
+            .where(User.id > after_id)
+            .order_by(User.id)
+            .limit(limit + 1)
+            .execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+        rows = db.session.execute(statement)
+
+        def generate():
+            count = 0
+            last_id = None
+            has_more = False
+            yield '{"users": ['
+            for row in rows:
+                if count == limit:
+                    has_more = True
+                    break
+                yield (',' if count else '') + json.dumps(dict(zip(fields, row)), ensure_ascii=False)
+                count += 1
+                last_id = row[0]
+            rows.close()
+            yield f'], "count": {count}, "next_after_id": {json.dumps(last_id if has_more else None)}}}'
+
+        return Response(stream_with_context(generate()), mimetype='application/json')
     except Exception as e:
-        logger.error(f"Erro ao listar usuários: {e}")
-        logger.error(traceback.format_exc())
+        logger.exception("Erro ao listar usuários: %s", e)
         return jsonify({'error': ERROR_MESSAGES['INTERNAL_ERROR'], 'message': str(e)}), 500
 
 
@@ -37,19 +110,14 @@ def create_user():
         if missing_fields:
             return jsonify({'error': ERROR_MESSAGES['MISSING_FIELDS'], 'missing_fields': missing_fields}), 400
 
-        if User.query.filter_by(username=username).first():
-            return jsonify({'error': ERROR_MESSAGES['USERNAME_EXISTS']}), 400
-
-        if User.query.filter_by(email=email).first():
-            return jsonify({'error': ERROR_MESSAGES['EMAIL_EXISTS']}), 400
-
         user = User(username=username, email=email)
         db.session.add(user)
-        db.session.commit()
+        conflict = _commit_unique(username, email)
+        if conflict:
+            return jsonify({'error': conflict}), 400
         return jsonify(user.to_dict()), 201
     except Exception as e:
-        logger.error(f"Erro ao criar usuário: {e}")
-        logger.error(traceback.format_exc())
+        logger.exception("Erro ao criar usuário: %s", e)
         return jsonify({'error': ERROR_MESSAGES['INTERNAL_ERROR'], 'message': str(e)}), 500
 
 
@@ -59,8 +127,7 @@ def get_user(user_id):
         user = User.query.get_or_404(user_id)
         return jsonify(user.to_dict())
     except Exception as e:
-        logger.error(f"Erro ao obter usuário {user_id}: {e}")
-        logger.error(traceback.format_exc())
+        logger.exception("Erro ao obter usuário %s: %s", user_id, e)
         return jsonify({'error': ERROR_MESSAGES['INTERNAL_ERROR'], 'message': str(e)}), 500
 
 
@@ -76,19 +143,15 @@ def update_user(user_id):
         if missing_fields:
             return jsonify({'error': ERROR_MESSAGES['MISSING_FIELDS'], 'missing_fields': missing_fields}), 400
 
-        if username != user.username and User.query.filter(User.username == username, User.id != user_id).first():
-            return jsonify({'error': ERROR_MESSAGES['USERNAME_EXISTS']}), 400
-
-        if email != user.email and User.query.filter(User.email == email, User.id != user_id).first():
-            return jsonify({'error': ERROR_MESSAGES['EMAIL_EXISTS']}), 400
-
         user.username = username
         user.email = email
-        db.session.commit()
+        conflict = _commit_unique(username, email, exclude_id=user_id)
+        if conflict:
+            return jsonify({'error': conflict}), 400
+        principal_cache.invalidate(user_id)
         return jsonify(user.to_dict())
     except Exception as e:
-        logger.error(f"Erro ao atualizar usuário {user_id}: {e}")
-        logger.error(traceback.format_exc())
+        logger.exception("Erro ao atualizar usuário %s: %s", user_id, e)
         return jsonify({'error': ERROR_MESSAGES['INTERNAL_ERROR'], 'message': str(e)}), 500
 
 
@@ -98,8 +161,8 @@ def delete_user(user_id):
         user = User.query.get_or_404(user_id)
         db.session.delete(user)
         db.session.commit()
+        principal_cache.invalidate(user_id)
         return '', 204
     except Exception as e:
-        logger.error(f"Erro ao deletar usuário {user_id}: {e}")
-        logger.error(traceback.format_exc())
+        logger.exception("Erro ao deletar usuário %s: %s", user_id, e)
         return jsonify({'error': ERROR_MESSAGES['INTERNAL_ERROR'], 'message': str(e)}), 500
@@ -0,0 +1,71 @@
+"""
+Reaproveitamento de análises de IA por imóvel físico
+
+Uma análise gravada vale para todas as ofertas do mesmo grupo de
+deduplicação (``Imovel.cluster_id``), enquanto o preço não mudar além da
+tolerância e a análise não estiver velha demais.
+"""
+
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+
+from src.models.user import db
+from src.models.imovel import Imovel
+from src.models.property_analysis import PropertyAnalysis
+
+logger = logging.getLogger(__name__)
+
+REUSE_MAX_AGE_DAYS = 30
+REUSE_PRICE_TOLERANCE = 0.01  # variação relativa de preço aceita
+
+
+class AnalysisStore:
+    """Grava e procura análises de imóvel por grupo de relistagens"""
+
+    @staticmethod
+    def _cluster_for(codigo: Optional[str]) -> Optional[int]:
+        if not codigo:
+            return None
+        imovel = Imovel.query.filter_by(numero_imovel=str(codigo).strip()).first()
+        if imovel is None:
+            return None
+        return imovel.cluster_id or imovel.id
+
+    def find(self, codigo: Optional[str], valor_venda: Optional[float]) -> Optional[Dict[str, Any]]:
+        """Análise recente do mesmo imóvel físico com preço equivalente"""
+        cluster_id = self._cluster_for(codigo)
+        if cluster_id is None:
+            return None
+        since = datetime.utcnow() - timedelta(days=REUSE_MAX_AGE_DAYS)
+        candidates = PropertyAnalysis.query.filter(
+            PropertyAnalysis.cluster_id == cluster_id,
+            PropertyAnalysis.created_at >= since,
+        ).order_by(PropertyAnalysis.created_at.desc()).all()
+
+        for stored in candidates:
+            if not stored.valor_venda or not valor_venda:
+                if stored.valor_venda == valor_venda:
+                    return stored.to_dict()
+                continue
+            if abs(stored.valor_venda - valor_venda) <= REUSE_PRICE_TOLERANCE * stored.valor_venda:
+                return stored.to_dict()
+        return None
+
+    def save(self, codigo: Optional[str], valor_venda: Optional[float], analysis: Dict[str, Any]) -> bool:
+        """Grava a análise; imóveis fora do catálogo não são gravados"""
+        cluster_id = self._cluster_for(codigo)
+        if cluster_id is None:
+            return False
+        db.session.add(PropertyAnalysis(
+            cluster_id=cluster_id,
+            numero_imovel=str(codigo).strip(),
+            valor_venda=valor_venda,
+            analysis=json.dumps(analysis, ensure_ascii=False),
+        ))
+        db.session.commit()
+        return True
+
+
+analysis_store = AnalysisStore()
@@ -1,11 +1,16 @@
 import json
+import time
 import boto3
 import logging
 from typing import Dict, List, Optional, Any
 from botocore.exceptions import ClientError, BotoCoreError
 
+from src.services.metrics import observe_bedrock
+from src.services.tracing import trace_methods
+
 logger = logging.getLogger(__name__)
 
+@trace_methods('bedrock')
 class BedrockService:
     """
     Serviço para integração com Amazon Bedrock
@@ -26,26 +31,27 @@ class BedrockService:
             )
             self.model_id = 'anthropic.claude-3-sonnet-20240229-v1:0'
         except Exception as e:
-            logger.error(f"Failed to initialize Bedrock client: {e}")
+            logger.error("Failed to initialize Bedrock client: %s", e)
             raise
     
-    def analyze_property_opportunity(self, property_data: Dict[str, Any]) -> Dict[str, Any]:
+    def analyze_property_opportunity(self, property_data: Dict[str, Any], comps_context: str = '') -> Dict[str, Any]:
         """
         Analisa uma oportunidade de investimento imobiliário usando IA
         
         Args:
             property_data: Dados do imóvel para análise
+            comps_context: Resumo dos imóveis comparáveis (opcional)
             
         Returns:
             Dict com análise detalhada da oportunidade
         """
-        prompt = self._build_property_analysis_prompt(property_data)
+        prompt = self._build_property_analysis_prompt(property_data, comps_context)
         
         try:
             response = self._invoke_claude(prompt)
             return self._parse_property_analysis_response(response)
         except Exception as e:
-            logger.error(f"Property analysis failed: {e}")
+            logger.error("Property analysis failed: %s", e)
             return self._get_fallback_analysis()
     
     def generate_market_insights(self, market_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -64,7 +70,7 @@ class BedrockService:
             response = self._invoke_claude(prompt)
             return self._parse_market_insights_response(response)
         except Exception as e:
-            logger.error(f"Market insights generation failed: {e}")
+            logger.error("Market insights generation failed: %s", e)
             return self._get_fallback_market_insights()
     
     def analyze_investment_portfolio(self, portfolio_data: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -83,10 +89,11 @@ class BedrockService:
             response = self._invoke_claude(prompt)
             return self._parse_portfolio_analysis_response(response)
         except Exception as e:
-            logger.error(f"Portfolio analysis failed: {e}")
+            logger.error("Portfolio analysis failed: %s", e)
             return self._get_fallback_portfolio_analysis()
     
-    def generate_auction_strategy(self, property_data: Dict[str, Any], user_profile: Dict[str, Any]) -> Dict[str, Any]:
+    def generate_auction_strategy(self, property_data: Dict[str, Any], user_profile: Dict[str, Any],
+                                  comps_context: str = '', bid_context: str = '') -> Dict[str, Any]:
         """
         Gera estratégia personalizada para leilão
         
@@ -97,13 +104,13 @@ class BedrockService:
         Returns:
             Dict com estratégia de leilão personalizada
         """
-        prompt = self._build_auction_strategy_prompt(property_data, user_profile)
+        prompt = self._build_auction_strategy_prompt(property_data, user_profile, comps_context, bid_context)
         
         try:
             response = self._invoke_claude(prompt)
             return self._parse_auction_strategy_response(response)
         except Exception as e:
-            logger.error(f"Auction strategy generation failed: {e}")
+            logger.error("Auction strategy generation failed: %s", e)
             return self._get_fallback_auction_strategy()
     
     def _invoke_claude(self, prompt: str, max_tokens: int = 2000) -> str:
@@ -130,6 +137,7 @@ class BedrockService:
             "top_p": 0.9
         }
         
+        started = time.perf_counter()
         try:
             response = self.bedrock_runtime.invoke_model(
                 modelId=self.model_id,
@@ -138,17 +146,21 @@ class BedrockService:
             )
             
             response_body = json.loads(response['body'].read())
+            observe_bedrock(self.model_id, time.perf_counter() - started, 'success', response_body.get('usage'))
             return response_body['content'][0]['text']
             
         except ClientError as e:
-            logger.error(f"Bedrock API error: {e}")
+            observe_bedrock(self.model_id, time.perf_counter() - started, 'error')
+            logger.error("Bedrock API error: %s", e)
             raise
         except Exception as e:
-            logger.error(f"Unexpected error invoking Claude: {e}")
+            observe_bedrock(self.model_id, time.perf_counter() - started, 'error')
+            logger.error("Unexpected error invoking Claude: %s", e)
             raise
     
-    def _build_property_analysis_prompt(self, property_data: Dict[str, Any]) -> str:
+    def _build_property_analysis_prompt(self, property_data: Dict[str, Any], comps_context: str = '') -> str:
         """Constrói prompt para análise de imóvel"""
+        comps_section = f"\n{comps_context}\n" if comps_context else ''
         return f"""
 Você é um especialista em investimentos imobiliários no Brasil. Analise esta oportunidade de investimento em leilão da Caixa Econômica Federal e forneça uma análise detalhada.
 
@@ -163,7 +175,7 @@ DADOS DO IMÓVEL:
 - Desconto: {property_data.get('desconto_percentual', 0):.1f}%
 - Aceita Financiamento: {'Sim' if property_data.get('aceita_financiamento') else 'Não'}
 - Situação: {property_data.get('situacao_ocupacao', 'N/A')}
-
+{comps_section}
 ANÁLISE SOLICITADA:
 1. Score de Oportunidade (0-100) com justificativa
 2. Principais pontos positivos (máximo 5)
@@ -241,8 +253,11 @@ Responda em formato JSON:
 }}
 """
     
-    def _build_auction_strategy_prompt(self, property_data: Dict[str, Any], user_profile: Dict[str, Any]) -> str:
+    def _build_auction_strategy_prompt(self, property_data: Dict[str, Any], user_profile: Dict[str, Any],
+                                       comps_context: str = '', bid_context: str = '') -> str:
         """Constrói prompt para estratégia de leilão"""
+        comps_section = f"\n{comps_context}\n" if comps_context else ''
+        bid_section = f"\n{bid_context}\n" if bid_context else ''
         return f"""
 Crie uma estratégia personalizada de leilão para este investidor.
 
@@ -250,13 +265,13 @@ DADOS DO IMÓVEL:
 - Valor atual: R$ {property_data.get('valor_venda', 0):,.2f}
 - Desconto: {property_data.get('desconto_percentual', 0):.1f}%
 - Localização: {property_data.get('cidade', 'N/A')}
-
+{comps_section}
 PERFIL DO INVESTIDOR:
 - Experiência: {user_profile.get('experience_level', 'N/A')}
 - Capital disponível: R$ {user_profile.get('available_capital', 0):,.2f}
 - Objetivo: {user_profile.get('investment_goal', 'N/A')}
 - Tolerância a risco: {user_profile.get('risk_tolerance', 'N/A')}
-
+{bid_section}
 Forneça estratégia em JSON:
 {{
     "lance_maximo_recomendado": número,
@@ -277,7 +292,7 @@ Forneça estratégia em JSON:
                 json_str = response[start:end]
                 return json.loads(json_str)
         except Exception as e:
-            logger.error(f"Failed to parse property analysis response: {e}")
+            logger.error("Failed to parse property analysis response: %s", e)
         
         return self._get_fallback_analysis()
     
@@ -290,7 +305,7 @@ Forneça estratégia em JSON:
                 json_str = response[start:end]
                 return json.loads(json_str)
         except Exception as e:
-            logger.error(f"Failed to parse market insights response: {e}")
+            logger.error("Failed to parse market insights response: %s", e)
         
         return self._get_fallback_market_insights()
     
@@ -303,7 +318,7 @@ Forneça estratégia em JSON:
                 json_str = response[start:end]
                 return json.loads(json_str)
         except Exception as e:
-            logger.error(f"Failed to parse portfolio analysis response: {e}")
+            logger.error("Failed to parse portfolio analysis response: %s", e)
         
         return self._get_fallback_portfolio_analysis()
     
@@ -316,13 +331,18 @@ Forneça estratégia em JSON:
                 json_str = response[start:end]
                 return json.loads(json_str)
         except Exception as e:
-            logger.error(f"Failed to parse auction strategy response: {e}")
+            logger.error("Failed to parse auction strategy response: %s", e)
         
         return self._get_fallback_auction_strategy()
     
+    def is_fallback_analysis(self, analysis: Dict[str, Any]) -> bool:
+        """Indica se a análise é a resposta padrão usada quando a IA falha"""
+        return analysis.get('fallback') is True
+    
     def _get_fallback_analysis(self) -> Dict[str, Any]:
         """Retorna análise de fallback quando a IA falha"""
         return {
+            "fallback": True,
             "score": 50,
             "recomendacao": "neutro",
             "pontos_positivos": ["Análise detalhada temporariamente indisponível"],
@@ -336,6 +356,7 @@ Forneça estratégia em JSON:
     def _get_fallback_market_insights(self) -> Dict[str, Any]:
         """Retorna insights de fallback"""
         return {
+            "fallback": True,
             "tendencias_gerais": ["Análise de mercado temporariamente indisponível"],
             "oportunidades_destaque": ["Consulte dados de mercado atualizados"],
             "alertas_mercado": ["Mantenha-se atualizado com indicadores econômicos"],
@@ -349,6 +370,7 @@ Forneça estratégia em JSON:
     def _get_fallback_portfolio_analysis(self) -> Dict[str, Any]:
         """Retorna análise de portfólio de fallback"""
         return {
+            "fallback": True,
             "score_diversificacao": 50,
             "pontos_fortes": ["Análise detalhada em processamento"],
             "areas_melhoria": ["Consulte especialista para análise completa"],
@@ -360,6 +382,7 @@ Forneça estratégia em JSON:
     def _get_fallback_auction_strategy(self) -> Dict[str, Any]:
         """Retorna estratégia de leilão de fallback"""
         return {
+            "fallback": True,
             "lance_maximo_recomendado": 0,
             "estrategia_lance": "Consulte especialista para estratégia personalizada",
             "pontos_atencao": ["Análise de risco necessária", "Verificar documentação"],
@@ -0,0 +1,209 @@
+"""
+Simulador de escada de lances para leilões
+
+Varre lances do valor mínimo do leilão até o valor de avaliação e avalia o
+simulador de financiamento em todos de uma vez
+(``calculate_financing_batch``). Preço de venda e aluguel são do imóvel,
+não do lance; entrada, custos de documentação e comissão do leiloeiro
+acompanham cada lance. O maior lance que atinge a rentabilidade alvo é
+refinado com uma segunda varredura entre os dois degraus vizinhos.
+
+Os números entram no prompt da estratégia de leilão como base para o
+``lance_maximo_recomendado``; o cálculo leva poucos milissegundos e pode
+ser refeito a cada movimento do controle deslizante.
+"""
+
+import time
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+from src.services.financing_calculator import FinancingCalculatorService, FinancingInputs
+from src.services.market_rates import market_rates
+
+DEFAULT_STEPS = 41
+REFINE_STEPS = 41
+MAX_STEPS = 1000
+DEFAULT_DOWN_PAYMENT_PCT = 20.0
+DEFAULT_RENT_PCT = 0.6  # % do valor de mercado ao mês
+# Prêmio sobre o CDI exigido por tolerância a risco (% ao ano): quem tolera
+# menos risco exige margem maior para entrar num leilão
+RISK_PREMIUM = {'conservador': 10.0, 'moderado': 6.0, 'agressivo': 3.0}
+DEFAULT_RISK_PREMIUM = RISK_PREMIUM['moderado']
+
+
+def _number(value) -> Optional[float]:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if np.isfinite(value) else None
+
+
+class BidLadderSimulator:
+    """Rentabilidade por lance e lance máximo para a rentabilidade alvo"""
+
+    def __init__(self, calculator: Optional[FinancingCalculatorService] = None):
+        self.calculator = calculator
+
+    def _calculator(self) -> FinancingCalculatorService:
+        # Recriado a cada simulação para refletir as taxas de mercado atuais
+        return self.calculator or FinancingCalculatorService()
+
+    @staticmethod
+    def bid_range(property_data: Dict[str, Any]) -> Dict[str, float]:
+        """Lance mínimo (valor de venda) e valor de mercado (avaliação)"""
+        min_bid = _number(property_data.get('lance_minimo')) or _number(property_data.get('valor_venda')) or 0.0
+        market_value = _number(property_data.get('valor_avaliacao'))
+        if not market_value:
+            desconto = _number(property_data.get('desconto_percentual')) or 0.0
+            market_value = min_bid / (1 - desconto / 100) if 0 < desconto < 100 else min_bid
+        return {'min_bid': min_bid, 'market_value': max(market_value, min_bid)}
+
+    @staticmethod
+    def target_return(user_profile: Dict[str, Any], cdi_rate: float) -> float:
+        """Rentabilidade anual alvo: informada ou CDI + prêmio pelo perfil de risco"""
+        target = _number(user_profile.get('target_return'))
+        if target is not None:
+            return target
+        return cdi_rate + RISK_PREMIUM.get(user_profile.get('risk_tolerance'), DEFAULT_RISK_PREMIUM)
+
+    def _inputs(self, property_data: Dict[str, Any], user_profile: Dict[str, Any],
+                market_value: float) -> FinancingInputs:
+        sale_price = _number(property_data.get('sale_price')) or market_value
+        monthly_rent = _number(property_data.get('monthly_rent')) or market_value * DEFAULT_RENT_PCT / 100
+        interest_rate = _number(user_profile.get('interest_rate'))
+        if interest_rate is None:
+            interest_rate = market_rates.financing_rate('caixa_price')
+        return FinancingInputs(
+            property_value=market_value,
+            declared_value=market_value,
+            interest_rate=interest_rate,
+            sale_price=sale_price,
+            monthly_rent=monthly_rent,
+            time_to_sell=int(_number(user_profile.get('time_to_sell')) or 22),
+            rental_time=int(_number(user_profile.get('rental_time')) or 18),
+            maintenance_reforms=_number(property_data.get('maintenance_reforms')) or 0.0,
+            iptu_arrears=_number(property_data.get('iptu_arrears')) or 0.0,
+            condominium_fees=_number(property_data.get('condominium_fees')) or 0.0,
+        )
+
+    def _evaluate(self, calculator, inputs: FinancingInputs, bids: np.ndarray,
+                  down_payment_pct: float) -> Dict[str, np.ndarray]:
+        return calculator.calculate_financing_batch(inputs, bids, bids * down_payment_pct / 100)
+
+    def simulate(self, property_data: Dict[str, Any], user_profile: Dict[str, Any],
+                 steps: int = DEFAULT_STEPS, target_return: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Curva de rentabilidade por lance
+
+        Retorna a curva (lance, rentabilidade anual e total, lucro, capital
+        necessário, TIR), o maior lance que atinge a rentabilidade alvo e
+        cabe no capital disponível, e o maior lance sem prejuízo.
+        """
+        started = time.perf_counter()
+        calculator = self._calculator()
+        bid_range = self.bid_range(property_data)
+        min_bid, market_value = bid_range['min_bid'], bid_range['market_value']
+        if min_bid <= 0:
+            raise ValueError('Valor de venda (lance mínimo) é obrigatório')
+
+        steps = int(min(max(steps, 2), MAX_STEPS))
+        if target_return is None:
+            target_return = self.target_return(user_profile, calculator.cdi_rate)
+        down_payment_pct = _number(user_profile.get('down_payment_pct'))
+        if down_payment_pct is None:
+            down_payment_pct = DEFAULT_DOWN_PAYMENT_PCT
+        available_capital = _number(user_profile.get('available_capital')) or None
+
+        inputs = self._inputs(property_data, user_profile, market_value)
+        bids = np.linspace(min_bid, market_value, steps) if market_value > min_bid else np.array([min_bid])
+        curve = self._evaluate(calculator, inputs, bids, down_payment_pct)
+
+        def acceptable(result):
+            ok = result['annual_return'] >= target_return
+            if available_capital:
+                ok &= result['total_investment'] + inputs.maintenance_reforms <= available_capital
+            return ok
+
+        max_bid = None
+        meets = acceptable(curve)
+        if meets.any():
+            last = int(np.flatnonzero(meets).max())
+            max_bid = float(bids[last])
+            if last + 1 < len(bids):
+                # Refina entre o último degrau aceito e o seguinte
+                fine = np.linspace(bids[last], bids[last + 1], REFINE_STEPS)
+                fine_meets = acceptable(self._evaluate(calculator, inputs, fine, down_payment_pct))
+                max_bid = float(fine[np.flatnonzero(fine_meets).max()])
+
+        breakeven = curve['final_profit'] >= 0
+        at_max = (
+            self._evaluate(calculator, inputs, np.array([max_bid]), down_payment_pct) if max_bid is not None else None
+        )
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        return {
+            'min_bid': round(min_bid, 2),
+            'market_value': round(market_value, 2),
+            'target_annual_return': round(target_return, 2),
+            'down_payment_pct': down_payment_pct,
+            'interest_rate': inputs.interest_rate,
+            'available_capital': available_capital,
+            'max_bid': round(max_bid, 2) if max_bid is not None else None,
+            'max_bid_discount_pct': (
+                round((1 - max_bid / market_value) * 100, 2) if max_bid is not None and market_value else None
+            ),
+            'annual_return_at_max_bid': round(float(at_max['annual_return'][0]), 2) if at_max else None,
+            'capital_at_max_bid': (
+                round(float(at_max['total_investment'][0]) + inputs.maintenance_reforms, 2) if at_max else None
+            ),
+            'breakeven_bid': round(float(bids[np.flatnonzero(breakeven).max()]), 2) if breakeven.any() else None,
+            'curve': [
+                {
+                    'bid': round(float(bids[i]), 2),
+                    'annual_return': round(float(curve['annual_return'][i]), 2),
+                    'total_return': round(float(curve['total_return'][i]), 2),
+                    'profit': round(float(curve['final_profit'][i]), 2),
+                    'capital_required': round(float(curve['total_investment'][i]) + inputs.maintenance_reforms, 2),
+                    'monthly_payment': round(float(curve['monthly_payment'][i]), 2),
+                    'irr_annual': (
+                        round(float(curve['irr_annual'][i]), 2) if np.isfinite(curve['irr_annual'][i]) else None
+                    ),
+                    'meets_target': bool(meets[i]),
+                }
+                for i in range(len(bids))
+            ],
+            'elapsed_ms': round(elapsed_ms, 2),
+        }
+
+    @staticmethod
+    def prompt_context(ladder: Dict[str, Any], points: int = 5) -> str:
+        """Resumo da escada de lances para o prompt da estratégia"""
+        lines = [
+            'SIMULAÇÃO DE LANCES (financiamento, venda no valor de mercado):',
+            f"- Lance mínimo: R$ {ladder['min_bid']:,.2f}; valor de mercado: R$ {ladder['market_value']:,.2f}",
+            f"- Rentabilidade alvo: {ladder['target_annual_return']:.1f}% a.a.; "
+            f"entrada de {ladder['down_payment_pct']:.0f}% a {ladder['interest_rate']:.2f}% a.a.",
+        ]
+        if ladder['max_bid'] is not None:
+            lines.append(
+                f"- Lance máximo que atinge o alvo: R$ {ladder['max_bid']:,.2f} "
+                f"({ladder['annual_return_at_max_bid']:.1f}% a.a., capital necessário "
+                f"R$ {ladder['capital_at_max_bid']:,.2f})"
+            )
+        else:
+            lines.append('- Nenhum lance atinge a rentabilidade alvo com o capital disponível')
+        if ladder['breakeven_bid'] is not None:
+            lines.append(f"- Lance máximo sem prejuízo: R$ {ladder['breakeven_bid']:,.2f}")
+        curve = ladder['curve']
+        sample = curve if len(curve) <= points else [curve[round(i * (len(curve) - 1) / (points - 1))]
+                                                     for i in range(points)]
+        lines.append('- Curva: ' + '; '.join(
+            f"R$ {point['bid']:,.0f} → {point['annual_return']:.1f}% a.a." for point in sample
+        ))
+        lines.append('Use o lance máximo simulado como referência para lance_maximo_recomendado.')
+        return '\n'.join(lines)
+
+
+bid_simulator = BidLadderSimulator()
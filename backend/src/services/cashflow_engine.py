@@ -0,0 +1,171 @@
+"""
+Fluxo de caixa mensal de um investimento imobiliário, com TIR, VPL e payback
+
+Cada linha de uma matriz (imóveis x meses) é o fluxo do investidor:
+entrada e custos de aquisição no mês 0, parcelas, IPTU e condomínio em
+todos os meses até a venda, aluguel durante ``rental_time`` e, no mês da
+venda, o valor líquido menos o saldo devedor do financiamento. A TIR é
+resolvida para todas as linhas de uma vez (Newton com bisseção de
+reserva).
+"""
+
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+NEWTON_ITERATIONS = 50
+BISECTION_ITERATIONS = 100
+TOLERANCE = 1e-10
+# Intervalo da TIR mensal usado na bisseção
+IRR_LOWER = -0.99
+IRR_UPPER = 1.0
+
+
+def _as_column(value, size: int) -> np.ndarray:
+    return np.broadcast_to(np.asarray(value, dtype=np.float64), (size,)).astype(np.float64)
+
+
+def outstanding_balance(principal, monthly_rate, monthly_payment, months) -> np.ndarray:
+    """Saldo devedor (Price) após ``months`` parcelas"""
+    principal = np.asarray(principal, dtype=np.float64)
+    monthly_rate = np.asarray(monthly_rate, dtype=np.float64)
+    monthly_payment = np.asarray(monthly_payment, dtype=np.float64)
+    months = np.asarray(months, dtype=np.float64)
+    growth = (1 + monthly_rate) ** months
+    with np.errstate(divide='ignore', invalid='ignore'):
+        balance = np.where(
+            monthly_rate > 0,
+            principal * growth - monthly_payment * (growth - 1) / np.where(monthly_rate > 0, monthly_rate, 1),
+            principal - monthly_payment * months,
+        )
+    return np.maximum(balance, 0.0)
+
+
+def project_cash_flows(initial_outlay, monthly_payment, monthly_costs, monthly_rent, rental_time,
+                       time_to_sell, sale_proceeds, loan_balance_at_sale) -> np.ndarray:
+    """
+    Matriz (n, meses + 1) de fluxos mensais
+
+    Todos os argumentos aceitam escalares ou arrays de mesmo tamanho.
+    ``initial_outlay`` é positivo (saída no mês 0); ``sale_proceeds`` é o
+    valor líquido da venda antes de quitar o saldo devedor.
+    """
+    time_to_sell = np.atleast_1d(np.asarray(time_to_sell, dtype=np.int64))
+    size = max(len(time_to_sell), *(np.size(v) for v in (
+        initial_outlay, monthly_payment, monthly_costs, monthly_rent, rental_time, sale_proceeds,
+        loan_balance_at_sale)))
+    time_to_sell = _as_column(time_to_sell, size).astype(np.int64)
+    horizon = int(time_to_sell.max()) if size else 0
+
+    months = np.arange(horizon + 1)[None, :]
+    active = (months >= 1) & (months <= time_to_sell[:, None])
+    renting = active & (months <= _as_column(rental_time, size)[:, None])
+
+    flows = np.zeros((size, horizon + 1))
+    flows[:, 0] = -_as_column(initial_outlay, size)
+    flows -= active * (_as_column(monthly_payment, size) + _as_column(monthly_costs, size))[:, None]
+    flows += renting * _as_column(monthly_rent, size)[:, None]
+    flows[np.arange(size), time_to_sell] += _as_column(sale_proceeds, size) - _as_column(loan_balance_at_sale, size)
+    return flows
+
+
+def npv(cash_flows: np.ndarray, monthly_rate) -> np.ndarray:
+    """Valor presente líquido de cada linha à taxa mensal informada"""
+    cash_flows = np.atleast_2d(cash_flows)
+    monthly_rate = np.asarray(monthly_rate, dtype=np.float64).reshape(-1, 1)
+    discount = (1 + monthly_rate) ** -np.arange(cash_flows.shape[1])[None, :]
+    return (cash_flows * discount).sum(axis=1)
+
+
+def irr(cash_flows: np.ndarray, guess: float = 0.01) -> np.ndarray:
+    """
+    TIR mensal de cada linha (NaN quando não existe)
+
+    Newton vetorizado a partir de ``guess``; linhas que não convergem ou
+    saem do intervalo válido são resolvidas por bisseção, desde que o VPL
+    mude de sinal entre IRR_LOWER e IRR_UPPER.
+    """
+    cash_flows = np.atleast_2d(np.asarray(cash_flows, dtype=np.float64))
+    n = cash_flows.shape[0]
+    periods = np.arange(cash_flows.shape[1])[None, :]
+    rate = np.full(n, guess)
+    converged = np.zeros(n, dtype=bool)
+
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        for _ in range(NEWTON_ITERATIONS):
+            discount = (1 + rate)[:, None] ** -periods
+            value = (cash_flows * discount).sum(axis=1)
+            derivative = (-periods * cash_flows * discount / (1 + rate)[:, None]).sum(axis=1)
+            step = np.where(derivative != 0, value / derivative, np.nan)
+            new_rate = np.where(converged, rate, rate - step)
+            converged |= np.abs(new_rate - rate) < TOLERANCE
+            rate = new_rate
+            if converged.all():
+                break
+
+        valid = converged & np.isfinite(rate) & (rate > IRR_LOWER) & (rate < IRR_UPPER)
+        if not valid.all():
+            pending = np.flatnonzero(~valid)
+            flows = cash_flows[pending]
+            low = np.full(len(pending), IRR_LOWER)
+            high = np.full(len(pending), IRR_UPPER)
+            value_low = npv(flows, low)
+            value_high = npv(flows, high)
+            solvable = np.sign(value_low) != np.sign(value_high)
+            for _ in range(BISECTION_ITERATIONS):
+                mid = (low + high) / 2
+                value_mid = npv(flows, mid)
+                same_as_low = np.sign(value_mid) == np.sign(value_low)
+                low = np.where(same_as_low, mid, low)
+                value_low = np.where(same_as_low, value_mid, value_low)
+                high = np.where(same_as_low, high, mid)
+            rate[pending] = np.where(solvable, (low + high) / 2, np.nan)
+    return rate
+
+
+def payback_month(cash_flows: np.ndarray) -> np.ndarray:
+    """Primeiro mês em que o fluxo acumulado fica não negativo (-1 se nunca)"""
+    cumulative = np.cumsum(np.atleast_2d(cash_flows), axis=1)
+    recovered = cumulative >= 0
+    # Ignora meses iniciais sem saída (acumulado zero antes do primeiro aporte)
+    recovered[:, 0] = cumulative[:, 0] > 0
+    return np.where(recovered.any(axis=1), recovered.argmax(axis=1), -1)
+
+
+def monthly_rate_from_annual(annual_rate_pct) -> np.ndarray:
+    """Taxa mensal equivalente a uma taxa anual em %"""
+    return (1 + np.asarray(annual_rate_pct, dtype=np.float64) / 100) ** (1 / 12) - 1
+
+
+def cash_flow_metrics(cash_flows: np.ndarray, discount_rate_annual_pct) -> Dict[str, np.ndarray]:
+    """TIR (mensal e anual, em %), VPL à taxa de desconto e payback, por linha"""
+    monthly_irr = irr(cash_flows)
+    return {
+        'irr_monthly': monthly_irr * 100,
+        'irr_annual': ((1 + monthly_irr) ** 12 - 1) * 100,
+        'npv': npv(cash_flows, monthly_rate_from_annual(discount_rate_annual_pct)),
+        'payback_month': payback_month(cash_flows),
+    }
+
+
+def _clean(value: float) -> Optional[float]:
+    return None if not np.isfinite(value) else round(float(value), 4)
+
+
+def single_projection(cash_flows: np.ndarray, discount_rate_annual_pct: float) -> Dict[str, Any]:
+    """Métricas e série mensal de um único fluxo, prontas para JSON"""
+    cash_flows = np.atleast_2d(cash_flows)[:1]
+    metrics = cash_flow_metrics(cash_flows, discount_rate_annual_pct)
+    accumulated = np.cumsum(cash_flows[0])
+    payback = int(metrics['payback_month'][0])
+    return {
+        'irr_monthly': _clean(metrics['irr_monthly'][0]),
+        'irr_annual': _clean(metrics['irr_annual'][0]),
+        'npv': round(float(metrics['npv'][0]), 2),
+        'discount_rate': discount_rate_annual_pct,
+        'payback_month': payback if payback >= 0 else None,
+        'monthly': [
+            {'month': month, 'cash_flow': round(float(flow), 2), 'accumulated': round(float(total), 2)}
+            for month, (flow, total) in enumerate(zip(cash_flows[0], accumulated))
+        ],
+    }
@@ -0,0 +1,312 @@
+"""
+Comparáveis (comps) de um imóvel por vizinhos mais próximos
+
+O catálogo é particionado por cidade e tipo de imóvel; cada partição tem
+uma KD-tree sobre atributos normalizados (área, quartos e preço/m², em
+escala log e padronizados pela própria partição). A consulta busca os
+vizinhos na partição do imóvel, favorece o mesmo bairro e, se faltarem
+resultados, completa com outros tipos da mesma cidade (com penalidade).
+Sem UF no imóvel, a cidade é buscada só pelo nome (na UF com mais imóveis
+dessa cidade, se o nome existir em mais de uma).
+"""
+
+import heapq
+import logging
+import math
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from src.models.user import db
+from src.models.imovel import Imovel
+from src.services.geo_service import normalize_place
+
+logger = logging.getLogger(__name__)
+
+LEAF_SIZE = 16
+DEFAULT_K = 10
+MAX_K = 50
+CANDIDATE_FACTOR = 3  # vizinhos buscados por comp, antes de aplicar o bônus de bairro
+
+# Peso de cada atributo na distância (área, quartos, preço/m²)
+FEATURE_WEIGHTS = np.array([1.0, 0.7, 1.0])
+SAME_BAIRRO_FACTOR = 0.7  # distância multiplicada quando o bairro coincide
+OTHER_TIPO_FACTOR = 2.0  # distância multiplicada para outro tipo de imóvel
+
+
+class KDTree:
+    """KD-tree estática sobre um array (n, d), com folhas de ``leaf_size`` pontos"""
+
+    def __init__(self, points: np.ndarray, leaf_size: int = LEAF_SIZE):
+        self.points = np.asarray(points, dtype=np.float64)
+        self.leaf_size = leaf_size
+        self.order = np.arange(len(self.points))
+        # Cada nó: [início, fim, dimensão (-1 = folha), valor de corte, filho esq., filho dir.]
+        self.nodes: List[list] = []
+        if len(self.points):
+            self._build(0, len(self.points))
+
+    def _build(self, start: int, end: int) -> int:
+        node_id = len(self.nodes)
+        self.nodes.append([start, end, -1, 0.0, -1, -1])
+        if end - start <= self.leaf_size:
+            return node_id
+
+        index = self.order[start:end]
+        points = self.points[index]
+        spread = points.max(axis=0) - points.min(axis=0)
+        dim = int(np.argmax(spread))
+        if spread[dim] == 0:
+            return node_id
+
+        mid = (end - start) // 2
+        self.order[start:end] = index[np.argpartition(points[:, dim], mid)]
+        node = self.nodes[node_id]
+        node[2] = dim
+        node[3] = float(self.points[self.order[start + mid], dim])
+        node[4] = self._build(start, start + mid)
+        node[5] = self._build(start + mid, end)
+        return node_id
+
+    def query(self, point: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Distâncias e índices dos ``k`` pontos mais próximos, em ordem crescente"""
+        if not self.nodes or k <= 0:
+            return np.array([]), np.array([], dtype=np.int64)
+        point = np.asarray(point, dtype=np.float64)
+        heap: List[Tuple[float, int]] = []  # (-distância², índice)
+
+        def visit(node_id: int) -> None:
+            start, end, dim, value, left, right = self.nodes[node_id]
+            if dim < 0:
+                index = self.order[start:end]
+                distances = ((self.points[index] - point) ** 2).sum(axis=1)
+                for distance, i in zip(distances.tolist(), index.tolist()):
+                    if len(heap) < k:
+                        heapq.heappush(heap, (-distance, i))
+                    elif distance < -heap[0][0]:
+                        heapq.heapreplace(heap, (-distance, i))
+                return
+            diff = point[dim] - value
+            near, far = (left, right) if diff <= 0 else (right, left)
+            visit(near)
+            if len(heap) < k or diff * diff < -heap[0][0]:
+                visit(far)
+
+        visit(0)
+        best = sorted((-d, i) for d, i in heap)
+        return (np.sqrt([d for d, _ in best]), np.array([i for _, i in best], dtype=np.int64))
+
+
+def _log_or_nan(values: np.ndarray) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(values > 0, np.log(values), np.nan)
+
+
+class _Partition:
+    """Imóveis de uma cidade e tipo, com a KD-tree dos atributos"""
+
+    def __init__(self, ids, numeros, bairros, preco, area, quartos):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.numeros = np.asarray(numeros, dtype=object)
+        self.bairros = np.asarray(bairros, dtype=object)
+        self.preco = np.asarray(preco, dtype=np.float64)
+        self.area = np.asarray(area, dtype=np.float64)
+        self.quartos = np.asarray(quartos, dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.preco_m2 = np.where(self.area > 0, self.preco / self.area, np.nan)
+
+        raw = np.column_stack([_log_or_nan(self.area), self.quartos, _log_or_nan(self.preco_m2)])
+        # Valores ausentes recebem a mediana da partição; escala pelo desvio padrão
+        self.medians = np.array([np.nanmedian(c) if np.isfinite(c).any() else 0.0 for c in raw.T])
+        raw = np.where(np.isnan(raw), self.medians, raw)
+        scale = raw.std(axis=0)
+        self.scale = np.where(scale > 0, scale, 1.0)
+        self.center = raw.mean(axis=0)
+        self.tree = KDTree((raw - self.center) / self.scale * FEATURE_WEIGHTS)
+
+    def transform(self, area: Optional[float], quartos: Optional[float], preco_m2: Optional[float]) -> np.ndarray:
+        raw = np.array([
+            math.log(area) if area and area > 0 else np.nan,
+            quartos if quartos is not None else np.nan,
+            math.log(preco_m2) if preco_m2 and preco_m2 > 0 else np.nan,
+        ], dtype=np.float64)
+        raw = np.where(np.isnan(raw), self.medians, raw)
+        return (raw - self.center) / self.scale * FEATURE_WEIGHTS
+
+
+class _CompsIndex:
+    """Partições por (UF, cidade normalizada, tipo)"""
+
+    def __init__(self):
+        rows = db.session.query(
+            Imovel.id, Imovel.numero_imovel, Imovel.uf, Imovel.cidade, Imovel.bairro, Imovel.tipo_imovel,
+            Imovel.preco, Imovel.area_total, Imovel.quartos,
+        ).filter(Imovel.preco > 0).all()
+
+        grouped: Dict[Tuple[str, str, str], list] = {}
+        for imovel_id, numero, uf, cidade, bairro, tipo, preco, area, quartos in rows:
+            key = ((uf or '').upper(), normalize_place(cidade), tipo or '')
+            grouped.setdefault(key, []).append((
+                imovel_id, numero, normalize_place(bairro), preco,
+                area if area is not None else np.nan,
+                quartos if quartos is not None else np.nan,
+            ))
+
+        self.partitions: Dict[Tuple[str, str, str], _Partition] = {}
+        self.tipos_by_city: Dict[Tuple[str, str], List[str]] = {}
+        city_sizes: Dict[Tuple[str, str], int] = {}
+        for key, items in grouped.items():
+            self.partitions[key] = _Partition(*zip(*items))
+            self.tipos_by_city.setdefault(key[:2], []).append(key[2])
+            city_sizes[key[:2]] = city_sizes.get(key[:2], 0) + len(items)
+        # Cidade normalizada -> UF com mais imóveis (consultas sem UF)
+        self.uf_by_city: Dict[str, str] = {}
+        for (uf, cidade), size in sorted(city_sizes.items(), key=lambda item: item[1]):
+            self.uf_by_city[cidade] = uf
+        self.size = len(rows)
+        self.built_at = time.monotonic()
+
+
+class CompsEngine:
+    """Busca de comparáveis com índice em memória reconstruído sob demanda"""
+
+    def __init__(self, ttl: float = 600):
+        self.ttl = ttl
+        self._index: Optional[_CompsIndex] = None
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        """Descarta o índice (chamado após cada carga)"""
+        self._index = None
+
+    def _get_index(self) -> _CompsIndex:
+        index = self._index
+        if index is None or time.monotonic() - index.built_at > self.ttl:
+            with self._lock:
+                index = self._index
+                if index is None or time.monotonic() - index.built_at > self.ttl:
+                    started = time.perf_counter()
+                    index = _CompsIndex()
+                    self._index = index
+                    logger.info("Índice de comparáveis: %s imóveis, %s partições em %.0f ms",
+                                index.size, len(index.partitions), (time.perf_counter() - started) * 1000)
+        return index
+
+    @staticmethod
+    def listing_from_data(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Normaliza o payload das rotas de análise (codigo, valor_venda) ou um Imovel.to_dict() (preco)"""
+        preco = data.get('preco', data.get('valor_venda'))
+        numero = data.get('numero_imovel') or data.get('codigo')
+        return {
+            'id': data.get('id'),
+            'numero_imovel': str(numero).strip() if numero else None,
+            'uf': (data.get('uf') or '').upper(),
+            'cidade': data.get('cidade'),
+            'bairro': data.get('bairro'),
+            'tipo_imovel': data.get('tipo_imovel') or '',
+            'preco': float(preco) if preco else None,
+            'area_total': float(data['area_total']) if data.get('area_total') else None,
+            'quartos': data.get('quartos'),
+        }
+
+    def find(self, listing: Dict[str, Any], k: int = DEFAULT_K) -> Dict[str, Any]:
+        """
+        Os ``k`` imóveis mais semelhantes a ``listing`` na mesma cidade
+
+        Retorna os comparáveis (com similaridade entre 0 e 1) e um resumo
+        com a mediana de preço/m² e o valor estimado para a área do imóvel.
+        """
+        started = time.perf_counter()
+        k = max(1, min(int(k), MAX_K))
+        listing = self.listing_from_data(listing)
+        index = self._get_index()
+        cidade = normalize_place(listing['cidade'])
+        city = (listing['uf'] or index.uf_by_city.get(cidade, ''), cidade)
+        bairro = normalize_place(listing['bairro'])
+        area = listing['area_total']
+        preco_m2 = listing['preco'] / area if listing['preco'] and area else None
+
+        tipos = index.tipos_by_city.get(city, [])
+        # Mesmo tipo primeiro; outros tipos só entram se faltarem comparáveis
+        tipos = sorted(tipos, key=lambda tipo: tipo != listing['tipo_imovel'])
+        candidates = []
+        for tipo in tipos:
+            same_tipo = tipo == listing['tipo_imovel']
+            if not same_tipo and len(candidates) >= k:
+                break
+            partition = index.partitions[city + (tipo,)]
+            point = partition.transform(area, listing['quartos'], preco_m2)
+            distances, rows = partition.tree.query(point, min(len(partition.ids), k * CANDIDATE_FACTOR + 1))
+            for distance, row in zip(distances.tolist(), rows.tolist()):
+                # O próprio imóvel, se já estiver no catálogo, não é comparável de si mesmo
+                if listing['id'] is not None and partition.ids[row] == listing['id']:
+                    continue
+                if listing['numero_imovel'] and partition.numeros[row] == listing['numero_imovel']:
+                    continue
+                if bairro and partition.bairros[row] == bairro:
+                    distance *= SAME_BAIRRO_FACTOR
+                if not same_tipo:
+                    distance *= OTHER_TIPO_FACTOR
+                candidates.append((distance, tipo, partition, row))
+
+        candidates.sort(key=lambda c: c[0])
+        comps = []
+        for distance, tipo, partition, row in candidates[:k]:
+            preco_m2_comp = partition.preco_m2[row]
+            comps.append({
+                'id': int(partition.ids[row]),
+                'tipo_imovel': tipo,
+                'bairro': partition.bairros[row] or None,
+                'preco': float(partition.preco[row]),
+                'area_total': None if np.isnan(partition.area[row]) else float(partition.area[row]),
+                'quartos': None if np.isnan(partition.quartos[row]) else int(partition.quartos[row]),
+                'preco_m2': None if np.isnan(preco_m2_comp) else round(float(preco_m2_comp), 2),
+                'similarity': round(1 / (1 + distance), 3),
+            })
+
+        m2_values = [c['preco_m2'] for c in comps if c['preco_m2'] is not None]
+        median_m2 = float(np.median(m2_values)) if m2_values else None
+        return {
+            'comps': comps,
+            'summary': {
+                'count': len(comps),
+                'preco_m2_median': round(median_m2, 2) if median_m2 is not None else None,
+                'estimated_value': round(median_m2 * area, 2) if median_m2 is not None and area else None,
+            },
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+        }
+
+    def prompt_context(self, listing: Dict[str, Any], k: int = 5) -> str:
+        """Resumo compacto dos comparáveis para incluir nos prompts de IA"""
+        try:
+            result = self.find(listing, k=k)
+        except Exception as e:
+            logger.error("Comps lookup for prompt failed: %s", e)
+            return ''
+        if not result['comps']:
+            return ''
+
+        lines = [f"COMPARÁVEIS NA MESMA CIDADE ({len(result['comps'])} mais semelhantes):"]
+        for comp in result['comps']:
+            details = [comp['tipo_imovel'] or 'Imóvel']
+            if comp['quartos'] is not None:
+                details.append(f"{comp['quartos']} quartos")
+            if comp['area_total'] is not None:
+                details.append(f"{comp['area_total']:,.0f} m²")
+            if comp['bairro']:
+                details.append(comp['bairro'])
+            m2 = f", R$ {comp['preco_m2']:,.0f}/m²" if comp['preco_m2'] is not None else ''
+            lines.append(f"- {', '.join(details)}: R$ {comp['preco']:,.2f}{m2} (similaridade {comp['similarity']:.2f})")
+
+        summary = result['summary']
+        if summary['preco_m2_median'] is not None:
+            line = f"Mediana dos comparáveis: R$ {summary['preco_m2_median']:,.0f}/m²"
+            if summary['estimated_value'] is not None:
+                line += f" (valor estimado para a área: R$ {summary['estimated_value']:,.2f})"
+            lines.append(line)
+        return '\n'.join(lines)
+
+
+comps_engine = CompsEngine()
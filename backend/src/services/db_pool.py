@@ -0,0 +1,210 @@
+"""
+Pool de conexões do banco: configuração, métricas e verificação de saúde
+
+As opções do engine vêm de variáveis de ambiente (``DB_POOL_SIZE``,
+``DB_MAX_OVERFLOW``, ``DB_POOL_TIMEOUT``, ``DB_POOL_RECYCLE``,
+``DB_POOL_PRE_PING``, ``DB_CONNECT_TIMEOUT``). Cada worker do gunicorn tem
+o próprio pool, então o banco precisa aceitar até
+``workers * (pool_size + max_overflow)`` conexões.
+
+As métricas são por processo: checkouts, conexões em uso (e o pico),
+overflow, tempo de espera por uma conexão livre e esperas que estouraram
+``pool_timeout``.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+HEALTH_TIMEOUT = float(os.environ.get('DB_HEALTH_TIMEOUT', 2))
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes')
+
+
+class PoolMetrics:
+    """Contadores do pool de conexões, seguros entre threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.connections = 0
+            self.checkouts = 0
+            self.checked_out = 0
+            self.peak_checked_out = 0
+            self.invalidations = 0
+            self.timeouts = 0
+            self.waits = 0
+            self.wait_seconds = 0.0
+            self.max_wait_seconds = 0.0
+
+    def attach(self, engine: Engine) -> None:
+        """Registra os eventos do pool do engine (idempotente)"""
+        if not event.contains(engine, 'checkout', self._on_checkout):
+            event.listen(engine, 'connect', self._on_connect)
+            event.listen(engine, 'checkout', self._on_checkout)
+            event.listen(engine, 'checkin', self._on_checkin)
+            event.listen(engine, 'invalidate', self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self.connections += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self, engine: Optional[Engine] = None) -> Dict[str, Any]:
+        with self._lock:
+            data = {
+                'connections_opened': self.connections,
+                'checkouts': self.checkouts,
+                'checked_out': self.checked_out,
+                'peak_checked_out': self.peak_checked_out,
+                'invalidations': self.invalidations,
+                'checkout_timeouts': self.timeouts,
+                'avg_wait_ms': round(self.wait_seconds / self.waits * 1000, 3) if self.waits else 0.0,
+                'max_wait_ms': round(self.max_wait_seconds * 1000, 3),
+            }
+        pool = engine.pool if engine is not None else None
+        if isinstance(pool, QueuePool):
+            data.update({
+                'size': pool.size(),
+                'checked_in': pool.checkedin(),
+                'overflow': max(0, pool.overflow()),
+            })
+        return data
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool que mede quanto cada checkout esperou por uma conexão"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        pool_metrics.record_wait(time.perf_counter() - started)
+        return connection
+
+
+def engine_options(database_url: str) -> Dict[str, Any]:
+    """
+    Monta ``SQLALCHEMY_ENGINE_OPTIONS`` a partir do ambiente
+
+    SQLite fica com o pool padrão do Flask-SQLAlchemy: o banco em memória
+    depende de uma única conexão compartilhada.
+    """
+    if database_url.startswith('sqlite'):
+        return {}
+    options = {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', True),
+    }
+    if database_url.startswith('postgresql'):
+        options['connect_args'] = {'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 10))}
+    return options
+
+
+def pool_config(options: Dict[str, Any]) -> Dict[str, Any]:
+    """Resumo da configuração para dimensionar o pool contra os workers"""
+    workers = int(os.environ['WEB_CONCURRENCY']) if os.environ.get('WEB_CONCURRENCY') else None
+    if 'pool_size' not in options:
+        return {'pooling': 'default', 'workers': workers}
+    per_worker = options['pool_size'] + options['max_overflow']
+    return {
+        'pool_size': options['pool_size'],
+        'max_overflow': options['max_overflow'],
+        'pool_timeout': options['pool_timeout'],
+        'pool_recycle': options['pool_recycle'],
+        'pool_pre_ping': options['pool_pre_ping'],
+        'workers': workers,
+        'max_connections_per_worker': per_worker,
+        'max_connections_total': workers * per_worker if workers else None,
+    }
+
+
+class DatabaseProbe:
+    """
+    Consulta barata (``SELECT 1``) com tempo limite
+
+    A consulta roda numa thread própria: se o banco ou o pool travar, a
+    requisição de health responde no prazo em vez de esperar junto. Chamadas
+    simultâneas aguardam a mesma sonda em andamento em vez de iniciar outra.
+    Erros do driver vão para o log; a resposta traz só um motivo genérico.
+    """
+
+    def __init__(self, timeout: float = HEALTH_TIMEOUT):
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-health')
+        self._pending = None
+        self._started = 0.0
+        self._lock = threading.Lock()
+
+    def _query(self, engine: Engine) -> None:
+        with engine.connect() as connection:
+            if engine.dialect.name == 'postgresql':
+                connection.execute(text(f"SET LOCAL statement_timeout = {int(self.timeout * 1000)}"))
+            connection.execute(text('SELECT 1')).scalar()
+
+    def check(self, engine: Engine) -> Dict[str, Any]:
+        with self._lock:
+            if self._pending is None or self._pending.done():
+                self._started = time.perf_counter()
+                self._pending = self._executor.submit(self._query, engine)
+            future, started = self._pending, self._started
+        try:
+            future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            logger.warning("Health check do banco excedeu %ss", self.timeout)
+            return {'status': 'unavailable', 'error': f'timeout após {self.timeout}s'}
+        except Exception as e:
+            logger.error("Health check do banco falhou: %s", e)
+            return {'status': 'unavailable', 'error': 'falha na conexão com o banco'}
+        return {'status': 'connected', 'latency_ms': round((time.perf_counter() - started) * 1000, 3)}
+
+database_probe = DatabaseProbe()
@@ -0,0 +1,232 @@
+"""
+Detecção de imóveis repetidos entre cargas (relistagens)
+
+O mesmo imóvel costuma voltar com outro ``numero_imovel`` ou com o
+endereço levemente alterado após um leilão sem lances. Os endereços
+normalizados viram conjuntos de trigramas, resumidos por assinaturas
+MinHash; o LSH (faixas da assinatura) gera candidatos só entre endereços
+parecidos da mesma cidade, sem comparar todos os pares. Os candidatos são
+confirmados por tipo, quartos, área e números do endereço, e os grupos
+resultantes gravados em ``Imovel.cluster_id``.
+"""
+
+import logging
+import re
+import zlib
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Any, Iterable, List, Optional
+
+import numpy as np
+
+from src.models.user import db
+from src.models.imovel import Imovel
+from src.models.price_point import PricePoint
+from src.services.geo_service import normalize_place
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 64
+BANDS = 16  # 16 faixas x 4 linhas: candidatos a partir de ~50% de semelhança
+ROWS_PER_BAND = NUM_PERM // BANDS
+SIMILARITY_THRESHOLD = 0.6  # Jaccard estimado mínimo entre os endereços
+AREA_TOLERANCE = 0.05  # diferença relativa máxima de área
+MAX_BUCKET_SIZE = 200  # faixas com mais endereços que isso são genéricas demais
+
+_MERSENNE_PRIME = (1 << 31) - 1
+
+_ABBREVIATIONS = {
+    'R': 'RUA', 'AV': 'AVENIDA', 'AVN': 'AVENIDA', 'TV': 'TRAVESSA', 'TRAV': 'TRAVESSA',
+    'AL': 'ALAMEDA', 'EST': 'ESTRADA', 'ROD': 'RODOVIA', 'PC': 'PRACA', 'PCA': 'PRACA',
+    'Q': 'QUADRA', 'QD': 'QUADRA', 'LT': 'LOTE', 'AP': 'APTO', 'APT': 'APTO',
+    'APARTAMENTO': 'APTO', 'BL': 'BLOCO', 'CJ': 'CONJUNTO', 'CONJ': 'CONJUNTO',
+}
+_STOPWORDS = {'DE', 'DA', 'DO', 'DAS', 'DOS', 'E', 'N', 'NO', 'NUM', 'NUMERO'}
+_NON_ALNUM_RE = re.compile(r'[^A-Z0-9]+')
+
+
+def normalize_address(endereco: Optional[str]) -> str:
+    """Endereço sem acentos, pontuação, abreviações e preposições"""
+    tokens = _NON_ALNUM_RE.sub(' ', normalize_place(endereco)).split()
+    tokens = [_ABBREVIATIONS.get(token, token) for token in tokens]
+    return ' '.join(token for token in tokens if token not in _STOPWORDS)
+
+
+def address_numbers(address: str) -> frozenset:
+    """Números do endereço (porta, apto, bloco): precisam coincidir"""
+    return frozenset(token for token in address.split() if token.isdigit())
+
+
+def shingle_hashes(text: str, size: int = 3) -> np.ndarray:
+    """Hashes dos trigramas de caracteres do texto"""
+    if len(text) < size:
+        text = text.ljust(size)
+    shingles = {text[i:i + size] for i in range(len(text) - size + 1)}
+    return np.array([zlib.crc32(s.encode('utf-8')) % _MERSENNE_PRIME for s in shingles], dtype=np.uint64)
+
+
+class MinHasher:
+    """Assinaturas MinHash com ``num_perm`` funções a*x + b mod p"""
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 42):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        return ((self.a[:, None] * hashes[None, :] + self.b[:, None]) % _MERSENNE_PRIME).min(axis=1)
+
+
+class _UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int) -> None:
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i != root_j:
+            self.parent[max(root_i, root_j)] = min(root_i, root_j)
+
+
+def _same_property(a: Dict[str, Any], b: Dict[str, Any], similarity: float) -> bool:
+    if similarity < SIMILARITY_THRESHOLD:
+        return False
+    if a['tipo_imovel'] != b['tipo_imovel']:
+        return False
+    if a['quartos'] is not None and b['quartos'] is not None and a['quartos'] != b['quartos']:
+        return False
+    if a['area_total'] and b['area_total']:
+        if abs(a['area_total'] - b['area_total']) > AREA_TOLERANCE * max(a['area_total'], b['area_total']):
+            return False
+    if a['numbers'] and b['numbers'] and a['numbers'] != b['numbers']:
+        return False
+    return True
+
+
+def find_clusters(records: List[Dict[str, Any]], hasher: Optional[MinHasher] = None) -> List[int]:
+    """
+    Agrupa registros que representam o mesmo imóvel físico
+
+    ``records`` precisa de id, uf, cidade, endereco, tipo_imovel, quartos e
+    area_total. Retorna, para cada registro, o id do representante do
+    grupo (o menor id).
+    """
+    hasher = hasher or MinHasher()
+    signatures = np.empty((len(records), NUM_PERM), dtype=np.uint64)
+    prepared = []
+    for i, record in enumerate(records):
+        address = normalize_address(record['endereco'])
+        signatures[i] = hasher.signature(shingle_hashes(address))
+        prepared.append({
+            'tipo_imovel': record['tipo_imovel'],
+            'quartos': record['quartos'],
+            'area_total': record['area_total'],
+            'numbers': address_numbers(address),
+        })
+
+    buckets: Dict[tuple, List[int]] = defaultdict(list)
+    for i, record in enumerate(records):
+        city = ((record['uf'] or '').upper(), normalize_place(record['cidade']))
+        for band in range(BANDS):
+            band_values = signatures[i, band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+            buckets[city + (band, band_values.tobytes())].append(i)
+
+    groups = _UnionFind(len(records))
+    compared = set()
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        if len(members) > MAX_BUCKET_SIZE:
+            logger.warning("Faixa LSH com %s endereços ignorada (endereço genérico)", len(members))
+            continue
+        for x, i in enumerate(members):
+            for j in members[x + 1:]:
+                if (i, j) in compared or groups.find(i) == groups.find(j):
+                    continue
+                compared.add((i, j))
+                similarity = float(np.mean(signatures[i] == signatures[j]))
+                if _same_property(prepared[i], prepared[j], similarity):
+                    groups.union(i, j)
+
+    # Representante = menor id do grupo
+    representative: Dict[int, int] = {}
+    for i, record in enumerate(records):
+        root = groups.find(i)
+        representative[root] = min(representative.get(root, record['id']), record['id'])
+    return [representative[groups.find(i)] for i in range(len(records))]
+
+
+class DedupService:
+    """Agrupamento de relistagens e histórico de preços por imóvel físico"""
+
+    def run(self, ufs: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """Recalcula ``cluster_id`` dos imóveis (todas as UFs ou só ``ufs``)"""
+        query = db.session.query(
+            Imovel.id, Imovel.uf, Imovel.cidade, Imovel.endereco, Imovel.tipo_imovel,
+            Imovel.quartos, Imovel.area_total, Imovel.cluster_id,
+        ).order_by(Imovel.id)
+        if ufs:
+            query = query.filter(Imovel.uf.in_(list(ufs)))
+        rows = query.all()
+        records = [row._asdict() for row in rows]
+        clusters = find_clusters(records)
+
+        changed = [
+            {'id': record['id'], 'cluster_id': cluster_id}
+            for record, cluster_id in zip(records, clusters)
+            if record['cluster_id'] != cluster_id
+        ]
+        if changed:
+            db.session.bulk_update_mappings(Imovel, changed)
+        db.session.commit()
+
+        duplicates = sum(1 for record, cluster_id in zip(records, clusters) if record['id'] != cluster_id)
+        logger.info("Deduplicação: %s imóveis, %s relistagens, %s alterados", len(records), duplicates, len(changed))
+        return {'listings': len(records), 'duplicates': duplicates, 'updated': len(changed)}
+
+    def record_prices(self, load_id: Optional[int] = None, ufs: Optional[Iterable[str]] = None) -> int:
+        """Grava uma observação para cada imóvel cujo preço mudou desde a última"""
+        latest_ids = db.session.query(db.func.max(PricePoint.id)).group_by(PricePoint.imovel_id)
+        latest = {
+            point.imovel_id: (point.preco, point.valor_avaliacao)
+            for point in PricePoint.query.filter(PricePoint.id.in_(latest_ids)).all()
+        }
+
+        query = db.session.query(Imovel.id, Imovel.preco, Imovel.valor_avaliacao)
+        if ufs:
+            query = query.filter(Imovel.uf.in_(list(ufs)))
+        observed_at = datetime.utcnow()
+        points = [
+            {'imovel_id': imovel_id, 'load_id': load_id, 'preco': preco,
+             'valor_avaliacao': valor_avaliacao, 'observed_at': observed_at}
+            for imovel_id, preco, valor_avaliacao in query.all()
+            if latest.get(imovel_id) != (preco, valor_avaliacao)
+        ]
+        if points:
+            db.session.execute(db.insert(PricePoint), points)
+        db.session.commit()
+        return len(points)
+
+    @staticmethod
+    def cluster_of(imovel: Imovel) -> int:
+        return imovel.cluster_id or imovel.id
+
+    def duplicates(self, imovel: Imovel) -> List[Imovel]:
+        """Outras ofertas do mesmo imóvel físico"""
+        return Imovel.query.filter(
+            Imovel.cluster_id == self.cluster_of(imovel), Imovel.id != imovel.id
+        ).order_by(Imovel.id).all()
+
+    def price_history(self, imovel: Imovel) -> List[Dict[str, Any]]:
+        """Observações de preço de todas as ofertas do imóvel físico, em ordem cronológica"""
+        members = {imovel.id: imovel.numero_imovel}
+        members.update({other.id: other.numero_imovel for other in self.duplicates(imovel)})
+        points = PricePoint.query.filter(PricePoint.imovel_id.in_(list(members))).order_by(
+            PricePoint.observed_at, PricePoint.id
+        ).all()
+        return [{**point.to_dict(), 'numero_imovel': members[point.imovel_id]} for point in points]
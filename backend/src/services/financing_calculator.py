@@ -5,9 +5,15 @@ Baseado na planilha de viabilidade fornecida
 
 import math
 from typing import Dict, Any, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 
+import numpy as np
+
+from src.services import cashflow_engine, tax_engine
+from src.services.market_rates import market_rates
+from src.services.tracing import trace_methods
+
 @dataclass
 class FinancingInputs:
     """Dados de entrada para cálculo de financiamento"""
@@ -81,15 +87,21 @@ class FinancingResults:
     
     # Timeline
     timeline: Dict[str, Any]
+    
+    # Fluxo de caixa mensal com TIR, VPL (CDI) e payback
+    cash_flow: Dict[str, Any] = field(default_factory=dict)
 
+@trace_methods('financing')
 class FinancingCalculatorService:
     """Serviço para cálculo de viabilidade de financiamento imobiliário"""
     
     def __init__(self):
-        self.inflation_rate = 4.68  # % ao ano
-        self.cdi_rate = 12.5  # % ao ano
-        self.savings_rate = 6.2  # % ao ano
-        self.stocks_rate = 15.0  # % ao ano (média histórica)
+        # Taxas compartilhadas com /market-rates e a calculadora de viabilidade
+        rates = market_rates.current()
+        self.inflation_rate = rates['economic_indicators']['inflation_ipca']  # % ao ano
+        self.cdi_rate = rates['investments']['cdi']  # % ao ano
+        self.savings_rate = rates['investments']['savings']  # % ao ano
+        self.stocks_rate = rates['investments']['stocks_ibovespa']  # % ao ano (média histórica)
     
     def calculate_financing(self, inputs: FinancingInputs) -> FinancingResults:
         """Calcula a viabilidade do financiamento imobiliário"""
@@ -106,111 +118,217 @@ class FinancingCalculatorService:
         if inputs.sale_price == 0:
             inputs.sale_price = inputs.property_value * 1.2
         
-        # 1. Cálculo do financiamento
-        principal = inputs.property_value - inputs.down_payment
-        monthly_rate = inputs.interest_rate / 100 / 12
-        n_payments = inputs.loan_term
-        
-        # Parcela mensal (Sistema Price)
-        if monthly_rate > 0:
-            monthly_payment = principal * (monthly_rate * (1 + monthly_rate) ** n_payments) / ((1 + monthly_rate) ** n_payments - 1)
-        else:
-            monthly_payment = principal / n_payments
-        
-        total_interest = (monthly_payment * n_payments) - principal
-        
-        # 2. Custos de aquisição
-        auction_commission_value = inputs.property_value * inputs.auction_commission / 100
-        pending_debts = (inputs.water_bill + inputs.electricity_bill + 
-                        inputs.condominium_fees + inputs.iptu_arrears + inputs.other_debts)
-        
-        total_acquisition_costs = (inputs.property_value + inputs.documentation_costs + 
-                                 auction_commission_value + pending_debts)
-        
-        # 3. Custos mensais
-        monthly_costs = monthly_payment + inputs.monthly_iptu + inputs.monthly_condominium
-        
-        # 4. Receita de aluguel
-        total_rental_income = inputs.monthly_rent * inputs.rental_time
-        
-        # 5. Custos até a venda
-        total_monthly_costs = monthly_costs * inputs.time_to_sell
-        total_cost_until_sale = total_acquisition_costs + total_monthly_costs + inputs.maintenance_reforms
+        # Mesmo modelo do cálculo em lote, com um único imóvel
+        model = self._evaluate(
+            inputs,
+            values=np.array([inputs.property_value], dtype=np.float64),
+            down_payment=np.array([inputs.down_payment], dtype=np.float64),
+            documentation_costs=np.array([inputs.documentation_costs], dtype=np.float64),
+            monthly_rent=np.array([inputs.monthly_rent], dtype=np.float64),
+            sale_price=np.array([inputs.sale_price], dtype=np.float64),
+        )
+        result = {key: float(value[0]) for key, value in model.items() if key != 'cash_flows'}
         
-        # 6. Valor presente dos custos
+        # Valor presente dos custos
         present_value_costs = self._calculate_present_value(
-            total_cost_until_sale, inputs.interest_rate / 100, inputs.time_to_sell / 12
+            result['total_cost_until_sale'], inputs.interest_rate / 100, inputs.time_to_sell / 12
         )
         
-        # 7. Receita da venda
-        broker_fee = inputs.sale_price * inputs.broker_commission / 100
-        
-        # 8. Imposto de Renda sobre ganho de capital
-        capital_gain = inputs.sale_price - inputs.property_value
-        capital_gains_tax = 0
-        
-        if not inputs.is_first_property or not inputs.will_reinvest:
-            if capital_gain > 0:
-                capital_gains_tax = capital_gain * 0.15  # 15% sobre o ganho
-        
-        net_sale_value = inputs.sale_price - broker_fee - capital_gains_tax
-        
-        # 9. Resultado final
-        total_investment = inputs.down_payment + inputs.documentation_costs + auction_commission_value + pending_debts
-        final_profit = net_sale_value + total_rental_income - total_cost_until_sale
-        
-        # 10. Rentabilidade
-        if total_investment > 0:
-            total_return = (final_profit / total_investment) * 100
-            annual_return = (((final_profit + total_investment) / total_investment) ** (12 / inputs.time_to_sell) - 1) * 100
-        else:
-            total_return = 0
-            annual_return = 0
-        
-        real_return = annual_return - self.inflation_rate
-        
-        # 11. Comparações
+        # Comparações
         comparisons = {
             'cdi': self.cdi_rate,
             'savings': self.savings_rate,
             'stocks': self.stocks_rate
         }
         
-        # 12. Breakdown detalhado
+        # Breakdown detalhado
         breakdown = {
             'property_value': inputs.property_value,
             'documentation_costs': inputs.documentation_costs,
-            'auction_commission': auction_commission_value,
-            'pending_debts': pending_debts,
-            'broker_fee': broker_fee,
+            'auction_commission': result['auction_commission_value'],
+            'pending_debts': result['pending_debts'],
+            'broker_fee': result['broker_fee'],
             'maintenance_reforms': inputs.maintenance_reforms,
-            'total_interest': total_interest
+            'total_interest': result['total_interest'],
+            'capital_gain': result['capital_gain'],
+            'taxable_capital_gain': round(result['taxable_capital_gain'], 2)
         }
         
-        # 13. Timeline
-        timeline = self._create_timeline(inputs, monthly_payment, total_rental_income, net_sale_value)
+        # Timeline
+        timeline = self._create_timeline(inputs, result['monthly_payment'], result['total_rental_income'],
+                                         result['net_sale_value'], result['total_investment'])
+        
+        # Fluxo de caixa mensal (quitação do saldo devedor na venda)
+        cash_flow = cashflow_engine.single_projection(model['cash_flows'], self.cdi_rate)
+        cash_flow['loan_balance_at_sale'] = round(result['loan_balance_at_sale'], 2)
         
         return FinancingResults(
-            monthly_payment=monthly_payment,
-            total_interest=total_interest,
-            total_financed=principal,
-            total_acquisition_costs=total_acquisition_costs,
-            monthly_costs=monthly_costs,
-            total_cost_until_sale=total_cost_until_sale,
+            monthly_payment=result['monthly_payment'],
+            total_interest=result['total_interest'],
+            total_financed=result['total_financed'],
+            total_acquisition_costs=result['total_acquisition_costs'],
+            monthly_costs=result['monthly_costs'],
+            total_cost_until_sale=result['total_cost_until_sale'],
             present_value_costs=present_value_costs,
-            total_rental_income=total_rental_income,
-            net_sale_value=net_sale_value,
-            capital_gains_tax=capital_gains_tax,
-            final_profit=final_profit,
-            total_return=total_return,
-            annual_return=annual_return,
-            real_return=real_return,
-            total_investment=total_investment,
+            total_rental_income=result['total_rental_income'],
+            net_sale_value=result['net_sale_value'],
+            capital_gains_tax=result['capital_gains_tax'],
+            final_profit=result['final_profit'],
+            total_return=result['total_return'],
+            annual_return=result['annual_return'],
+            real_return=result['real_return'],
+            total_investment=result['total_investment'],
             comparisons=comparisons,
             breakdown=breakdown,
-            timeline=timeline
+            timeline=timeline,
+            cash_flow=cash_flow
         )
-    
+
+    def calculate_financing_batch(self, inputs: FinancingInputs, property_values,
+                                  down_payments=None) -> Dict[str, np.ndarray]:
+        """
+        Mesmo cálculo de ``calculate_financing`` para vários valores de imóvel
+
+        Os demais campos de ``inputs`` são compartilhados; custos de
+        documentação, aluguel e preço de venda não informados (zero) seguem
+        os padrões relativos a cada valor, como no cálculo unitário.
+        ``down_payments`` (array) substitui a entrada de ``inputs``.
+        """
+        values = np.asarray(property_values, dtype=np.float64)
+        size = len(values)
+        down_payment = np.broadcast_to(
+            np.asarray(inputs.down_payment if down_payments is None else down_payments, dtype=np.float64), (size,)
+        )
+        model = self._evaluate(
+            inputs,
+            values=values,
+            down_payment=down_payment,
+            documentation_costs=self._default_or_fixed(values, 0.05, inputs.documentation_costs),
+            monthly_rent=self._default_or_fixed(values, 0.006, inputs.monthly_rent),
+            sale_price=self._default_or_fixed(values, 1.2, inputs.sale_price),
+        )
+        metrics = cashflow_engine.cash_flow_metrics(model['cash_flows'], self.cdi_rate)
+
+        return {
+            'property_value': values,
+            'monthly_payment': model['monthly_payment'],
+            'total_financed': model['total_financed'],
+            'total_acquisition_costs': model['total_acquisition_costs'],
+            'capital_gains_tax': model['capital_gains_tax'],
+            'net_sale_value': model['net_sale_value'],
+            'final_profit': model['final_profit'],
+            'total_return': model['total_return'],
+            'annual_return': model['annual_return'],
+            'real_return': model['real_return'],
+            'total_investment': model['total_investment'],
+            'irr_annual': metrics['irr_annual'],
+            'npv': metrics['npv'],
+        }
+
+    @staticmethod
+    def _default_or_fixed(values: np.ndarray, ratio: float, fixed: float) -> np.ndarray:
+        """Valor informado para todos os imóveis ou, se zero, o padrão relativo a cada valor"""
+        return values * ratio if fixed == 0 else np.full(len(values), fixed, dtype=np.float64)
+
+    def _evaluate(self, inputs: FinancingInputs, values: np.ndarray, down_payment: np.ndarray,
+                  documentation_costs: np.ndarray, monthly_rent: np.ndarray,
+                  sale_price: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Modelo de financiamento, vetorizado por imóvel
+
+        Única implementação das contas; ``calculate_financing`` usa um array
+        de um elemento. Os arrays recebidos variam por imóvel; os demais
+        campos vêm de ``inputs``.
+        """
+        # 1. Financiamento (Sistema Price)
+        principal = values - down_payment
+        monthly_rate = inputs.interest_rate / 100 / 12
+        n_payments = inputs.loan_term
+        if monthly_rate > 0:
+            growth = (1 + monthly_rate) ** n_payments
+            monthly_payment = principal * monthly_rate * growth / (growth - 1)
+        else:
+            monthly_payment = principal / n_payments
+        total_interest = monthly_payment * n_payments - principal
+
+        # 2. Custos de aquisição
+        auction_commission_value = values * inputs.auction_commission / 100
+        pending_debts = np.full(len(values), inputs.water_bill + inputs.electricity_bill +
+                                inputs.condominium_fees + inputs.iptu_arrears + inputs.other_debts)
+        total_acquisition_costs = values + documentation_costs + auction_commission_value + pending_debts
+
+        # 3-5. Custos mensais, aluguel e custos até a venda
+        monthly_costs = monthly_payment + inputs.monthly_iptu + inputs.monthly_condominium
+        total_rental_income = monthly_rent * inputs.rental_time
+        total_cost_until_sale = (total_acquisition_costs + monthly_costs * inputs.time_to_sell
+                                 + inputs.maintenance_reforms)
+
+        # 6-7. Venda e Imposto de Renda sobre ganho de capital (faixas, fatores de redução e isenções)
+        # Custo de aquisição inclui documentação, comissão e reformas; a corretagem reduz o valor de venda
+        broker_fee = sale_price * inputs.broker_commission / 100
+        capital_gain = (sale_price - broker_fee) - (
+            values + documentation_costs + auction_commission_value + inputs.maintenance_reforms
+        )
+        tax_profile = tax_engine.TaxProfile(
+            only_property=inputs.is_first_property,
+            reinvest_fraction=1.0 if inputs.will_reinvest else 0.0,
+        )
+        tax = tax_engine.compute_capital_gains(capital_gain, sale_price, inputs.time_to_sell, tax_profile)
+        capital_gains_tax = np.round(tax['tax'], 2)
+        net_sale_value = sale_price - broker_fee - capital_gains_tax
+
+        # 8-9. Resultado e rentabilidade
+        total_investment = down_payment + documentation_costs + auction_commission_value + pending_debts
+        final_profit = net_sale_value + total_rental_income - total_cost_until_sale
+        with np.errstate(divide='ignore', invalid='ignore'):
+            growth_factor = (final_profit + total_investment) / total_investment
+            total_return = np.where(total_investment > 0, final_profit / total_investment * 100, 0.0)
+            # Perda maior que o investido vira -100% (a potência fracionária de negativo não é real)
+            annual_return = np.where(
+                total_investment > 0,
+                (np.maximum(growth_factor, 0.0) ** (12 / inputs.time_to_sell) - 1) * 100,
+                0.0,
+            )
+
+        # 10. Fluxo de caixa mensal (quitação do saldo devedor na venda)
+        loan_balance_at_sale = cashflow_engine.outstanding_balance(
+            principal, monthly_rate, monthly_payment, inputs.time_to_sell
+        )
+        cash_flows = cashflow_engine.project_cash_flows(
+            initial_outlay=total_investment + inputs.maintenance_reforms,
+            monthly_payment=monthly_payment,
+            monthly_costs=inputs.monthly_iptu + inputs.monthly_condominium,
+            monthly_rent=monthly_rent,
+            rental_time=inputs.rental_time,
+            time_to_sell=np.full(len(values), inputs.time_to_sell),
+            sale_proceeds=net_sale_value,
+            loan_balance_at_sale=loan_balance_at_sale,
+        )
+
+        return {
+            'monthly_payment': monthly_payment,
+            'total_interest': total_interest,
+            'total_financed': principal,
+            'auction_commission_value': auction_commission_value,
+            'pending_debts': pending_debts,
+            'total_acquisition_costs': total_acquisition_costs,
+            'monthly_costs': monthly_costs,
+            'total_rental_income': total_rental_income,
+            'total_cost_until_sale': total_cost_until_sale,
+            'broker_fee': broker_fee,
+            'capital_gain': capital_gain,
+            'taxable_capital_gain': tax['taxable_gain'],
+            'capital_gains_tax': capital_gains_tax,
+            'net_sale_value': net_sale_value,
+            'total_investment': total_investment,
+            'final_profit': final_profit,
+            'total_return': total_return,
+            'annual_return': annual_return,
+            'real_return': annual_return - self.inflation_rate,
+            'loan_balance_at_sale': loan_balance_at_sale,
+            'cash_flows': cash_flows,
+        }
+
     def _calculate_present_value(self, future_value: float, rate: float, years: float) -> float:
         """Calcula o valor presente"""
         if rate > 0:
@@ -218,7 +336,8 @@ class FinancingCalculatorService:
         return future_value
     
     def _create_timeline(self, inputs: FinancingInputs, monthly_payment: float, 
-                        total_rental_income: float, net_sale_value: float) -> Dict[str, Any]:
+                        total_rental_income: float, net_sale_value: float,
+                        total_investment: float) -> Dict[str, Any]:
         """Cria timeline do investimento"""
         
         timeline = {
@@ -241,7 +360,7 @@ class FinancingCalculatorService:
                 'description': 'Venda do imóvel',
                 'gross_value': inputs.sale_price,
                 'net_value': net_sale_value,
-                'final_result': net_sale_value + total_rental_income - inputs.total_investment
+                'final_result': net_sale_value + total_rental_income - total_investment
             }
         }
         
@@ -406,7 +525,8 @@ def calculate_property_financing(data: Dict[str, Any]) -> Dict[str, Any]:
                 'total_investment': result.total_investment,
                 'comparisons': result.comparisons,
                 'breakdown': result.breakdown,
-                'timeline': result.timeline
+                'timeline': result.timeline,
+                'cash_flow': result.cash_flow
             }
         }
         
@@ -0,0 +1,225 @@
+"""
+Geocodificação offline e consultas espaciais sobre os imóveis
+
+As coordenadas vêm de um gazetteer local (``src/data/gazetteer.csv``,
+centroides de municípios e bairros, sem acesso à rede). Cada imóvel recebe
+um geohash indexado; consultas por raio ou retângulo são convertidas em
+poucos prefixos de geohash e filtradas pela distância exata.
+"""
+
+import csv
+import math
+import os
+import logging
+import unicodedata
+from typing import Dict, Any, List, Optional, Tuple
+
+from src.models.user import db
+from src.models.imovel import Imovel
+
+logger = logging.getLogger(__name__)
+
+GAZETTEER_PATH = os.environ.get(
+    'GAZETTEER_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'gazetteer.csv'),
+)
+
+GEOHASH_PRECISION = 9
+MAX_CELLS = 16
+EARTH_RADIUS_KM = 6371.0088
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def normalize_place(value: Optional[str]) -> str:
+    """Maiúsculas, sem acentos e com espaços simples ('São  Paulo' -> 'SAO PAULO')"""
+    value = unicodedata.normalize('NFKD', value or '')
+    value = ''.join(c for c in value if not unicodedata.combining(c))
+    return ' '.join(value.upper().split())
+
+
+def geohash_encode(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        interval, value = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (interval[0] + interval[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            interval[0] = mid
+        else:
+            interval[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(chars)
+
+
+def _cell_size(precision: int) -> Tuple[float, float]:
+    """Altura e largura (em graus) de uma célula de geohash"""
+    total_bits = 5 * precision
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def covering_prefixes(min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+                      max_cells: int = MAX_CELLS) -> List[str]:
+    """Menor conjunto de prefixos (com até ``max_cells``) que cobre o retângulo"""
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        cell_lat, cell_lon = _cell_size(precision)
+        rows = int((max_lat - min_lat) / cell_lat) + 2
+        cols = int((max_lon - min_lon) / cell_lon) + 2
+        if rows * cols > max_cells and precision > 1:
+            continue
+
+        prefixes = set()
+        lat = min_lat
+        for _ in range(rows):
+            lon = min_lon
+            for _ in range(cols):
+                prefixes.add(geohash_encode(min(lat, max_lat), min(lon, max_lon), precision))
+                lon += cell_lon
+            lat += cell_lat
+        return sorted(prefixes)
+    return ['']
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def radius_bbox(latitude: float, longitude: float, radius_km: float) -> Tuple[float, float, float, float]:
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    dlon = math.degrees(radius_km / (EARTH_RADIUS_KM * max(math.cos(math.radians(latitude)), 1e-6)))
+    return latitude - dlat, longitude - dlon, latitude + dlat, longitude + dlon
+
+
+class Gazetteer:
+    """Centroides de bairros e municípios carregados do arquivo local"""
+
+    def __init__(self, path: str = GAZETTEER_PATH):
+        self.path = path
+        self._places: Optional[Dict[Tuple[str, str, str], Tuple[float, float]]] = None
+
+    def _load(self):
+        places = {}
+        try:
+            with open(self.path, newline='', encoding='utf-8') as handle:
+                for row in csv.DictReader(handle, delimiter=';'):
+                    key = (normalize_place(row['uf']), normalize_place(row['cidade']),
+                           normalize_place(row.get('bairro')))
+                    places[key] = (float(row['latitude']), float(row['longitude']))
+        except FileNotFoundError:
+            logger.warning("Gazetteer não encontrado em %s; geocodificação desativada", self.path)
+        self._places = places
+
+    def geocode(self, uf: str, cidade: str, bairro: Optional[str] = None) -> Optional[Tuple[float, float]]:
+        """Centroide do bairro, ou do município quando o bairro não é conhecido"""
+        if self._places is None:
+            self._load()
+        uf, cidade = normalize_place(uf), normalize_place(cidade)
+        bairro = normalize_place(bairro)
+        if bairro:
+            point = self._places.get((uf, cidade, bairro))
+            if point:
+                return point
+        return self._places.get((uf, cidade, ''))
+
+
+gazetteer = Gazetteer()
+
+
+def geocode_fields(uf: str, cidade: str, bairro: Optional[str] = None) -> Dict[str, Any]:
+    """Colunas latitude/longitude/geohash para um imóvel"""
+    point = gazetteer.geocode(uf, cidade, bairro)
+    if not point:
+        return {'latitude': None, 'longitude': None, 'geohash': None}
+    return {'latitude': point[0], 'longitude': point[1], 'geohash': geohash_encode(*point)}
+
+
+class GeoService:
+    """Consultas por raio e retângulo usando o índice de geohash"""
+
+    def geocode_missing(self, batch_size: int = 5000) -> int:
+        """Preenche coordenadas dos imóveis ainda sem geohash"""
+        updated = 0
+        last_id = 0
+        while True:
+            rows = (db.session.query(Imovel.id, Imovel.uf, Imovel.cidade, Imovel.bairro)
+                    .filter(Imovel.geohash.is_(None), Imovel.id > last_id)
+                    .order_by(Imovel.id).limit(batch_size).all())
+            if not rows:
+                break
+            last_id = rows[-1].id
+            updates = []
+            for row in rows:
+                fields = geocode_fields(row.uf, row.cidade, row.bairro)
+                if fields['geohash']:
+                    updates.append({'id': row.id, **fields})
+            if updates:
+                db.session.bulk_update_mappings(Imovel, updates)
+                db.session.commit()
+                updated += len(updates)
+        return updated
+
+    def within_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+                    limit: int = 100, **filters) -> List[Dict[str, Any]]:
+        """Imóveis dentro do retângulo informado"""
+        query = self._candidates(min_lat, min_lon, max_lat, max_lon, filters).filter(
+            Imovel.latitude.between(min_lat, max_lat),
+            Imovel.longitude.between(min_lon, max_lon),
+        )
+        return [imovel.to_dict() for imovel in query.order_by(Imovel.id).limit(limit).all()]
+
+    def nearby(self, latitude: float, longitude: float, radius_km: float = 5.0,
+               limit: int = 50, **filters) -> List[Dict[str, Any]]:
+        """Imóveis num raio de ``radius_km``, do mais próximo ao mais distante"""
+        min_lat, min_lon, max_lat, max_lon = radius_bbox(latitude, longitude, radius_km)
+        # Só id e coordenadas dos candidatos do retângulo; linhas completas só dos ``limit`` mais próximos
+        # (imóveis geocodificados pelo gazetteer compartilham o centroide e a cidade inteira cai no raio)
+        query = self._candidates(min_lat, min_lon, max_lat, max_lon, filters).filter(
+            Imovel.latitude.between(min_lat, max_lat),
+            Imovel.longitude.between(min_lon, max_lon),
+        ).with_entities(Imovel.id, Imovel.latitude, Imovel.longitude)
+
+        results = []
+        for imovel_id, lat, lon in query.all():
+            distance = haversine_km(latitude, longitude, lat, lon)
+            if distance <= radius_km:
+                results.append((distance, imovel_id))
+        results.sort()
+        results = results[:limit]
+
+        imoveis = {imovel.id: imovel for imovel in
+                   Imovel.query.filter(Imovel.id.in_([imovel_id for _, imovel_id in results])).all()}
+        items = []
+        for distance, imovel_id in results:
+            item = imoveis[imovel_id].to_dict()
+            item['distance_km'] = round(distance, 3)
+            items.append(item)
+        return items
+
+    @staticmethod
+    def _candidates(min_lat, min_lon, max_lat, max_lon, filters):
+        prefixes = covering_prefixes(min_lat, min_lon, max_lat, max_lon)
+        query = Imovel.query.filter(Imovel.geohash.isnot(None))
+        if prefixes != ['']:
+            query = query.filter(db.or_(*[Imovel.geohash.startswith(p, autoescape=True) for p in prefixes]))
+        if filters.get('uf'):
+            query = query.filter(Imovel.uf == filters['uf'].strip().upper())
+        if filters.get('tipo_imovel'):
+            query = query.filter(Imovel.tipo_imovel == filters['tipo_imovel'])
+        return query
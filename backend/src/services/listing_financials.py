@@ -0,0 +1,182 @@
+"""
+Métricas de financiamento pré-calculadas por imóvel
+
+Para cada imóvel e perfil padrão (Caixa SAC/Price, entrada de 20% ou 30%)
+grava parcela, juros totais, custos de documentação, aluguel estimado e
+yield bruto — os mesmos valores da estimativa rápida. O cálculo é
+vetorizado sobre todos os preços de uma vez. As linhas guardam a versão
+das taxas de mercado; quando as taxas mudam, a leitura recalcula em
+memória os imóveis pedidos (sem gravar) e ``refresh_stale`` / a CLI
+regravam a tabela.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Any, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import insert
+
+from src.models.user import db
+from src.models.imovel import Imovel
+from src.models.listing_financial import ListingFinancial
+from src.services.market_rates import market_rates
+
+logger = logging.getLogger(__name__)
+
+LOAN_TERM = 360  # meses
+DOCUMENTATION_COSTS_PCT = 5.0  # % do valor do imóvel
+RENT_PCT = 0.6  # % do valor do imóvel ao mês
+
+FINANCING_PROFILES = [
+    {'profile': 'caixa_sac_20', 'system': 'sac', 'rate_key': 'caixa_sac', 'down_payment_pct': 20},
+    {'profile': 'caixa_sac_30', 'system': 'sac', 'rate_key': 'caixa_sac', 'down_payment_pct': 30},
+    {'profile': 'caixa_price_20', 'system': 'price', 'rate_key': 'caixa_price', 'down_payment_pct': 20},
+    {'profile': 'caixa_price_30', 'system': 'price', 'rate_key': 'caixa_price', 'down_payment_pct': 30},
+]
+
+INSERT_BATCH_SIZE = 5000
+
+
+def compute_profile_metrics(prices: np.ndarray, system: str, interest_rate: float,
+                            down_payment_pct: float, loan_term: int = LOAN_TERM) -> Dict[str, np.ndarray]:
+    """Métricas de um perfil para um vetor de preços"""
+    prices = np.asarray(prices, dtype=np.float64)
+    down_payment = prices * down_payment_pct / 100
+    principal = prices - down_payment
+    monthly_rate = interest_rate / 100 / 12
+
+    if system == 'sac':
+        amortization = principal / loan_term
+        first_payment = amortization + principal * monthly_rate
+        last_payment = amortization * (1 + monthly_rate)
+        total_interest = principal * monthly_rate * (loan_term + 1) / 2
+    else:
+        if monthly_rate > 0:
+            growth = (1 + monthly_rate) ** loan_term
+            first_payment = principal * monthly_rate * growth / (growth - 1)
+        else:
+            first_payment = principal / loan_term
+        last_payment = first_payment
+        total_interest = first_payment * loan_term - principal
+
+    documentation_costs = prices * DOCUMENTATION_COSTS_PCT / 100
+    estimated_rent = prices * RENT_PCT / 100
+    return {
+        'down_payment': down_payment,
+        'principal': principal,
+        'first_payment': first_payment,
+        'last_payment': last_payment,
+        'total_interest': total_interest,
+        'documentation_costs': documentation_costs,
+        'total_initial_cost': down_payment + documentation_costs,
+        'estimated_rent': estimated_rent,
+        'gross_yield': np.full(len(prices), RENT_PCT * 12),
+    }
+
+
+class ListingFinancialsService:
+    """Pré-cálculo e leitura das métricas de financiamento por imóvel"""
+
+    def _rows_for(self, ids: np.ndarray, prices: np.ndarray) -> List[Dict[str, Any]]:
+        version = market_rates.version
+        computed_at = datetime.utcnow()
+        rows = []
+        for profile in FINANCING_PROFILES:
+            interest_rate = market_rates.financing_rate(profile['rate_key'])
+            metrics = compute_profile_metrics(prices, profile['system'], interest_rate,
+                                              profile['down_payment_pct'])
+            rounded = {name: np.round(values, 2).tolist() for name, values in metrics.items()}
+            for index, imovel_id in enumerate(ids.tolist()):
+                row = {name: values[index] for name, values in rounded.items()}
+                row.update({
+                    'imovel_id': imovel_id,
+                    'profile': profile['profile'],
+                    'system': profile['system'],
+                    'interest_rate': interest_rate,
+                    'loan_term': LOAN_TERM,
+                    'rates_version': version,
+                    'computed_at': computed_at,
+                })
+                rows.append(row)
+        return rows
+
+    def _store(self, pairs: List[tuple]) -> List[Dict[str, Any]]:
+        """Recalcula e regrava as métricas dos pares (id, preço)"""
+        if not pairs:
+            return []
+        ids = np.array([p[0] for p in pairs], dtype=np.int64)
+        prices = np.array([p[1] for p in pairs], dtype=np.float64)
+        rows = self._rows_for(ids, prices)
+
+        id_list = ids.tolist()
+        for start in range(0, len(id_list), INSERT_BATCH_SIZE):
+            chunk = id_list[start:start + INSERT_BATCH_SIZE]
+            ListingFinancial.query.filter(ListingFinancial.imovel_id.in_(chunk)).delete(synchronize_session=False)
+        for start in range(0, len(rows), INSERT_BATCH_SIZE):
+            db.session.execute(insert(ListingFinancial), rows[start:start + INSERT_BATCH_SIZE])
+        db.session.commit()
+        return rows
+
+    def refresh(self, ufs: Optional[Iterable[str]] = None,
+                imovel_ids: Optional[Iterable[int]] = None) -> int:
+        """Recalcula todos os imóveis com preço (ou apenas das ``ufs``/``imovel_ids``)"""
+        query = db.session.query(Imovel.id, Imovel.preco).filter(Imovel.preco > 0)
+        if ufs:
+            query = query.filter(Imovel.uf.in_(list(ufs)))
+        if imovel_ids is not None:
+            query = query.filter(Imovel.id.in_(list(imovel_ids)))
+        rows = self._store(query.all())
+        logger.info("Métricas de financiamento recalculadas: %s linhas (taxas %s)", len(rows), market_rates.version)
+        return len(rows)
+
+    def refresh_stale(self) -> int:
+        """Recalcula só os imóveis sem métricas ou com taxas antigas"""
+        version = market_rates.version
+        current = db.session.query(ListingFinancial.imovel_id).filter(
+            ListingFinancial.rates_version == version
+        ).distinct()
+        pairs = db.session.query(Imovel.id, Imovel.preco).filter(
+            Imovel.preco > 0, ~Imovel.id.in_(current)
+        ).all()
+        rows = self._store(pairs)
+        logger.info("Métricas de financiamento desatualizadas recalculadas: %s linhas", len(rows))
+        return len(rows)
+
+    def for_listings(self, imovel_ids: Iterable[int]) -> Dict[int, Dict[str, Dict[str, Any]]]:
+        """
+        Métricas por imóvel e perfil, lidas da tabela
+
+        Imóveis sem linhas na versão atual das taxas são recalculados em
+        lote, só em memória: a leitura não grava nem faz commit (a
+        persistência fica com ``refresh``/``refresh_stale``).
+        """
+        imovel_ids = list(imovel_ids)
+        if not imovel_ids:
+            return {}
+        version = market_rates.version
+        result: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        for row in ListingFinancial.query.filter(
+            ListingFinancial.imovel_id.in_(imovel_ids),
+            ListingFinancial.rates_version == version,
+        ).all():
+            result.setdefault(row.imovel_id, {})[row.profile] = row.to_dict()
+
+        missing = [i for i in imovel_ids if len(result.get(i, {})) < len(FINANCING_PROFILES)]
+        if missing:
+            pairs = db.session.query(Imovel.id, Imovel.preco).filter(
+                Imovel.id.in_(missing), Imovel.preco > 0
+            ).all()
+            ids = np.array([p[0] for p in pairs], dtype=np.int64)
+            prices = np.array([p[1] for p in pairs], dtype=np.float64)
+            for row in self._rows_for(ids, prices):
+                result.setdefault(row['imovel_id'], {})[row['profile']] = {
+                    key: value for key, value in row.items() if key not in ('imovel_id', 'computed_at')
+                }
+        return result
+
+    def get(self, imovel_id: int) -> Dict[str, Dict[str, Any]]:
+        return self.for_listings([imovel_id]).get(imovel_id, {})
+
+
+listing_financials_service = ListingFinancialsService()
@@ -0,0 +1,284 @@
+"""
+Carga em lote da lista de imóveis da Caixa
+
+No PostgreSQL os registros são enviados por ``COPY FROM STDIN`` para uma
+tabela temporária e aplicados em ``imoveis`` com um único
+``INSERT ... ON CONFLICT``. No SQLite (testes) a carga usa ``executemany``
+em lotes com o mesmo upsert.
+"""
+
+import csv
+import io
+import re
+import logging
+from datetime import datetime
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+
+from sqlalchemy import text
+
+from src.models.user import db
+from src.models.listing_load import ListingLoad
+from src.services.market_stats import MarketStatsService
+from src.services.geo_service import geocode_fields
+from src.services.scoring import ranking_engine
+from src.services.comps_service import comps_engine
+from src.services.listing_financials import listing_financials_service
+from src.services.dedup_service import DedupService
+
+logger = logging.getLogger(__name__)
+
+# Colunas do arquivo da Caixa, na ordem em que aparecem
+CSV_COLUMNS = ['numero_imovel', 'uf', 'cidade', 'bairro', 'endereco',
+               'preco', 'valor_avaliacao', 'desconto', 'descricao',
+               'modalidade_venda', 'link_acesso']
+
+# Colunas gravadas em imoveis pela carga. O arquivo da Caixa não traz
+# aceita_financiamento nem status_ocupacao: a carga não toca nessas colunas
+# (o upsert preserva o valor já gravado e imóveis novos ficam com NULL)
+LOAD_COLUMNS = CSV_COLUMNS + ['tipo_imovel', 'quartos', 'vagas_garagem',
+                              'area_total', 'area_privativa', 'area_terreno',
+                              'latitude', 'longitude', 'geohash']
+
+# Colunas da tabela temporária do COPY (tipos compatíveis com imoveis);
+# seq guarda a ordem das linhas no arquivo
+STAGING_DDL = """
+    CREATE TEMP TABLE imoveis_staging (
+        seq bigserial, numero_imovel varchar(32), uf varchar(2), cidade varchar(120),
+        bairro varchar(120), endereco text, preco numeric(12, 2),
+        valor_avaliacao numeric(12, 2), desconto numeric(5, 2), descricao text,
+        modalidade_venda varchar(80), link_acesso text, tipo_imovel varchar(40),
+        quartos integer, vagas_garagem integer, area_total numeric(10, 2),
+        area_privativa numeric(10, 2), area_terreno numeric(10, 2),
+        latitude double precision, longitude double precision, geohash varchar(12)
+    ) ON COMMIT DROP
+"""
+
+BATCH_SIZE = 5000
+
+_QUARTOS_RE = re.compile(r'(\d+)\s+qto\(s\)')
+_VAGAS_RE = re.compile(r'(\d+)\s+vaga\(s\)')
+_AREA_TOTAL_RE = re.compile(r'(\d+\.?\d*)\s+de área total')
+_AREA_PRIVATIVA_RE = re.compile(r'(\d+\.?\d*)\s+de área privativa')
+_AREA_TERRENO_RE = re.compile(r'(\d+\.?\d*)\s+de área do terreno')
+
+_TIPOS = ['Casa', 'Apartamento', 'Terreno', 'Galpão', 'Gleba']
+
+
+def _parse_decimal(value: Optional[str]) -> Optional[float]:
+    """Converte '191.280,00' ou '191280,00' em float"""
+    value = (value or '').strip()
+    if not value:
+        return None
+    if ',' in value:
+        value = value.replace('.', '').replace(',', '.')
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _search_number(pattern, descricao, cast):
+    match = pattern.search(descricao)
+    return cast(match.group(1)) if match else None
+
+
+def extrair_info_descricao(descricao: str) -> Dict[str, Any]:
+    """Extrai tipo, quartos, vagas e áreas da descrição da Caixa"""
+    descricao = descricao or ''
+    tipo = next((t for t in _TIPOS if t in descricao), 'Outros')
+    return {
+        'tipo_imovel': tipo,
+        'quartos': _search_number(_QUARTOS_RE, descricao, int),
+        'vagas_garagem': _search_number(_VAGAS_RE, descricao, int),
+        'area_total': _search_number(_AREA_TOTAL_RE, descricao, float),
+        'area_privativa': _search_number(_AREA_PRIVATIVA_RE, descricao, float),
+        'area_terreno': _search_number(_AREA_TERRENO_RE, descricao, float),
+    }
+
+
+def parse_listing_row(fields: List[str]) -> Optional[Dict[str, Any]]:
+    """Normaliza uma linha do CSV; retorna None para linhas inválidas"""
+    if len(fields) < len(CSV_COLUMNS):
+        return None
+
+    row = {column: (fields[i] or '').strip() for i, column in enumerate(CSV_COLUMNS)}
+    # Colunas NOT NULL em imoveis: no COPY um campo vazio vira NULL e derrubaria a carga inteira
+    if not row['numero_imovel'] or not row['uf'] or not row['cidade'] or not row['endereco']:
+        return None
+
+    row['uf'] = row['uf'].upper()[:2]
+    for column in ('preco', 'valor_avaliacao', 'desconto'):
+        row[column] = _parse_decimal(row[column])
+    row['bairro'] = row['bairro'] or None
+    row['descricao'] = row['descricao'] or None
+    row.update(extrair_info_descricao(row['descricao']))
+    return row
+
+
+def iter_listing_file(path: str, encoding: str = 'utf-8', skip_rows: int = 2) -> Iterator[Optional[Dict[str, Any]]]:
+    """
+    Lê o arquivo da Caixa em streaming
+
+    Pula as ``skip_rows`` linhas de título e a linha de cabeçalho, como
+    em ``docs/analise_dados.py``. Linhas inválidas são emitidas como None
+    para que a carga possa contabilizá-las.
+    """
+    with open(path, newline='', encoding=encoding, errors='replace') as handle:
+        for _ in range(skip_rows + 1):
+            next(handle, None)
+        for fields in csv.reader(handle, delimiter=';'):
+            if not fields:
+                continue
+            yield parse_listing_row(fields)
+
+
+class _CopyStream(io.RawIOBase):
+    """Arquivo somente leitura que serializa registros em CSV sob demanda"""
+
+    def __init__(self, rows: Iterable[Dict[str, Any]]):
+        self._rows = iter(rows)
+        self._buffer = b''
+
+    def readable(self):
+        return True
+
+    def _fill(self, size):
+        chunk = io.StringIO()
+        writer = csv.writer(chunk)
+        while chunk.tell() < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            writer.writerow(['' if row[c] is None else row[c] for c in LOAD_COLUMNS])
+        return chunk.getvalue().encode('utf-8')
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = 1 << 16
+        if len(self._buffer) < size:
+            self._buffer += self._fill(size - len(self._buffer))
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+class ListingLoader:
+    """Aplica um snapshot da lista de imóveis em ``imoveis``"""
+
+    def __init__(self, batch_size: int = BATCH_SIZE):
+        self.batch_size = batch_size
+
+    def load_file(self, path: str, encoding: str = 'utf-8') -> ListingLoad:
+        """Carrega um arquivo CSV da Caixa e retorna o registro de auditoria"""
+        return self.load(iter_listing_file(path, encoding=encoding), source=path)
+
+    def load(self, rows: Iterable[Optional[Dict[str, Any]]], source: str) -> ListingLoad:
+        """
+        Carrega registros já normalizados (``None`` conta como rejeitado)
+
+        Returns:
+            ListingLoad com contadores e status da carga
+        """
+        audit = ListingLoad(source=source, status='running')
+        db.session.add(audit)
+        db.session.commit()
+
+        counters = {'read': 0, 'rejected': 0}
+        ufs = set()
+
+        def accepted():
+            for row in rows:
+                counters['read'] += 1
+                if row is None:
+                    counters['rejected'] += 1
+                    continue
+                ufs.add(row['uf'])
+                row.update(geocode_fields(row['uf'], row['cidade'], row['bairro']))
+                yield row
+
+        try:
+            if db.session.get_bind().dialect.name == 'postgresql':
+                upserted = self._load_postgres(accepted())
+            else:
+                upserted = self._load_batches(accepted())
+            db.session.commit()
+            audit.status = 'success'
+        except Exception as e:
+            db.session.rollback()
+            logger.error("Falha na carga de imóveis (%s): %s", source, e)
+            upserted = 0
+            audit.status = 'failed'
+            audit.error = str(e)
+
+        audit.rows_read = counters['read']
+        audit.rows_rejected = counters['rejected']
+        audit.rows_upserted = upserted
+        audit.finished_at = datetime.utcnow()
+        db.session.add(audit)
+        db.session.commit()
+
+        if audit.status == 'success':
+            dedup = DedupService()
+            dedup.run(ufs=ufs)
+            dedup.record_prices(load_id=audit.id, ufs=ufs)
+            MarketStatsService().refresh(ufs=ufs)
+            listing_financials_service.refresh(ufs=ufs)
+            ranking_engine.invalidate()
+            comps_engine.invalidate()
+
+        logger.info(
+            "Carga %s (%s): %s lidos, %s gravados, %s rejeitados",
+            audit.id, audit.status, audit.rows_read, audit.rows_upserted, audit.rows_rejected,
+        )
+        return audit
+
+    def _upsert_sql(self, source_sql: str) -> str:
+        columns = ', '.join(LOAD_COLUMNS)
+        updates = ', '.join(f'{c} = excluded.{c}' for c in LOAD_COLUMNS if c != 'numero_imovel')
+        return (
+            f"INSERT INTO imoveis ({columns}, created_at, updated_at) {source_sql} "
+            f"ON CONFLICT (numero_imovel) DO UPDATE SET {updates}, updated_at = excluded.updated_at"
+        )
+
+    def _load_postgres(self, rows: Iterable[Dict[str, Any]]) -> int:
+        connection = db.session.connection()
+        connection.execute(text(STAGING_DDL))
+
+        raw_cursor = connection.connection.cursor()
+        try:
+            raw_cursor.copy_expert(
+                f"COPY imoveis_staging ({', '.join(LOAD_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                _CopyStream(rows),
+            )
+        finally:
+            raw_cursor.close()
+
+        # DISTINCT ON evita "ON CONFLICT ... cannot affect row a second time"
+        # quando o arquivo repete um numero_imovel; vale a última ocorrência,
+        # como no upsert em lotes
+        select_sql = (
+            f"SELECT DISTINCT ON (numero_imovel) {', '.join(LOAD_COLUMNS)}, now(), now() "
+            f"FROM imoveis_staging ORDER BY numero_imovel, seq DESC"
+        )
+        result = connection.execute(text(self._upsert_sql(select_sql)))
+        return result.rowcount
+
+    def _load_batches(self, rows: Iterable[Dict[str, Any]]) -> int:
+        placeholders = ', '.join(f':{c}' for c in LOAD_COLUMNS)
+        statement = text(self._upsert_sql(f"VALUES ({placeholders}, :loaded_at, :loaded_at)"))
+
+        upserted = 0
+        batch = []
+        loaded_at = datetime.utcnow()
+        for row in rows:
+            batch.append({**row, 'loaded_at': loaded_at})
+            if len(batch) >= self.batch_size:
+                upserted += self._execute_batch(statement, batch)
+                batch = []
+        if batch:
+            upserted += self._execute_batch(statement, batch)
+        return upserted
+
+    @staticmethod
+    def _execute_batch(statement, batch) -> int:
+        db.session.execute(statement, batch)
+        return len(batch)
@@ -0,0 +1,118 @@
+"""
+Taxas de mercado (financiamento, investimentos, indicadores)
+
+As taxas em vigor ficam em ``instance/market_rates.json`` (ou
+``MARKET_RATES_PATH``), fora do git: o deploy faz ``git reset --hard`` e
+apagaria as alterações. Enquanto o arquivo não existe, valem as taxas
+padrão versionadas em ``src/data/market_rates.json``; ``update`` grava o
+arquivo da instância a partir delas. As taxas são relidas quando o arquivo
+muda. Cada conjunto de taxas tem um ``version`` (hash do conteúdo), usado
+para invalidar valores pré-calculados a partir delas.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+DEFAULT_RATES_PATH = os.path.join(_BACKEND_DIR, 'src', 'data', 'market_rates.json')
+RATES_PATH = os.environ.get('MARKET_RATES_PATH', os.path.join(_BACKEND_DIR, 'instance', 'market_rates.json'))
+
+RELOAD_CHECK_INTERVAL = 2.0  # segundos entre verificações do arquivo
+
+
+def rates_version(rates: Dict[str, Any]) -> str:
+    """Hash curto das taxas (ignora ``last_updated``)"""
+    content = {key: value for key, value in rates.items() if key != 'last_updated'}
+    return hashlib.sha1(json.dumps(content, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+
+class MarketRatesService:
+    """Leitura e atualização das taxas de mercado, com recarga automática"""
+
+    def __init__(self, path: str = RATES_PATH, check_interval: float = RELOAD_CHECK_INTERVAL,
+                 defaults_path: str = DEFAULT_RATES_PATH):
+        self.path = path
+        self.defaults_path = defaults_path
+        self.check_interval = check_interval
+        self._rates: Optional[Dict[str, Any]] = None
+        self._version: Optional[str] = None
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self) -> Dict[str, Any]:
+        """Taxas em vigor; verifica o arquivo no máximo a cada ``check_interval``"""
+        now = time.monotonic()
+        if self._rates is None or now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                mtime = None
+            if self._rates is None or mtime != self._mtime:
+                self._load()
+        return self._rates
+
+    @property
+    def version(self) -> str:
+        self.current()
+        return self._version
+
+    def financing_rate(self, key: str) -> float:
+        return float(self.current()['financing'][key])
+
+    def investment_rate(self, key: str) -> float:
+        return float(self.current()['investments'][key])
+
+    def _load(self) -> None:
+        with self._lock:
+            path = self.path if os.path.exists(self.path) else self.defaults_path
+            try:
+                mtime = os.stat(self.path).st_mtime_ns if path == self.path else None
+                with open(path, encoding='utf-8') as handle:
+                    rates = json.load(handle)
+            except (OSError, ValueError) as e:
+                if self._rates is None:
+                    raise
+                logger.error("Taxas de mercado inválidas em %s, mantendo as anteriores: %s", path, e)
+                return
+
+            version = rates_version(rates)
+            if version != self._version:
+                logger.info("Taxas de mercado carregadas: versão %s", version)
+            self._rates, self._version, self._mtime = rates, version, mtime
+
+    def update(self, section: str, values: Dict[str, float]) -> str:
+        """
+        Altera taxas de uma seção e grava o arquivo da instância
+
+        Retorna a nova versão. Outros processos percebem a mudança pelo
+        mtime do arquivo.
+        """
+        rates = json.loads(json.dumps(self.current()))
+        if section not in rates or not isinstance(rates[section], dict):
+            raise ValueError(f"Seção de taxas desconhecida: {section}")
+        for key, value in values.items():
+            if key not in rates[section]:
+                raise ValueError(f"Taxa desconhecida: {section}.{key}")
+            rates[section][key] = float(value)
+        rates['last_updated'] = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as handle:
+            json.dump(rates, handle, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+        self._load()
+        return self._version
+
+
+market_rates = MarketRatesService()
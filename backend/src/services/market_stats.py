@@ -0,0 +1,296 @@
+"""
+Agregados de mercado pré-calculados (tabela ``market_stats``)
+
+Substitui a varredura completa feita pelos scripts de ``docs/`` por linhas
+por uf/cidade/bairro/tipo, atualizadas por UF a cada carga de snapshot.
+
+As consultas ficam em cache por processo, com a versão dos agregados
+(``max(refreshed_at)``) na chave. A versão é relida do banco a cada
+``MARKET_STATS_VERSION_INTERVAL`` segundos, então um refresh feito por
+outro processo (CLI, carga) aparece em todos os workers nesse prazo.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Any, Iterable, List, Optional
+
+from sqlalchemy import func, insert, text
+
+from src.models.user import db
+from src.models.imovel import Imovel
+from src.models.market_stat import MarketStat
+from src.services.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+ALL = ''
+
+# Níveis expostos em group_by e a dimensão correspondente
+GROUP_LEVELS = ('uf', 'cidade', 'bairro', 'tipo_imovel')
+
+VERSION_INTERVAL = float(os.environ.get('MARKET_STATS_VERSION_INTERVAL', 5))
+
+stats_cache = TTLCache(maxsize=2048, ttl=300, name='market_stats')
+
+QUANTILES = (('p25', 0.25), ('p50', 0.5), ('p75', 0.75))
+
+# Linhas nacionais calculadas no PostgreSQL (total e por tipo), sem trazer os imóveis
+NATIONAL_SQL = """
+    SELECT GROUPING(tipo_imovel) AS total, tipo_imovel, count(*),
+           percentile_cont(ARRAY[0.25, 0.5, 0.75]) WITHIN GROUP (ORDER BY preco), avg(preco),
+           percentile_cont(ARRAY[0.25, 0.5, 0.75]) WITHIN GROUP (ORDER BY desconto), avg(desconto),
+           percentile_cont(ARRAY[0.25, 0.5, 0.75]) WITHIN GROUP (ORDER BY preco / NULLIF(area_total, 0))
+    FROM imoveis
+    GROUP BY GROUPING SETS ((), (tipo_imovel))
+"""
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Percentil com interpolação linear sobre uma lista já ordenada"""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    fraction = position - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+
+
+class _Accumulator:
+    __slots__ = ('count', 'precos', 'descontos', 'precos_m2')
+
+    def __init__(self):
+        self.count = 0
+        self.precos = []
+        self.descontos = []
+        self.precos_m2 = []
+
+    def add(self, preco, desconto, area):
+        self.count += 1
+        if preco is not None:
+            self.precos.append(preco)
+            if area:
+                self.precos_m2.append(preco / area)
+        if desconto is not None:
+            self.descontos.append(desconto)
+
+    def to_row(self, key, refreshed_at) -> Dict[str, Any]:
+        uf, cidade, bairro, tipo = key
+        quantiles = {}
+        for name, values in (('preco', self.precos), ('desconto', self.descontos),
+                             ('preco_m2', self.precos_m2)):
+            values.sort()
+            quantiles[name] = [percentile(values, q) for _, q in QUANTILES]
+        return _stat_row(
+            key, self.count, quantiles, refreshed_at,
+            preco_mean=sum(self.precos) / len(self.precos) if self.precos else None,
+            desconto_mean=sum(self.descontos) / len(self.descontos) if self.descontos else None,
+        )
+
+
+def _stat_row(key, count, quantiles, refreshed_at, preco_mean, desconto_mean) -> Dict[str, Any]:
+    """Linha de market_stats a partir dos quantis (p25, p50, p75) de cada medida"""
+    uf, cidade, bairro, tipo = key
+    row = {'uf': uf, 'cidade': cidade, 'bairro': bairro, 'tipo_imovel': tipo,
+           'count': count, 'refreshed_at': refreshed_at}
+    for name, values in quantiles.items():
+        for (label, _), value in zip(QUANTILES, values or [None] * len(QUANTILES)):
+            row[f'{name}_{label}'] = round(float(value), 2) if value is not None else None
+    row['preco_mean'] = round(float(preco_mean), 2) if preco_mean is not None else None
+    row['desconto_mean'] = round(float(desconto_mean), 2) if desconto_mean is not None else None
+    return row
+
+
+class _StatsVersion:
+    """Versão dos agregados gravados, relida do banco a cada ``interval`` segundos"""
+
+    def __init__(self, interval: float = VERSION_INTERVAL):
+        self.interval = interval
+        self._value: Optional[str] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self) -> str:
+        with self._lock:
+            if self._value is None or time.monotonic() - self._checked_at >= self.interval:
+                latest = db.session.query(func.max(MarketStat.refreshed_at)).scalar()
+                self._value = latest.isoformat() if latest else ''
+                self._checked_at = time.monotonic()
+            return self._value
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._value = None
+
+
+stats_version = _StatsVersion()
+
+
+class MarketStatsService:
+    """Calcula, persiste e consulta os agregados de mercado"""
+
+    def refresh(self, ufs: Optional[Iterable[str]] = None) -> int:
+        """
+        Recalcula os agregados
+
+        Args:
+            ufs: UFs afetadas pela última carga; None recalcula tudo. As
+                linhas nacionais (uf vazia) são sempre recalculadas.
+
+        Returns:
+            Número de linhas gravadas
+        """
+        ufs = sorted({uf.strip().upper() for uf in ufs if uf}) if ufs is not None else None
+
+        groups = defaultdict(_Accumulator)
+        query = db.session.query(
+            Imovel.uf, Imovel.cidade, Imovel.bairro, Imovel.tipo_imovel,
+            Imovel.preco, Imovel.desconto, Imovel.area_total,
+        )
+        if ufs is not None:
+            query = query.filter(Imovel.uf.in_(ufs))
+        for uf, cidade, bairro, tipo, preco, desconto, area in query.yield_per(5000):
+            tipo = tipo or ALL
+            # Chaves normalizadas em maiúsculas para consulta por igualdade
+            cidade = (cidade or ALL).strip().upper()
+            bairro = (bairro or ALL).strip().upper()
+            for key in self._keys(uf, cidade, bairro, tipo):
+                groups[key].add(preco, desconto, area)
+
+        # Versão nova só no fim, para que o max(refreshed_at) cresça a cada refresh
+        refreshed_at = datetime.utcnow()
+        rows = [acc.to_row(key, refreshed_at) for key, acc in groups.items()]
+        rows += self._national_rows(refreshed_at)
+
+        stale = MarketStat.query.filter(MarketStat.uf == ALL)
+        if ufs is None:
+            stale = MarketStat.query
+        elif ufs:
+            stale = MarketStat.query.filter(MarketStat.uf.in_(ufs + [ALL]))
+        stale.delete(synchronize_session=False)
+
+        if rows:
+            db.session.execute(insert(MarketStat), rows)
+        db.session.commit()
+        stats_cache.clear()
+        stats_version.invalidate()
+
+        logger.info("Agregados de mercado atualizados: %s linhas (UFs: %s)", len(rows), ufs or 'todas')
+        return len(rows)
+
+    @staticmethod
+    def _national_rows(refreshed_at) -> List[Dict[str, Any]]:
+        """Linhas nacionais (uf vazia): o total e um por tipo, sempre sobre o catálogo inteiro"""
+        if db.session.get_bind().dialect.name == 'postgresql':
+            rows = []
+            for total, tipo, count, preco_q, preco_mean, desconto_q, desconto_mean, preco_m2_q in \
+                    db.session.execute(text(NATIONAL_SQL)):
+                if not total and not tipo:
+                    continue  # imóveis sem tipo só entram no total
+                key = (ALL, ALL, ALL, ALL if total else tipo)
+                quantiles = {'preco': preco_q, 'desconto': desconto_q, 'preco_m2': preco_m2_q}
+                rows.append(_stat_row(key, count, quantiles, refreshed_at, preco_mean, desconto_mean))
+            return rows
+
+        national = defaultdict(_Accumulator)
+        query = db.session.query(Imovel.tipo_imovel, Imovel.preco, Imovel.desconto, Imovel.area_total)
+        for tipo, preco, desconto, area in query.yield_per(5000):
+            national[(ALL, ALL, ALL, ALL)].add(preco, desconto, area)
+            if tipo:
+                national[(ALL, ALL, ALL, tipo)].add(preco, desconto, area)
+        return [acc.to_row(key, refreshed_at) for key, acc in national.items()]
+
+    @staticmethod
+    def _keys(uf, cidade, bairro, tipo):
+        prefixes = [(uf, ALL, ALL)]
+        if cidade:
+            prefixes.append((uf, cidade, ALL))
+            if bairro:
+                prefixes.append((uf, cidade, bairro))
+        for prefix in prefixes:
+            yield prefix + (ALL,)
+            if tipo:
+                yield prefix + (tipo,)
+
+    def get(self, uf: str = ALL, cidade: str = ALL, bairro: str = ALL,
+            tipo_imovel: str = ALL) -> Optional[Dict[str, Any]]:
+        """Retorna o agregado de um recorte (consulta por chave única)"""
+        key = ('get', stats_version.current(), (uf or ALL).upper(), (cidade or ALL).upper(),
+               (bairro or ALL).upper(), tipo_imovel or ALL)
+
+        def load():
+            stat = MarketStat.query.filter(
+                MarketStat.uf == key[2],
+                MarketStat.cidade == key[3],
+                MarketStat.bairro == key[4],
+                MarketStat.tipo_imovel == key[5],
+            ).first()
+            return stat.to_dict() if stat else None
+
+        return stats_cache.get_or_set(key, load)
+
+    def breakdown(self, group_by: str, uf: str = ALL, cidade: str = ALL,
+                  tipo_imovel: str = ALL, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Lista os agregados do nível ``group_by`` dentro de um recorte
+
+        Ex.: group_by='cidade', uf='SP' retorna uma linha por cidade de SP.
+        """
+        if group_by not in GROUP_LEVELS:
+            raise ValueError(f"group_by deve ser um de {', '.join(GROUP_LEVELS)}")
+
+        key = ('breakdown', stats_version.current(), group_by, (uf or ALL).upper(), (cidade or ALL).upper(),
+               tipo_imovel or ALL, limit)
+
+        def load():
+            query = MarketStat.query
+            if group_by == 'tipo_imovel':
+                query = query.filter(
+                    MarketStat.uf == key[3],
+                    MarketStat.cidade == key[4],
+                    MarketStat.bairro == ALL,
+                    MarketStat.tipo_imovel != ALL,
+                )
+            else:
+                query = query.filter(MarketStat.tipo_imovel == key[5])
+                if group_by == 'uf':
+                    query = query.filter(MarketStat.uf != ALL, MarketStat.cidade == ALL)
+                elif group_by == 'cidade':
+                    query = query.filter(MarketStat.uf == key[3], MarketStat.cidade != ALL,
+                                         MarketStat.bairro == ALL)
+                else:
+                    query = query.filter(MarketStat.uf == key[3],
+                                         MarketStat.cidade == key[4],
+                                         MarketStat.bairro != ALL)
+            stats = query.order_by(MarketStat.count.desc()).limit(limit).all()
+            return [stat.to_dict() for stat in stats]
+
+        return stats_cache.get_or_set(key, load)
+
+    def market_summary(self, uf: str = ALL, cidade: str = ALL, top: int = 5) -> Dict[str, Any]:
+        """
+        Resumo no formato esperado por ``BedrockService.generate_market_insights``
+        """
+        total = self.get(uf=uf, cidade=cidade) or {}
+        if cidade:
+            places = self.breakdown('bairro', uf=uf, cidade=cidade, limit=top)
+            place_field = 'bairro'
+        elif uf:
+            places = self.breakdown('cidade', uf=uf, limit=top)
+            place_field = 'cidade'
+        else:
+            places = self.breakdown('uf', limit=top)
+            place_field = 'uf'
+        types = self.breakdown('tipo_imovel', uf=uf, cidade=cidade, limit=top)
+
+        return {
+            'total_properties': total.get('count', 0),
+            'average_price': (total.get('preco') or {}).get('mean') or 0,
+            'average_discount': (total.get('desconto') or {}).get('mean') or 0,
+            'top_cities': [p[place_field] for p in places if p.get(place_field)],
+            'common_types': [t['tipo_imovel'] for t in types if t.get('tipo_imovel')],
+        }
@@ -0,0 +1,319 @@
+"""
+Métricas no formato texto do Prometheus, sem dependências externas
+
+Cada processo acumula contadores, gauges e histogramas em memória; os
+hooks de requisição só atualizam dicionários. Com o gunicorn (vários
+workers), defina ``METRICS_MULTIPROC_DIR``: cada worker grava um
+instantâneo ``<pid>.json`` no diretório no máximo a cada
+``METRICS_FLUSH_INTERVAL`` segundos, e ``/metrics`` soma os arquivos de
+todos. Gauges de processos que já terminaram são ignorados; contadores
+continuam somando. Limpe o diretório a cada deploy.
+
+Métricas expostas:
+- ``http_requests_total``, ``http_request_duration_seconds`` e
+  ``http_requests_in_flight`` por blueprint e rota;
+- ``bedrock_request_duration_seconds`` e ``bedrock_tokens_total``;
+- ``cache_hits_total``, ``cache_misses_total`` e ``cache_hit_ratio`` dos
+  caches nomeados (``TTLCache(name=...)``).
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from flask import Flask, g, request
+
+from src.services.cache import named_caches
+
+logger = logging.getLogger(__name__)
+
+MULTIPROC_DIR = os.environ.get('METRICS_MULTIPROC_DIR')
+FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 1))
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BEDROCK_BUCKETS = (0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+Labels = Tuple[str, ...]
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, documentation: str, labelnames: Iterable[str]):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        values = self.registry._values[self.name]
+        with self.registry._lock:
+            values[labels] = values.get(labels, 0.0) + amount
+
+    def set_total(self, labels: Labels, total: float) -> None:
+        """Para contadores mantidos por outro objeto (ex.: acertos de cache)"""
+        with self.registry._lock:
+            self.registry._values[self.name][labels] = float(total)
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        values = self.registry._values[self.name]
+        with self.registry._lock:
+            values[labels] = values.get(labels, 0.0) + amount
+
+    def dec(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, labels: Labels, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        values = self.registry._values[self.name]
+        with self.registry._lock:
+            # [contagem por bucket..., +Inf, soma]
+            series = values.get(labels)
+            if series is None:
+                series = values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Labels, values: Labels, extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name != 'posix':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MetricsRegistry:
+    """Métricas do processo e agregação entre workers"""
+
+    def __init__(self, multiproc_dir: Optional[str] = MULTIPROC_DIR, flush_interval: float = FLUSH_INTERVAL):
+        self.multiproc_dir = multiproc_dir
+        self.flush_interval = flush_interval
+        self._metrics: Dict[str, _Metric] = {}
+        self._values: Dict[str, Dict[Labels, Any]] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        self._flushed_at = 0.0
+        if multiproc_dir:
+            os.makedirs(multiproc_dir, exist_ok=True)
+
+    def _register(self, metric: _Metric) -> Any:
+        self._metrics[metric.name] = metric
+        self._values.setdefault(metric.name, {})
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(self, name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Função chamada antes de cada instantâneo para atualizar métricas"""
+        self._collectors.append(collector)
+
+    def snapshot(self) -> Dict[str, List[Any]]:
+        for collector in self._collectors:
+            collector()
+        with self._lock:
+            return {
+                name: [[list(labels), list(value) if isinstance(value, list) else value]
+                       for labels, value in series.items()]
+                for name, series in self._values.items()
+            }
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.multiproc_dir, f'{pid}.json')
+
+    def flush(self) -> None:
+        """Grava o instantâneo do processo no diretório compartilhado"""
+        if not self.multiproc_dir:
+            return
+        self._flushed_at = time.monotonic()
+        path = self._path(os.getpid())
+        tmp_path = f'{path}.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self.snapshot(), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error("Falha ao gravar métricas em %s: %s", path, e)
+
+    def maybe_flush(self) -> None:
+        if self.multiproc_dir and time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+
+    def _snapshots(self) -> Iterable[Tuple[bool, Dict[str, List[Any]]]]:
+        if not self.multiproc_dir:
+            yield True, self.snapshot()
+            return
+        self.flush()
+        for filename in os.listdir(self.multiproc_dir):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.multiproc_dir, filename)) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue  # arquivo de um worker sendo substituído ou corrompido
+            yield _pid_alive(int(filename[:-5])), data
+
+    def collect(self) -> Dict[str, Dict[Labels, Any]]:
+        """Valores somados entre os processos"""
+        merged: Dict[str, Dict[Labels, Any]] = {name: {} for name in self._metrics}
+        for alive, data in self._snapshots():
+            for name, samples in data.items():
+                metric = self._metrics.get(name)
+                if metric is None or (metric.kind == 'gauge' and not alive):
+                    continue
+                series = merged[name]
+                for labels, value in samples:
+                    key = tuple(labels)
+                    if isinstance(value, list):
+                        current = series.get(key)
+                        series[key] = value if current is None else [a + b for a, b in zip(current, value)]
+                    else:
+                        series[key] = series.get(key, 0.0) + value
+        return merged
+
+    def render(self) -> str:
+        """Exposição no formato texto do Prometheus (versão 0.0.4)"""
+        merged = self.collect()
+        lines: List[str] = []
+        for name, metric in self._metrics.items():
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            for labels, value in sorted(merged[name].items()):
+                if metric.kind != 'histogram':
+                    lines.append(f'{name}{_format_labels(metric.labelnames, labels)} {_format_value(value)}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float('inf'),), value[:-1]):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    bucket_labels = _format_labels(metric.labelnames, labels, f'le="{le}"')
+                    lines.append(f'{name}_bucket{bucket_labels} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(metric.labelnames, labels)} {_format_value(value[-1])}')
+                lines.append(f'{name}_count{_format_labels(metric.labelnames, labels)} {cumulative}')
+        lines.extend(self._cache_ratios(merged))
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _cache_ratios(merged: Dict[str, Dict[Labels, Any]]) -> List[str]:
+        hits = merged.get('cache_hits_total', {})
+        misses = merged.get('cache_misses_total', {})
+        lines = ['# HELP cache_hit_ratio Fração de consultas atendidas pelo cache',
+                 '# TYPE cache_hit_ratio gauge']
+        for labels in sorted(set(hits) | set(misses)):
+            total = hits.get(labels, 0.0) + misses.get(labels, 0.0)
+            ratio = hits.get(labels, 0.0) / total if total else 0.0
+            lines.append(f'cache_hit_ratio{_format_labels(("cache",), labels)} {_format_value(ratio)}')
+        return lines
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter(
+    'http_requests_total', 'Requisições HTTP atendidas', ('blueprint', 'route', 'method', 'status'))
+HTTP_DURATION = registry.histogram(
+    'http_request_duration_seconds', 'Duração das requisições HTTP', ('blueprint', 'route', 'method'))
+HTTP_IN_FLIGHT = registry.gauge(
+    'http_requests_in_flight', 'Requisições HTTP em andamento', ('blueprint',))
+BEDROCK_DURATION = registry.histogram(
+    'bedrock_request_duration_seconds', 'Duração das chamadas ao Bedrock', ('model', 'outcome'),
+    buckets=BEDROCK_BUCKETS)
+BEDROCK_TOKENS = registry.counter(
+    'bedrock_tokens_total', 'Tokens consumidos no Bedrock', ('model', 'direction'))
+CACHE_HITS = registry.counter('cache_hits_total', 'Acertos de cache', ('cache',))
+CACHE_MISSES = registry.counter('cache_misses_total', 'Falhas de cache', ('cache',))
+
+
+def _collect_caches() -> None:
+    for name, cache in list(named_caches.items()):
+        CACHE_HITS.set_total((name,), cache.hits)
+        CACHE_MISSES.set_total((name,), cache.misses)
+
+
+registry.add_collector(_collect_caches)
+
+
+def observe_bedrock(model: str, seconds: float, outcome: str, usage: Optional[Dict[str, Any]] = None) -> None:
+    """Registra uma chamada ao Bedrock (``usage`` como devolvido pelo modelo)"""
+    BEDROCK_DURATION.observe((model, outcome), seconds)
+    if usage:
+        BEDROCK_TOKENS.inc((model, 'input'), usage.get('input_tokens', 0))
+        BEDROCK_TOKENS.inc((model, 'output'), usage.get('output_tokens', 0))
+
+
+def _before_request() -> None:
+    g._metrics_started = time.perf_counter()
+    g._metrics_blueprint = request.blueprint or ''
+    HTTP_IN_FLIGHT.inc((g._metrics_blueprint,))
+
+
+def _after_request(response):
+    started = g.get('_metrics_started')
+    if started is not None:
+        # A regra (ex.: /api/imoveis/<int:id>), não o caminho, para limitar a cardinalidade
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        labels = (g._metrics_blueprint, route, request.method)
+        HTTP_DURATION.observe(labels, time.perf_counter() - started)
+        HTTP_REQUESTS.inc(labels + (str(response.status_code),))
+    return response
+
+
+def _teardown_request(exc) -> None:
+    blueprint = g.pop('_metrics_blueprint', None)
+    if blueprint is not None:
+        HTTP_IN_FLIGHT.dec((blueprint,))
+    registry.maybe_flush()
+
+
+def init_app(app: Flask) -> None:
+    """Instala os hooks de instrumentação das requisições"""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
@@ -0,0 +1,114 @@
+"""
+Hash de senhas fora da thread da requisição
+
+Os KDFs (scrypt, pbkdf2) ocupam a CPU por dezenas de milissegundos e, no
+processo do servidor, seguram o GIL: um pico de logins trava as demais
+requisições do worker. Aqui o cálculo roda num pool de processos limitado;
+a thread da requisição só espera o resultado, liberando o GIL.
+
+Algoritmo e custo vêm de ``PASSWORD_HASH_METHOD`` no formato do werkzeug
+(``scrypt:32768:8:1``, ``pbkdf2:sha256:600000``). Hashes gravados com
+outro método são refeitos no próximo login bem-sucedido.
+``PASSWORD_HASH_WORKERS=0`` calcula na própria thread.
+
+Os processos do pool partem de um servidor limpo (``forkserver``, ou
+``spawn`` onde ele não existe), não de um fork do worker: o fork copiaria
+locks presos por outras threads (log, pool do banco) e o estado da app.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+logger = logging.getLogger(__name__)
+
+HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+# Pedidos aguardando por worker antes de recusar (evita fila sem limite)
+MAX_PENDING_PER_WORKER = 8
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+class HashingBusyError(RuntimeError):
+    """Fila de hashing cheia; a requisição deve ser recusada (503)"""
+
+
+def _hash(password: str, method: str) -> str:
+    return generate_password_hash(password, method=method)
+
+
+def _verify(stored_hash: str, password: str, method: Optional[str]) -> Tuple[bool, Optional[str]]:
+    if not check_password_hash(stored_hash, password):
+        return False, None
+    # Rehash no mesmo processo: a senha já está em memória e o worker já está ocupado
+    return True, generate_password_hash(password, method=method) if method else None
+
+
+class PasswordHasher:
+    """Gera e confere hashes num pool de processos com fila limitada"""
+
+    def __init__(self, method: str = HASH_METHOD, workers: int = HASH_WORKERS, timeout: float = HASH_TIMEOUT):
+        self.method = method
+        self.workers = max(0, workers)
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(max(1, self.workers) * MAX_PENDING_PER_WORKER)
+        self._lock = threading.Lock()
+        self._method_prefix: Optional[str] = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context(START_METHOD)
+                )
+            return self._executor
+
+    def _run(self, fn, *args):
+        if self.workers == 0:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            logger.warning("Fila de hashing de senhas cheia; requisição recusada")
+            raise HashingBusyError('Fila de hashing de senhas cheia')
+        try:
+            return self._pool().submit(fn, *args).result(timeout=self.timeout)
+        finally:
+            self._slots.release()
+
+    @property
+    def method_prefix(self) -> str:
+        """Método como o werkzeug grava no hash (parâmetros padrão explícitos)"""
+        if self._method_prefix is None:
+            self._method_prefix = self._run(_hash, '', self.method).split('$', 1)[0]
+        return self._method_prefix
+
+    def needs_rehash(self, stored_hash: str) -> bool:
+        return stored_hash.split('$', 1)[0] != self.method_prefix
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash, password, self.method)
+
+    def verify(self, stored_hash: str, password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Confere a senha; retorna (válida, novo hash)
+
+        O novo hash só vem quando a senha confere e o hash gravado usa
+        outro método ou custo; quem chama deve gravá-lo.
+        """
+        rehash_method = self.method if self.needs_rehash(stored_hash) else None
+        return self._run(_verify, stored_hash, password, rehash_method)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,329 @@
+"""
+Seleção de imóveis para um portfólio sob orçamento
+
+Problema da mochila: cada imóvel consome capital próprio (entrada +
+documentação, pelo perfil de financiamento) e rende um lucro esperado no
+horizonte de investimento; escolhe-se o subconjunto de maior lucro que
+cabe no orçamento, respeitando limites por cidade, por tipo e um desconto
+mínimo. Relistagens do mesmo imóvel físico (``cluster_id``) contam como
+um grupo de limite 1.
+
+Resolve por branch-and-bound em profundidade, com os itens ordenados por
+lucro/capital e limite superior da relaxação fracionária calculado por
+busca binária nas somas acumuladas. Uma solução gulosa serve de ponto de
+partida; se o limite de nós for atingido, retorna a melhor encontrada com
+``optimal = False``.
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.models.user import db
+from src.models.imovel import Imovel
+from src.services.cashflow_engine import outstanding_balance
+from src.services.geo_service import normalize_place
+from src.services.listing_financials import FINANCING_PROFILES, LOAN_TERM, compute_profile_metrics
+from src.services.market_rates import market_rates
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE = 'caixa_sac_20'
+DEFAULT_HORIZON_MONTHS = 12
+MAX_NODES = 2_000_000
+MAX_CANDIDATES = 50_000
+_EPSILON = 1e-6
+
+
+@dataclass
+class PortfolioConstraints:
+    """Orçamento, termos de financiamento e restrições do portfólio"""
+    budget: float
+    profile: str = DEFAULT_PROFILE
+    interest_rate: Optional[float] = None  # sobrepõe a taxa do perfil
+    down_payment_pct: Optional[float] = None  # sobrepõe a entrada do perfil
+    horizon_months: int = DEFAULT_HORIZON_MONTHS
+    max_per_city: Optional[int] = None
+    max_per_type: Optional[int] = None
+    max_properties: Optional[int] = None
+    min_discount: float = 0.0
+    ufs: List[str] = field(default_factory=list)
+    cidades: List[str] = field(default_factory=list)
+    tipos: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'PortfolioConstraints':
+        def optional_int(name):
+            return int(data[name]) if data.get(name) is not None else None
+
+        def optional_float(name):
+            return float(data[name]) if data.get(name) is not None else None
+
+        profile = data.get('profile', DEFAULT_PROFILE)
+        if profile not in {p['profile'] for p in FINANCING_PROFILES}:
+            raise ValueError(f"Perfil de financiamento desconhecido: {profile}")
+        budget = float(data['budget'])
+        if budget <= 0:
+            raise ValueError('budget deve ser positivo')
+        return cls(
+            budget=budget,
+            profile=profile,
+            interest_rate=optional_float('interest_rate'),
+            down_payment_pct=optional_float('down_payment_pct'),
+            horizon_months=int(data.get('horizon_months', DEFAULT_HORIZON_MONTHS)),
+            max_per_city=optional_int('max_per_city'),
+            max_per_type=optional_int('max_per_type'),
+            max_properties=optional_int('max_properties'),
+            min_discount=float(data.get('min_discount', 0) or 0),
+            ufs=[uf.upper() for uf in data.get('ufs') or []],
+            cidades=list(data.get('cidades') or []),
+            tipos=list(data.get('tipos') or []),
+        )
+
+
+def expected_profit(prices, market_values, system: str, interest_rate: float, down_payment_pct: float,
+                    horizon_months: int, sale_cost_pct: float) -> Dict[str, np.ndarray]:
+    """
+    Capital próprio e lucro esperado de comprar financiado e vender no horizonte
+
+    Lucro = valor de avaliação - custos de venda - preço - documentação
+    - juros pagos no horizonte + aluguel do período. A amortização volta
+    na venda (quita-se só o saldo devedor), então não entra como custo.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    market_values = np.asarray(market_values, dtype=np.float64)
+    metrics = compute_profile_metrics(prices, system, interest_rate, down_payment_pct)
+    principal = metrics['principal']
+    monthly_rate = interest_rate / 100 / 12
+    h = float(horizon_months)
+
+    if system == 'sac':
+        interest_paid = principal * monthly_rate * (h - h * (h - 1) / (2 * LOAN_TERM))
+    else:
+        balance = outstanding_balance(principal, monthly_rate, metrics['first_payment'], h)
+        interest_paid = metrics['first_payment'] * h - (principal - balance)
+
+    profit = (market_values * (1 - sale_cost_pct / 100) - prices - metrics['documentation_costs']
+              - interest_paid + metrics['estimated_rent'] * h)
+    return {
+        'capital': metrics['total_initial_cost'],
+        'profit': profit,
+        'interest_paid': interest_paid,
+        'first_payment': metrics['first_payment'],
+    }
+
+
+def _group_ids(values: Iterable) -> np.ndarray:
+    _, ids = np.unique(np.array([str(v) for v in values], dtype=object), return_inverse=True)
+    return ids.astype(np.int64)
+
+
+def solve_knapsack(weights: np.ndarray, profits: np.ndarray, capacity: float,
+                   groups: Optional[List[np.ndarray]] = None, limits: Optional[List[int]] = None,
+                   max_items: Optional[int] = None, max_nodes: int = MAX_NODES) -> Dict[str, Any]:
+    """
+    Mochila 0-1 com limites de quantidade por grupo
+
+    ``groups[g][i]`` é o grupo do item i na dimensão g (cidade, tipo...),
+    com no máximo ``limits[g]`` itens escolhidos por grupo. Retorna os
+    índices escolhidos, o lucro total, os nós visitados e se a busca
+    terminou (solução ótima).
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    profits = np.asarray(profits, dtype=np.float64)
+    groups = groups or []
+    limits = limits or []
+
+    # Só itens com lucro positivo que cabem sozinhos podem melhorar a solução
+    candidates = np.flatnonzero((profits > 0) & (weights <= capacity))
+    if max_items is not None:
+        groups = groups + [np.zeros(len(weights), dtype=np.int64)]
+        limits = limits + [max_items]
+    if len(candidates) == 0 or any(limit <= 0 for limit in limits):
+        return {'selected': [], 'profit': 0.0, 'nodes': 0, 'optimal': True}
+
+    ratio = profits[candidates] / np.maximum(weights[candidates], _EPSILON)
+    order = candidates[np.argsort(-ratio, kind='stable')]
+    w = weights[order]
+    p = profits[order]
+    item_groups = [g[order] for g in groups]
+    counts = [np.zeros(int(g.max()) + 1, dtype=np.int64) for g in item_groups]
+    n = len(order)
+    cum_w = np.concatenate(([0.0], np.cumsum(w)))
+    cum_p = np.concatenate(([0.0], np.cumsum(p)))
+
+    def fits(k: int) -> bool:
+        return all(count[g[k]] < limit for count, g, limit in zip(counts, item_groups, limits))
+
+    def take(k: int, delta: int) -> None:
+        for count, g in zip(counts, item_groups):
+            count[g[k]] += delta
+
+    def bound(k: int, cap: float, profit: float) -> float:
+        # Relaxação fracionária dos itens k.. (ignora os limites por grupo)
+        j = int(np.searchsorted(cum_w, cum_w[k] + cap + _EPSILON, side='right')) - 1
+        value = profit + cum_p[j] - cum_p[k]
+        if j < n:
+            value += (cap - (cum_w[j] - cum_w[k])) * p[j] / w[j]
+        return value
+
+    # Solução gulosa inicial
+    best_set: List[int] = []
+    remaining = capacity
+    for k in range(n):
+        if w[k] <= remaining and fits(k):
+            best_set.append(k)
+            remaining -= w[k]
+            take(k, 1)
+    best_profit = float(p[best_set].sum()) if best_set else 0.0
+    for count in counts:
+        count[:] = 0
+
+    chosen: List[int] = []
+    nodes = 0
+    complete = True
+    stack: List[tuple] = [('visit', 0, capacity, 0.0)]
+    while stack:
+        entry = stack.pop()
+        if entry[0] == 'undo':
+            chosen.pop()
+            take(entry[1], -1)
+            continue
+        _, k, cap, profit = entry
+        nodes += 1
+        if profit > best_profit + _EPSILON:
+            best_profit, best_set = profit, list(chosen)
+        if k == n:
+            continue
+        if nodes >= max_nodes:
+            complete = False
+            break
+        if bound(k, cap, profit) <= best_profit + _EPSILON:
+            continue
+        stack.append(('visit', k + 1, cap, profit))
+        if w[k] <= cap and fits(k):
+            chosen.append(k)
+            take(k, 1)
+            stack.append(('undo', k))
+            stack.append(('visit', k + 1, cap - w[k], profit + p[k]))
+
+    return {
+        'selected': sorted(int(order[k]) for k in best_set),
+        'profit': best_profit,
+        'nodes': nodes,
+        'optimal': complete,
+    }
+
+
+class PortfolioOptimizer:
+    """Escolhe, entre os imóveis carregados, o portfólio de maior lucro esperado"""
+
+    def _candidates(self, constraints: PortfolioConstraints,
+                    imovel_ids: Optional[List[int]]) -> Tuple[List[Dict[str, Any]], bool]:
+        """Candidatos em ordem de id (até ``MAX_CANDIDATES``) e se a lista foi truncada"""
+        query = db.session.query(
+            Imovel.id, Imovel.numero_imovel, Imovel.uf, Imovel.cidade, Imovel.bairro, Imovel.tipo_imovel,
+            Imovel.preco, Imovel.valor_avaliacao, Imovel.desconto, Imovel.cluster_id,
+        ).filter(
+            Imovel.preco > 0,
+            Imovel.valor_avaliacao > 0,
+            Imovel.aceita_financiamento.isnot(False),
+        )
+        if imovel_ids is not None:
+            query = query.filter(Imovel.id.in_(imovel_ids))
+        if constraints.ufs:
+            query = query.filter(Imovel.uf.in_(constraints.ufs))
+        if constraints.tipos:
+            query = query.filter(Imovel.tipo_imovel.in_(constraints.tipos))
+        if constraints.min_discount > 0:
+            query = query.filter(Imovel.desconto >= constraints.min_discount)
+        if constraints.cidades:
+            # Grafias gravadas que normalizam para as cidades pedidas; o filtro vai para o SQL,
+            # antes do limite de candidatos
+            wanted = {normalize_place(cidade) for cidade in constraints.cidades}
+            spellings = db.session.query(Imovel.cidade).distinct()
+            if constraints.ufs:
+                spellings = spellings.filter(Imovel.uf.in_(constraints.ufs))
+            query = query.filter(Imovel.cidade.in_(
+                [cidade for cidade, in spellings if normalize_place(cidade) in wanted]
+            ))
+        rows = [row._asdict() for row in query.order_by(Imovel.id).limit(MAX_CANDIDATES + 1).all()]
+        return rows[:MAX_CANDIDATES], len(rows) > MAX_CANDIDATES
+
+    def optimize(self, constraints: PortfolioConstraints,
+                 imovel_ids: Optional[List[int]] = None) -> Dict[str, Any]:
+        started = time.perf_counter()
+        rows, truncated = self._candidates(constraints, imovel_ids)
+
+        profile = next(p for p in FINANCING_PROFILES if p['profile'] == constraints.profile)
+        interest_rate = constraints.interest_rate
+        if interest_rate is None:
+            interest_rate = market_rates.financing_rate(profile['rate_key'])
+        down_payment_pct = constraints.down_payment_pct
+        if down_payment_pct is None:
+            down_payment_pct = profile['down_payment_pct']
+        sale_cost_pct = market_rates.current().get('viability', {}).get('corretagem_venda', 0.0)
+
+        metrics = expected_profit(
+            [row['preco'] for row in rows], [row['valor_avaliacao'] for row in rows],
+            profile['system'], interest_rate, down_payment_pct, constraints.horizon_months, sale_cost_pct,
+        )
+
+        groups = [_group_ids(row['cluster_id'] or row['id'] for row in rows)]
+        limits = [1]
+        if constraints.max_per_city is not None:
+            groups.append(_group_ids((row['uf'], normalize_place(row['cidade'])) for row in rows))
+            limits.append(constraints.max_per_city)
+        if constraints.max_per_type is not None:
+            groups.append(_group_ids(row['tipo_imovel'] or '' for row in rows))
+            limits.append(constraints.max_per_type)
+
+        solution = solve_knapsack(metrics['capital'], metrics['profit'], constraints.budget,
+                                  groups, limits, constraints.max_properties)
+
+        selected = []
+        for i in solution['selected']:
+            capital = float(metrics['capital'][i])
+            profit = float(metrics['profit'][i])
+            selected.append({
+                **{key: rows[i][key] for key in ('id', 'numero_imovel', 'uf', 'cidade', 'bairro',
+                                                 'tipo_imovel', 'preco', 'valor_avaliacao', 'desconto')},
+                'capital_required': round(capital, 2),
+                'expected_profit': round(profit, 2),
+                'expected_return_pct': round(profit / capital * 100, 2) if capital else None,
+                'first_payment': round(float(metrics['first_payment'][i]), 2),
+            })
+
+        capital_used = sum(item['capital_required'] for item in selected)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.info(
+            "Portfólio otimizado: %s de %s candidatos, %s nós, %.0f ms",
+            len(selected), len(rows), solution['nodes'], elapsed_ms,
+        )
+        return {
+            'selected': selected,
+            'summary': {
+                'candidates': len(rows),
+                'properties': len(selected),
+                'budget': constraints.budget,
+                'capital_used': round(capital_used, 2),
+                'capital_remaining': round(constraints.budget - capital_used, 2),
+                'expected_profit': round(solution['profit'], 2),
+                'expected_return_pct': round(solution['profit'] / capital_used * 100, 2) if capital_used else None,
+                'horizon_months': constraints.horizon_months,
+                'interest_rate': interest_rate,
+                'down_payment_pct': down_payment_pct,
+                'system': profile['system'],
+                # Com candidatos truncados, o ótimo vale só para os primeiros MAX_CANDIDATES
+                'optimal': solution['optimal'] and not truncated,
+                'truncated': truncated,
+                'nodes': solution['nodes'],
+                'elapsed_ms': round(elapsed_ms, 1),
+            },
+        }
+
+
+portfolio_optimizer = PortfolioOptimizer()
@@ -0,0 +1,80 @@
+"""
+Cache dos usuários autenticados (principals) por id
+
+``_token_required`` verifica a assinatura do JWT a cada requisição, mas o
+usuário correspondente vem deste cache em vez de uma consulta ao banco. As
+entradas expiram em poucos segundos e são removidas quando o usuário é
+alterado ou excluído pelas rotas de usuário; em vários processos, o TTL
+limita por quanto tempo outro worker pode ver dados antigos.
+
+No modo sem estado (``AUTH_STATELESS``) o usuário é montado só com as
+claims do token, sem cache nem banco.
+"""
+
+import os
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, Optional
+
+from src.models.user import db, User
+from src.services.cache import TTLCache
+
+PRINCIPAL_CACHE_TTL = float(os.environ.get('AUTH_PRINCIPAL_CACHE_TTL', 30))
+PRINCIPAL_CACHE_SIZE = int(os.environ.get('AUTH_PRINCIPAL_CACHE_SIZE', 10000))
+STATELESS = os.environ.get('AUTH_STATELESS', '').lower() in ('1', 'true', 'yes')
+
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    """Instantâneo imutável do usuário autenticado"""
+    id: int
+    username: str
+    email: str
+
+    @classmethod
+    def from_user(cls, user: User) -> 'UserPrincipal':
+        return cls(id=user.id, username=user.username, email=user.email)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def claims(self) -> Dict[str, Any]:
+        """Claims gravadas no token para o modo sem estado"""
+        return {'user_id': self.id, 'username': self.username, 'email': self.email}
+
+    def load(self) -> Optional[User]:
+        """Usuário do banco, para rotas que precisam alterá-lo"""
+        return db.session.get(User, self.id)
+
+
+class PrincipalCache:
+    """Resolve o usuário de um token já verificado"""
+
+    def __init__(self, ttl: float = PRINCIPAL_CACHE_TTL, maxsize: int = PRINCIPAL_CACHE_SIZE,
+                 stateless: bool = STATELESS, name: Optional[str] = None):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl, name=name)
+        self.stateless = stateless
+
+    def resolve(self, claims: Dict[str, Any]) -> Optional[UserPrincipal]:
+        user_id = claims.get('user_id')
+        if user_id is None:
+            return None
+        if self.stateless and claims.get('username') and claims.get('email'):
+            return UserPrincipal(id=int(user_id), username=claims['username'], email=claims['email'])
+
+        principal = self.cache.get(user_id)
+        if principal is None:
+            user = db.session.get(User, user_id)
+            if user is None:
+                return None
+            principal = UserPrincipal.from_user(user)
+            self.cache.set(user_id, principal)
+        return principal
+
+    def invalidate(self, user_id: int) -> None:
+        self.cache.pop(user_id)
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+
+principal_cache = PrincipalCache(name='principals')
@@ -0,0 +1,206 @@
+"""
+Profiling sob demanda de requisições em produção
+
+Uma requisição é perfilada quando traz ``X-Profile-Request`` com o token de
+administração (``PROFILING_ADMIN_TOKEN``) ou cai na amostra
+(``PROFILING_SAMPLE_RATE``). O tratamento inteiro da requisição roda sob
+cProfile. Em paralelo, uma thread amostra a pilha da thread da requisição
+a cada ``PROFILING_SAMPLE_INTERVAL_MS`` para gerar pilhas colapsadas
+(formato do flamegraph.pl / speedscope).
+
+Os arquivos ``.prof`` (pstats) e ``.collapsed`` ficam em ``PROFILING_DIR``,
+limitados aos ``PROFILING_MAX_FILES`` perfis mais recentes. Sem token nem
+amostragem configurados, ``init_app`` não instala nenhum hook.
+
+Só um perfil por processo roda por vez. Requisições simultâneas seguem sem
+profiling.
+"""
+
+import cProfile
+import hmac
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from flask import Flask, g, request
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.environ.get(
+    'PROFILING_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'profiles'),
+)
+ADMIN_TOKEN = os.environ.get('PROFILING_ADMIN_TOKEN', '')
+SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+SAMPLE_INTERVAL = float(os.environ.get('PROFILING_SAMPLE_INTERVAL_MS', 5)) / 1000
+COLLAPSED = os.environ.get('PROFILING_COLLAPSED', '1').lower() in ('1', 'true', 'yes')
+MAX_FILES = int(os.environ.get('PROFILING_MAX_FILES', 200))
+PROFILE_HEADER = 'X-Profile-Request'
+ADMIN_HEADER = 'X-Admin-Token'
+PROFILE_EXTENSIONS = ('.prof', '.collapsed')
+
+
+class _StackSampler(threading.Thread):
+    """Amostra a pilha de uma thread e conta as pilhas colapsadas"""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name='profiling-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+class _ActiveProfile:
+    def __init__(self, collapsed: bool, interval: float):
+        self.started = time.perf_counter()
+        self.profile = cProfile.Profile()
+        self.sampler = _StackSampler(threading.get_ident(), interval) if collapsed else None
+        if self.sampler is not None:
+            self.sampler.start()
+        self.profile.enable()
+
+    def stop(self) -> None:
+        self.profile.disable()
+        if self.sampler is not None:
+            self.sampler.stop()
+
+
+class RequestProfiler:
+    """Decide quais requisições perfilar e guarda os resultados"""
+
+    def __init__(self, directory: str = PROFILE_DIR, admin_token: str = ADMIN_TOKEN,
+                 sample_rate: float = SAMPLE_RATE, collapsed: bool = COLLAPSED,
+                 interval: float = SAMPLE_INTERVAL, max_files: int = MAX_FILES):
+        self.directory = directory
+        self.admin_token = admin_token
+        self.sample_rate = sample_rate
+        self.collapsed = collapsed
+        self.interval = interval
+        self.max_files = max_files
+        self._busy = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.admin_token) or self.sample_rate > 0
+
+    def authorized(self, token: Optional[str]) -> bool:
+        return bool(self.admin_token) and bool(token) and hmac.compare_digest(token, self.admin_token)
+
+    def should_profile(self, token: Optional[str]) -> bool:
+        if token is not None and self.authorized(token):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self) -> Optional[_ActiveProfile]:
+        if not self._busy.acquire(blocking=False):
+            return None
+        try:
+            return _ActiveProfile(self.collapsed, self.interval)
+        except Exception:
+            self._busy.release()
+            raise
+
+    def finish(self, active: _ActiveProfile, label: str) -> str:
+        """Para o profiling, grava os arquivos e devolve o nome base do perfil"""
+        try:
+            active.stop()
+        finally:
+            self._busy.release()
+        elapsed_ms = (time.perf_counter() - active.started) * 1000
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', label).strip('_')[:80] or 'request'
+        name = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%fZ')}-{int(elapsed_ms)}ms-{slug}"
+        os.makedirs(self.directory, exist_ok=True)
+        active.profile.dump_stats(os.path.join(self.directory, f'{name}.prof'))
+        if active.sampler is not None:
+            with open(os.path.join(self.directory, f'{name}.collapsed'), 'w', encoding='utf-8') as f:
+                for stack, count in active.sampler.stacks.most_common():
+                    f.write(f'{stack} {count}\n')
+        self._prune()
+        logger.info("Perfil gravado: %s (%.1f ms)", name, elapsed_ms)
+        return name
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(PROFILE_EXTENSIONS):
+                stat = entry.stat()
+                profiles.append({
+                    'name': entry.name,
+                    'size': stat.st_size,
+                    'created_at': datetime.utcfromtimestamp(stat.st_mtime).isoformat(),
+                })
+        return sorted(profiles, key=lambda p: p['name'], reverse=True)
+
+    def _prune(self) -> None:
+        names = sorted({os.path.splitext(p['name'])[0] for p in self.list_profiles()}, reverse=True)
+        for name in names[self.max_files:]:
+            for extension in PROFILE_EXTENSIONS:
+                try:
+                    os.remove(os.path.join(self.directory, name + extension))
+                except FileNotFoundError:
+                    pass
+
+
+profiler = RequestProfiler()
+
+
+def _before_request() -> None:
+    if profiler.should_profile(request.headers.get(PROFILE_HEADER)):
+        g._profile = profiler.start()
+
+
+def _finish() -> Optional[str]:
+    active = g.pop('_profile', None)
+    if active is None:
+        return None
+    rule = request.url_rule.rule if request.url_rule else request.path
+    try:
+        return profiler.finish(active, f'{request.method} {rule}')
+    except Exception as e:
+        logger.error("Falha ao gravar perfil: %s", e)
+        return None
+
+
+def _after_request(response):
+    name = _finish()
+    if name:
+        response.headers['X-Profile-Id'] = name
+    return response
+
+
+def _teardown_request(exc) -> None:
+    _finish()  # a resposta não passou por after_request
+
+
+def init_app(app: Flask) -> None:
+    """Instala os hooks de profiling só quando há token ou amostragem configurados"""
+    if not profiler.enabled:
+        return
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
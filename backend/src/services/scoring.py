@@ -0,0 +1,151 @@
+"""
+Score rápido de oportunidade (sem IA), individual e em lote
+
+As regras vêm do motor configurável (``scoring_rules``); aqui ficam a
+avaliação de um imóvel e o ranking do catálogo inteiro, que aplica as
+regras compiladas como operações vetorizadas em numpy.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from src.models.user import db
+from src.models.imovel import Imovel
+from src.services.geo_service import normalize_place
+from src.services.listing_financials import listing_financials_service
+from src.services.scoring_rules import Categorical, rule_engine
+
+logger = logging.getLogger(__name__)
+
+
+def quick_score(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Score de um imóvel com os fatores que o compõem"""
+    return rule_engine.current().evaluate(data)
+
+
+class _Snapshot:
+    """Colunas do catálogo em arrays numpy, com o score já calculado"""
+
+    def __init__(self):
+        rows = db.session.query(
+            Imovel.id, Imovel.uf, Imovel.cidade, Imovel.tipo_imovel, Imovel.preco,
+            Imovel.valor_avaliacao, Imovel.area_total, Imovel.aceita_financiamento,
+            Imovel.status_ocupacao,
+        ).all()
+        columns = list(zip(*rows)) if rows else [()] * 9
+
+        self.ids = np.array(columns[0], dtype=np.int64)
+        self.uf = np.array([u or '' for u in columns[1]], dtype=object)
+        cidades = np.array([normalize_place(c) for c in columns[2]], dtype=object)
+        self.tipo = np.array([t or '' for t in columns[3]], dtype=object)
+        self.preco = np.array([p or 0.0 for p in columns[4]], dtype=np.float64)
+        valor_avaliacao = np.array([v or 0.0 for v in columns[5]], dtype=np.float64)
+        area = np.array([a or 0.0 for a in columns[6]], dtype=np.float64)
+        aceita_financiamento = np.array([bool(a) for a in columns[7]], dtype=bool)
+        situacao_ocupacao = np.array([s or '' for s in columns[8]], dtype=object)
+
+        # Cidades como categorias: regras de localização rodam uma vez por cidade
+        cidade = Categorical.from_values(cidades)
+        self.cidades, self.cidade_codes = cidade.categories, cidade.codes
+
+        self.rules = rule_engine.current()
+        self.aceita_financiamento = aceita_financiamento
+        self.score = self.rules.score_batch({
+            'valor_avaliacao': valor_avaliacao,
+            'valor_venda': self.preco,
+            'aceita_financiamento': aceita_financiamento,
+            'situacao_ocupacao': situacao_ocupacao,
+            'area_total': area,
+            'cidade': cidade,
+        })
+        self.built_at = time.monotonic()
+
+
+class RankingEngine:
+    """Top-N do catálogo por score, com filtros"""
+
+    def __init__(self, ttl: float = 600):
+        self.ttl = ttl
+        self._snapshot: Optional[_Snapshot] = None
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        """Descarta as colunas em memória (chamado após cada carga)"""
+        self._snapshot = None
+
+    def _is_stale(self, snapshot: Optional[_Snapshot]) -> bool:
+        return (snapshot is None
+                or time.monotonic() - snapshot.built_at > self.ttl
+                or snapshot.rules is not rule_engine.current())
+
+    def _get_snapshot(self) -> _Snapshot:
+        snapshot = self._snapshot
+        if self._is_stale(snapshot):
+            with self._lock:
+                snapshot = self._snapshot
+                if self._is_stale(snapshot):
+                    snapshot = _Snapshot()
+                    self._snapshot = snapshot
+        return snapshot
+
+    def rank(self, uf: Optional[str] = None, cidade: Optional[str] = None,
+             tipo_imovel: Optional[str] = None, min_price: Optional[float] = None,
+             max_price: Optional[float] = None, aceita_financiamento: Optional[bool] = None,
+             limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Retorna os ``limit`` imóveis de maior score que atendem aos filtros
+
+        Empates são desempatados pelo menor preço.
+        """
+        snap = self._get_snapshot()
+        mask = np.ones(len(snap.ids), dtype=bool)
+        if uf:
+            mask &= snap.uf == uf.strip().upper()
+        if cidade:
+            code = np.searchsorted(snap.cidades, normalize_place(cidade))
+            if code >= len(snap.cidades) or snap.cidades[code] != normalize_place(cidade):
+                return []
+            mask &= snap.cidade_codes == code
+        if tipo_imovel:
+            mask &= snap.tipo == tipo_imovel
+        if min_price is not None:
+            mask &= snap.preco >= min_price
+        if max_price is not None:
+            mask &= (snap.preco > 0) & (snap.preco <= max_price)
+        if aceita_financiamento is not None:
+            mask &= snap.aceita_financiamento == bool(aceita_financiamento)
+
+        candidates = np.flatnonzero(mask)
+        if not len(candidates):
+            return []
+
+        if len(candidates) > limit:
+            top = np.argpartition(-snap.score[candidates], limit - 1)[:limit]
+            # Inclui empatados com o último selecionado para o desempate por preço ser estável
+            threshold = snap.score[candidates[top]].min()
+            candidates = candidates[snap.score[candidates] >= threshold]
+        order = np.lexsort((snap.preco[candidates], -snap.score[candidates]))
+        selected = candidates[order][:limit]
+
+        scores = {int(snap.ids[i]): int(snap.score[i]) for i in selected}
+        imoveis = {imovel.id: imovel for imovel in Imovel.query.filter(Imovel.id.in_(list(scores))).all()}
+        financials = listing_financials_service.for_listings(list(scores))
+
+        results = []
+        for imovel_id, score in scores.items():
+            imovel = imoveis.get(imovel_id)
+            if imovel is None:
+                continue
+            classification, recommendation = snap.rules.classify(score)
+            item = imovel.to_dict()
+            item.update({'score': score, 'classification': classification, 'recommendation': recommendation,
+                         'rules_version': snap.rules.version, 'financials': financials.get(imovel_id, {})})
+            results.append(item)
+        return results
+
+
+ranking_engine = RankingEngine()
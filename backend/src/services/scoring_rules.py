@@ -0,0 +1,312 @@
+"""
+Motor de regras do score rápido
+
+As regras (faixas, pesos e classificações) ficam em um arquivo JSON
+(``src/data/scoring_rules.json`` ou ``SCORING_RULES_PATH``) e são
+compiladas uma única vez em tabelas de decisão: limiares ordenados e
+vetores de pontos. O mesmo objeto compilado avalia um imóvel ou colunas
+numpy inteiras. Alterações no arquivo são recarregadas automaticamente.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from src.services.geo_service import normalize_place
+
+logger = logging.getLogger(__name__)
+
+RULES_PATH = os.environ.get(
+    'SCORING_RULES_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'scoring_rules.json'),
+)
+
+RELOAD_CHECK_INTERVAL = 2.0  # segundos entre verificações do arquivo
+
+
+class Categorical:
+    """Coluna categórica: valores distintos + código de cada linha"""
+
+    def __init__(self, categories: np.ndarray, codes: np.ndarray):
+        self.categories = categories
+        self.codes = codes
+
+    @classmethod
+    def from_values(cls, values) -> 'Categorical':
+        values = np.asarray(values, dtype=object)
+        if not len(values):
+            return cls(np.array([], dtype=object), np.array([], dtype=np.int64))
+        categories, codes = np.unique(values, return_inverse=True)
+        return cls(categories, codes)
+
+
+def _as_float(value) -> float:
+    try:
+        return float(value) if value is not None else math.nan
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _format(label: str, value) -> str:
+    return label.format(value=value)
+
+
+class _BandsFactor:
+    """Faixas por valor mínimo, com piso opcional abaixo da menor faixa"""
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.name = spec['name']
+        self.field = spec['field']
+        bands = sorted(spec['bands'], key=lambda band: band['min'])
+        if not bands:
+            raise ValueError(f"Fator {self.name}: 'bands' vazio")
+        floor = spec.get('floor')
+
+        self.thresholds = np.array([band['min'] for band in bands], dtype=np.float64)
+        self.labels = [band['label'] for band in bands]
+        self.floor_points = floor['points'] if floor else 0
+        self.floor_label = floor.get('label') if floor else None
+        self.floor_above = floor.get('above') if floor else None
+        # índice 0 = abaixo de todas as faixas (piso)
+        self.points = np.array([self.floor_points] + [band['points'] for band in bands], dtype=np.int64)
+        self.max_points = int(self.points.max())
+
+    def scalar(self, record: Dict[str, Any]) -> Tuple[int, Optional[str]]:
+        raw = record.get(self.field)
+        value = _as_float(raw)
+        if math.isnan(value):
+            return 0, None
+        index = int(np.searchsorted(self.thresholds, value, side='right'))
+        if index > 0:
+            return int(self.points[index]), _format(self.labels[index - 1], raw)
+        if self.floor_above is not None and not value > self.floor_above:
+            return 0, None
+        if self.floor_label is None:
+            return self.floor_points, None
+        return self.floor_points, _format(self.floor_label, raw)
+
+    def batch(self, columns: Dict[str, Any]) -> np.ndarray:
+        values = np.asarray(columns[self.field], dtype=np.float64)
+        points = self.points[np.searchsorted(self.thresholds, values, side='right')]
+        below = np.isnan(values)
+        if self.floor_above is not None:
+            with np.errstate(invalid='ignore'):
+                below |= ~(values > self.floor_above) & (values < self.thresholds[0])
+        return np.where(below, 0, points)
+
+
+class _FlagFactor:
+    """Pontos quando o campo é verdadeiro (ou igual a ``equals``)"""
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.name = spec['name']
+        self.field = spec['field']
+        self.equals = spec.get('equals')
+        self.points_true = spec['points']
+        self.points_false = spec.get('points_false', 0)
+        self.label = spec.get('label')
+        self.label_false = spec.get('label_false')
+        self.max_points = max(self.points_true, self.points_false)
+
+    def _matches(self, value) -> bool:
+        return value == self.equals if self.equals is not None else bool(value)
+
+    def scalar(self, record: Dict[str, Any]) -> Tuple[int, Optional[str]]:
+        if self._matches(record.get(self.field)):
+            return self.points_true, self.label
+        return self.points_false, self.label_false
+
+    def batch(self, columns: Dict[str, Any]) -> np.ndarray:
+        values = np.asarray(columns[self.field])
+        matches = values == self.equals if self.equals is not None else values.astype(bool)
+        return np.where(matches, self.points_true, self.points_false)
+
+
+class _MembershipFactor:
+    """Pontos quando o valor normalizado pertence a um conjunto"""
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.name = spec['name']
+        self.field = spec['field']
+        self.values = frozenset(normalize_place(v) for v in spec['values'])
+        self.points_true = spec['points']
+        self.points_false = spec.get('points_false', 0)
+        self.label = spec.get('label')
+        self.label_false = spec.get('label_false')
+        self.max_points = max(self.points_true, self.points_false)
+
+    def contains(self, value) -> bool:
+        return normalize_place(value) in self.values
+
+    def scalar(self, record: Dict[str, Any]) -> Tuple[int, Optional[str]]:
+        if self.contains(record.get(self.field)):
+            return self.points_true, self.label
+        return self.points_false, self.label_false
+
+    def batch(self, columns: Dict[str, Any]) -> np.ndarray:
+        column = columns[self.field]
+        if not isinstance(column, Categorical):
+            column = Categorical.from_values([normalize_place(v) for v in column])
+        # Uma checagem por categoria, depois um gather por linha
+        member = np.array([c in self.values for c in column.categories], dtype=bool)
+        points = np.where(member, self.points_true, self.points_false)
+        return points[column.codes] if len(member) else np.zeros(len(column.codes), dtype=np.int64)
+
+
+_FACTOR_TYPES = {
+    'bands': _BandsFactor,
+    'flag': _FlagFactor,
+    'membership': _MembershipFactor,
+}
+
+
+class CompiledRules:
+    """Conjunto de regras compilado, imutável após a construção"""
+
+    def __init__(self, definition: Dict[str, Any]):
+        self.definition = definition
+        self.version = str(definition.get('version', 'unversioned'))
+        self.max_score = definition.get('max_score', 100)
+        self.checksum = hashlib.sha1(json.dumps(definition, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+        self.factors = []
+        for spec in definition.get('factors', []):
+            factor_type = _FACTOR_TYPES.get(spec.get('type'))
+            if factor_type is None:
+                raise ValueError(f"Tipo de fator desconhecido: {spec.get('type')}")
+            self.factors.append(factor_type(spec))
+        if not self.factors:
+            raise ValueError("Nenhum fator definido nas regras de score")
+
+        classifications = sorted(definition.get('classifications', []), key=lambda c: c['min'])
+        default = definition.get('default_classification', {})
+        self._class_thresholds = np.array([c['min'] for c in classifications], dtype=np.float64)
+        self._class_labels = [(default.get('classification', ''), default.get('recommendation', ''))]
+        self._class_labels += [(c['classification'], c['recommendation']) for c in classifications]
+
+    @staticmethod
+    def prepare(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Adiciona campos derivados (desconto percentual) ao registro"""
+        record = dict(data)
+        valor_avaliacao = data.get('valor_avaliacao', 0) or 0
+        valor_venda = data.get('valor_venda', 0) or 0
+        record['desconto_percentual'] = (
+            (valor_avaliacao - valor_venda) / valor_avaliacao * 100 if valor_avaliacao > 0 else None
+        )
+        return record
+
+    def classify(self, score: float) -> Tuple[str, str]:
+        index = int(np.searchsorted(self._class_thresholds, score, side='right'))
+        return self._class_labels[index]
+
+    def evaluate(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Score de um imóvel, com os fatores aplicados"""
+        record = self.prepare(data)
+        score = 0
+        factors = []
+        for factor in self.factors:
+            points, label = factor.scalar(record)
+            score += points
+            if label:
+                factors.append(label)
+
+        score = min(self.max_score, score)
+        classification, recommendation = self.classify(score)
+        return {
+            'score': score,
+            'classification': classification,
+            'recommendation': recommendation,
+            'factors': factors,
+            'desconto_percentual': record['desconto_percentual'] or 0,
+            'rules_version': self.version,
+        }
+
+    def score_batch(self, columns: Dict[str, Any]) -> np.ndarray:
+        """
+        Score vetorizado; ``columns`` mapeia campo -> array (ou Categorical)
+
+        ``desconto_percentual`` é derivado de valor_avaliacao/valor_venda
+        quando não informado.
+        """
+        if 'desconto_percentual' not in columns:
+            valor_avaliacao = np.asarray(columns['valor_avaliacao'], dtype=np.float64)
+            valor_venda = np.asarray(columns['valor_venda'], dtype=np.float64)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                columns = dict(columns, desconto_percentual=np.where(
+                    valor_avaliacao > 0, (valor_avaliacao - valor_venda) / valor_avaliacao * 100, np.nan))
+
+        total = None
+        for factor in self.factors:
+            points = factor.batch(columns)
+            total = points if total is None else total + points
+        return np.minimum(total, self.max_score)
+
+    def describe(self) -> Dict[str, Any]:
+        return {'version': self.version, 'checksum': self.checksum, 'definition': self.definition}
+
+
+class RuleEngine:
+    """Carrega, compila e recarrega (hot reload) as regras do arquivo"""
+
+    def __init__(self, path: str = RULES_PATH, check_interval: float = RELOAD_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self.history: List[Dict[str, Any]] = []
+        self._rules: Optional[CompiledRules] = None
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self) -> CompiledRules:
+        """Regras em vigor; verifica o arquivo no máximo a cada ``check_interval``"""
+        now = time.monotonic()
+        if self._rules is None or now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                mtime = None
+            if self._rules is None or mtime != self._mtime:
+                self.reload()
+        return self._rules
+
+    def reload(self) -> CompiledRules:
+        """
+        Recompila as regras a partir do arquivo
+
+        Se o arquivo estiver inválido e já houver regras carregadas, mantém
+        a versão anterior e registra o erro.
+        """
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+                with open(self.path, encoding='utf-8') as handle:
+                    rules = CompiledRules(json.load(handle))
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                if self._rules is None:
+                    raise
+                logger.error("Regras de score inválidas em %s, mantendo versão %s: %s",
+                             self.path, self._rules.version, e)
+                return self._rules
+
+            if self._rules is None or rules.checksum != self._rules.checksum:
+                self.history.append({
+                    'version': rules.version,
+                    'checksum': rules.checksum,
+                    'loaded_at': datetime.utcnow().isoformat(),
+                })
+                logger.info("Regras de score carregadas: versão %s (%s)", rules.version, rules.checksum)
+            self._rules = rules
+            self._mtime = mtime
+            return rules
+
+
+rule_engine = RuleEngine()
@@ -0,0 +1,118 @@
+"""
+Serviço de busca textual sobre os imóveis
+
+No PostgreSQL usa tsvector com a configuração ``pt_unaccent`` (português +
+unaccent) e um índice GIN de expressão; no SQLite (testes) usa a tabela FTS5
+``imoveis_fts`` criada junto com o modelo.
+"""
+
+import re
+import logging
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import text
+
+from src.models.user import db
+from src.models.imovel import Imovel
+
+logger = logging.getLogger(__name__)
+
+# Precisa ser idêntica à expressão do índice ix_imoveis_search (migração)
+PG_SEARCH_VECTOR = (
+    "setweight(to_tsvector('pt_unaccent', coalesce(bairro, '')), 'A') || "
+    "setweight(to_tsvector('pt_unaccent', coalesce(endereco, '')), 'B') || "
+    "setweight(to_tsvector('pt_unaccent', coalesce(descricao, '')), 'C')"
+)
+
+MAX_LIMIT = 100
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class ListingSearchService:
+    """Busca ranqueada por descrição, bairro e endereço"""
+
+    def search(self, query: str, uf: Optional[str] = None, cidade: Optional[str] = None,
+               limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Executa a busca e retorna os imóveis ordenados por relevância
+
+        Args:
+            query: Texto livre, ex. "apartamento 2 qto(s) vaga Boa Viagem"
+            uf: Filtro opcional por UF
+            cidade: Filtro opcional por cidade
+            limit: Quantidade máxima de resultados (até MAX_LIMIT)
+            offset: Deslocamento para paginação
+
+        Returns:
+            Lista de imóveis serializados com o campo ``rank``
+        """
+        limit = max(1, min(int(limit), MAX_LIMIT))
+        offset = max(0, int(offset))
+
+        if db.session.get_bind().dialect.name == 'postgresql':
+            rows = self._search_postgres(query, uf, cidade, limit, offset)
+        else:
+            rows = self._search_sqlite(query, uf, cidade, limit, offset)
+
+        if not rows:
+            return []
+
+        ranks = {row.id: float(row.rank) for row in rows}
+        imoveis = Imovel.query.filter(Imovel.id.in_(list(ranks))).all()
+        imoveis.sort(key=lambda imovel: ranks[imovel.id], reverse=True)
+
+        results = []
+        for imovel in imoveis:
+            item = imovel.to_dict()
+            item['rank'] = round(ranks[imovel.id], 6)
+            results.append(item)
+        return results
+
+    def _search_postgres(self, query, uf, cidade, limit, offset):
+        filters, params = self._build_filters(uf, cidade)
+        params.update({'q': query, 'limit': limit, 'offset': offset})
+        sql = f"""
+            SELECT id, ts_rank_cd({PG_SEARCH_VECTOR}, q) AS rank
+            FROM imoveis, websearch_to_tsquery('pt_unaccent', :q) AS q
+            WHERE ({PG_SEARCH_VECTOR}) @@ q {filters}
+            ORDER BY rank DESC, id
+            LIMIT :limit OFFSET :offset
+        """
+        return db.session.execute(text(sql), params).all()
+
+    def _search_sqlite(self, query, uf, cidade, limit, offset):
+        match = self._build_fts5_match(query)
+        if not match:
+            return []
+
+        filters, params = self._build_filters(uf, cidade, prefix='imoveis.')
+        params.update({'q': match, 'limit': limit, 'offset': offset})
+        # bm25 é negativo (menor = mais relevante); invertido para manter
+        # a mesma semântica do ts_rank_cd
+        sql = f"""
+            SELECT imoveis.id AS id, -bm25(imoveis_fts, 10.0, 5.0, 1.0) AS rank
+            FROM imoveis_fts JOIN imoveis ON imoveis.id = imoveis_fts.rowid
+            WHERE imoveis_fts MATCH :q {filters}
+            ORDER BY rank DESC, imoveis.id
+            LIMIT :limit OFFSET :offset
+        """
+        return db.session.execute(text(sql), params).all()
+
+    @staticmethod
+    def _build_filters(uf, cidade, prefix=''):
+        filters = ''
+        params = {}
+        if uf:
+            filters += f' AND {prefix}uf = :uf'
+            params['uf'] = uf.strip().upper()
+        if cidade:
+            filters += f' AND lower({prefix}cidade) = :cidade'
+            params['cidade'] = cidade.strip().lower()
+        return filters, params
+
+    @staticmethod
+    def _build_fts5_match(query: str) -> str:
+        """Converte texto livre em uma expressão MATCH segura (AND implícito)"""
+        tokens = _TOKEN_RE.findall(query or '')
+        return ' '.join(f'"{token}"' for token in tokens)
@@ -0,0 +1,195 @@
+"""
+Logs estruturados em JSON, gravados fora da thread da requisição
+
+``configure_logging`` troca o ``basicConfig`` por um ``QueueHandler`` no
+logger raiz. Na thread da requisição, o handler só:
+- descarta parte dos logs de alto volume (``LOG_SAMPLE_RATES``, ex.:
+  ``INFO=0.1,DEBUG=0.01``); WARNING e acima nunca são amostrados;
+- anexa o contexto da requisição (request id, rota, método e usuário);
+- enfileira o registro.
+
+A mensagem (``%s`` com args), os tracebacks de ``logger.exception`` e o
+JSON são montados pelo ``QueueListener`` numa thread de fundo. Por isso os
+args devem ser valores que não mudam depois do log.
+
+``init_app`` adiciona um log de acesso por requisição (rota, status,
+latência) no logger ``src.access``. ``LOG_FORMAT=text`` usa linhas
+legíveis em desenvolvimento.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import time
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from flask import Flask, g, has_request_context, request
+
+from src.services.tracing import current_request_id
+
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json').lower()
+LOG_SAMPLE_RATES = os.environ.get('LOG_SAMPLE_RATES', '')
+ACCESS_LOG = os.environ.get('ACCESS_LOG', '1').lower() in ('1', 'true', 'yes')
+TEXT_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+access_logger = logging.getLogger('src.access')
+
+# Atributos padrão do LogRecord; o resto veio de ``extra`` e vai para o JSON
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def parse_sample_rates(spec: str) -> Dict[int, float]:
+    """``"INFO=0.1,DEBUG=0.01"`` -> {logging.INFO: 0.1, logging.DEBUG: 0.01}"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, rate = item.partition('=')
+        level = logging.getLevelName(name.strip().upper())
+        if not isinstance(level, int) or level >= logging.WARNING:
+            raise ValueError(f'LOG_SAMPLE_RATES: nível inválido para amostragem: {name}')
+        rates[level] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Mantém só uma fração dos registros de cada nível configurado"""
+
+    def __init__(self, rates: Dict[int, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(record.levelno)
+        if rate is None or rate >= 1.0 or getattr(record, 'log_always', False):
+            return True
+        if random.random() < rate:
+            record.sample_rate = rate  # cada registro mantido representa 1/rate
+            return True
+        return False
+
+
+class RequestContextFilter(logging.Filter):
+    """Copia o contexto da requisição para o registro (a thread de fundo não o vê)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = current_request_id()
+        if has_request_context():
+            record.route = request.url_rule.rule if request.url_rule else request.path
+            record.method = request.method
+            claims = g.get('token_claims')
+            if claims:
+                record.user_id = claims.get('user_id')
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Um objeto JSON por linha"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'timestamp': datetime.utcfromtimestamp(record.created).isoformat() + 'Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and value is not None:
+                payload[key] = value
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            payload['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    Enfileira o registro sem formatá-lo
+
+    O ``QueueHandler`` padrão formata mensagem e traceback antes de
+    enfileirar (para poder serializar entre processos). A fila aqui é do
+    próprio processo, então essa parte fica para o listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+_listener: Optional[QueueListener] = None
+_listener_running = False
+_handler: Optional[AsyncQueueHandler] = None
+
+
+def configure_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, sample_rates: str = LOG_SAMPLE_RATES,
+                      output: Optional[logging.Handler] = None) -> QueueListener:
+    """Instala o handler assíncrono no logger raiz (substitui uma configuração anterior)"""
+    global _listener, _handler
+    root = logging.getLogger()
+    _stop_listener()
+    if _handler is not None:
+        root.removeHandler(_handler)
+
+    if output is None:
+        output = logging.StreamHandler()
+    output.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+
+    log_queue: 'queue.SimpleQueue[logging.LogRecord]' = queue.SimpleQueue()
+    _handler = AsyncQueueHandler(log_queue)
+    _handler.addFilter(SamplingFilter(parse_sample_rates(sample_rates)))
+    _handler.addFilter(RequestContextFilter())
+    root.addHandler(_handler)
+    root.setLevel(level)
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _start_listener()
+    return _listener
+
+
+def flush_logs() -> None:
+    """Escreve os registros pendentes (a fila é drenada ao parar o listener)"""
+    if _listener is not None:
+        _stop_listener()
+        _start_listener()
+
+
+def _start_listener() -> None:
+    global _listener_running
+    _listener.start()
+    _listener_running = True
+
+
+@atexit.register
+def _stop_listener() -> None:
+    global _listener_running
+    if _listener is not None and _listener_running:  # stop() duas vezes falha
+        _listener.stop()
+        _listener_running = False
+
+
+def _before_request() -> None:
+    g._log_started = time.perf_counter()
+
+
+def _after_request(response):
+    started = g.get('_log_started')
+    if started is not None:
+        latency_ms = round((time.perf_counter() - started) * 1000, 3)
+        # Erros de servidor nunca são amostrados
+        level = logging.WARNING if response.status_code >= 500 else logging.INFO
+        if access_logger.isEnabledFor(level):
+            access_logger.log(level, '%s %s %s %.1fms', request.method, request.path, response.status_code,
+                              latency_ms, extra={'status': response.status_code, 'latency_ms': latency_ms})
+    return response
+
+
+def init_app(app: Flask) -> None:
+    """Instala o log de acesso (``ACCESS_LOG=0`` desliga)"""
+    if not ACCESS_LOG:
+        return
+    app.before_request(_before_request)
+    app.after_request(_after_request)
@@ -0,0 +1,155 @@
+"""
+Imposto de Renda sobre ganho de capital na venda de imóveis (pessoa física)
+
+Regras da Receita Federal aplicadas:
+- alíquotas progressivas por faixa de ganho (Lei 13.259/2016): 15% até
+  R$ 5 milhões, 17,5% até R$ 10 milhões, 20% até R$ 30 milhões e 22,5%
+  acima;
+- percentual de redução para imóveis adquiridos até 1988 (Lei 7.713/88,
+  art. 18) e fatores de redução FR1/FR2 (Lei 11.196/2005, art. 40);
+- isenções: único imóvel vendido por até R$ 440 mil (Lei 9.250/95,
+  art. 23), bens de pequeno valor até R$ 35 mil e reinvestimento em imóvel
+  residencial em 180 dias, proporcional ao valor reinvestido (Lei
+  11.196/2005, art. 39).
+
+O cálculo é vetorizado (arrays numpy de ganhos, preços e prazos) para
+simulações em lote; ``capital_gains_tax`` calcula um caso com cache.
+"""
+
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+from src.services.cache import TTLCache
+
+# Faixas progressivas: limite inferior de cada faixa e alíquota marginal
+BRACKET_THRESHOLDS = np.array([0.0, 5_000_000.0, 10_000_000.0, 30_000_000.0])
+BRACKET_RATES = np.array([0.15, 0.175, 0.20, 0.225])
+# Imposto acumulado no início de cada faixa
+_BRACKET_BASE_TAX = np.concatenate(([0.0], np.cumsum(np.diff(BRACKET_THRESHOLDS) * BRACKET_RATES[:-1])))
+
+SINGLE_PROPERTY_EXEMPTION_LIMIT = 440_000.0
+SMALL_VALUE_EXEMPTION_LIMIT = 35_000.0
+
+FR1_MONTHLY = 1.0060  # até novembro de 2005
+FR2_MONTHLY = 1.0035  # a partir de dezembro de 2005
+
+tax_cache = TTLCache(maxsize=8192, ttl=3600, name='tax')
+
+
+@dataclass(frozen=True)
+class TaxProfile:
+    """Situação do vendedor que define as isenções aplicáveis"""
+    only_property: bool = False  # único imóvel do vendedor
+    sold_property_last_5_years: bool = False  # já vendeu imóvel nos últimos 5 anos
+    residential: bool = True
+    reinvest_fraction: float = 0.0  # parcela do valor de venda reinvestida em 180 dias (0 a 1)
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> 'TaxProfile':
+        data = data or {}
+        return cls(
+            only_property=bool(data.get('only_property', False)),
+            sold_property_last_5_years=bool(data.get('sold_property_last_5_years', False)),
+            residential=bool(data.get('residential', True)),
+            reinvest_fraction=min(1.0, max(0.0, float(data.get('reinvest_fraction', 0.0)))),
+        )
+
+
+def progressive_tax(taxable_gain) -> np.ndarray:
+    """Imposto pelas faixas progressivas (consulta vetorizada à tabela)"""
+    taxable_gain = np.maximum(np.asarray(taxable_gain, dtype=np.float64), 0.0)
+    bracket = np.searchsorted(BRACKET_THRESHOLDS, taxable_gain, side='right') - 1
+    return _BRACKET_BASE_TAX[bracket] + (taxable_gain - BRACKET_THRESHOLDS[bracket]) * BRACKET_RATES[bracket]
+
+
+def reduction_factors(holding_months, acquisition_year=None) -> Dict[str, np.ndarray]:
+    """
+    Percentual de redução (aquisição até 1988) e fatores FR1 x FR2
+
+    Sem ``acquisition_year`` o imóvel é considerado adquirido após 2005 e
+    só o FR2 se aplica, sobre todo o prazo de posse.
+    """
+    holding_months = np.maximum(np.asarray(holding_months, dtype=np.float64), 0.0)
+    if acquisition_year is None:
+        pre_1989 = np.zeros_like(holding_months)
+        m1 = np.zeros_like(holding_months)
+        m2 = holding_months
+    else:
+        year = np.broadcast_to(np.asarray(acquisition_year, dtype=np.float64), holding_months.shape)
+        pre_1989 = np.clip((1989 - year) * 5, 0, 100) / 100
+        # FR1: de janeiro/1996 (ou de janeiro do ano da aquisição) até novembro/2005, inclusive;
+        # índice de novembro/2005 menos o de janeiro do início, mais 1 (1996 -> 119 meses)
+        m1 = np.where(year <= 2005, (2005 - np.maximum(year, 1996)) * 12 + 11, 0)
+        m1 = np.minimum(m1, holding_months)
+        m2 = holding_months - m1
+    factor = (1 - pre_1989) * FR1_MONTHLY ** -m1 * FR2_MONTHLY ** -m2
+    return {'pre_1989_reduction': pre_1989, 'factor': factor}
+
+
+def compute_capital_gains(gain, sale_price, holding_months, profile: TaxProfile = TaxProfile(),
+                          acquisition_year=None) -> Dict[str, np.ndarray]:
+    """
+    Imposto sobre ganho de capital para arrays de vendas simuladas
+
+    Returns:
+        Dict de arrays: gain, taxable_gain, reduction_factor, exempt, tax,
+        effective_rate (imposto / ganho, em %)
+    """
+    gain = np.asarray(gain, dtype=np.float64)
+    sale_price = np.broadcast_to(np.asarray(sale_price, dtype=np.float64), gain.shape)
+    holding_months = np.broadcast_to(np.asarray(holding_months, dtype=np.float64), gain.shape)
+
+    factor = reduction_factors(holding_months, acquisition_year)['factor']
+    taxable = np.maximum(gain, 0.0) * factor
+
+    can_use_exemptions = not profile.sold_property_last_5_years
+    if profile.residential and can_use_exemptions and profile.reinvest_fraction > 0:
+        taxable = taxable * (1 - profile.reinvest_fraction)
+
+    exempt = sale_price <= SMALL_VALUE_EXEMPTION_LIMIT
+    if profile.only_property and can_use_exemptions:
+        exempt = exempt | (sale_price <= SINGLE_PROPERTY_EXEMPTION_LIMIT)
+    taxable = np.where(exempt, 0.0, taxable)
+
+    tax = progressive_tax(taxable)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        effective_rate = np.where(gain > 0, tax / gain * 100, 0.0)
+    return {
+        'gain': gain,
+        'taxable_gain': taxable,
+        'reduction_factor': factor,
+        'exempt': exempt | (taxable <= 0) & (gain > 0),
+        'tax': tax,
+        'effective_rate': effective_rate,
+    }
+
+
+def capital_gains_tax(gain: float, sale_price: float, holding_months: int,
+                      profile: TaxProfile = TaxProfile(), acquisition_year: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Imposto de uma venda, com cache por (ganho, prazo, perfil)
+
+    O preço de venda só influencia as isenções por limite de valor, então
+    entra na chave apenas como as faixas de isenção em que se enquadra.
+    """
+    key = (
+        round(float(gain), 2), int(holding_months), profile, acquisition_year,
+        sale_price <= SMALL_VALUE_EXEMPTION_LIMIT, sale_price <= SINGLE_PROPERTY_EXEMPTION_LIMIT,
+    )
+
+    def compute():
+        result = compute_capital_gains(np.array([gain]), np.array([sale_price]), np.array([holding_months]),
+                                       profile, acquisition_year)
+        return {
+            'gain': float(result['gain'][0]),
+            'taxable_gain': round(float(result['taxable_gain'][0]), 2),
+            'reduction_factor': round(float(result['reduction_factor'][0]), 6),
+            'exempt': bool(result['exempt'][0]),
+            'tax': round(float(result['tax'][0]), 2),
+            'effective_rate': round(float(result['effective_rate'][0]), 2),
+            'profile': asdict(profile),
+        }
+
+    return dict(tax_cache.get_or_set(key, compute))
@@ -0,0 +1,115 @@
+"""
+Lista de tokens revogados com consulta O(1) em memória
+
+Os jtis revogados ficam num dicionário (jti -> expiração) por processo. A
+tabela ``revoked_tokens`` é a fonte compartilhada entre workers: a cada
+``SYNC_INTERVAL`` segundos o processo relê as linhas com ``revoked_at``
+desde a sincronização anterior, menos ``SYNC_MARGIN`` segundos. A margem
+cobre a demora entre gravar ``revoked_at`` e o commit, além da diferença
+de relógio entre servidores. Não dá para usar o id: no PostgreSQL a
+sequência é consumida antes do commit, e uma linha com id menor pode
+aparecer depois de outra maior já lida. Entradas vencidas saem da memória
+(e da tabela, em ``purge_expired``), já que o próprio JWT expirado é
+rejeitado.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from src.models.user import db
+from src.models.revoked_token import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+SYNC_INTERVAL = float(os.environ.get('TOKEN_REVOCATION_SYNC_INTERVAL', 5))
+SYNC_MARGIN = timedelta(seconds=float(os.environ.get('TOKEN_REVOCATION_SYNC_MARGIN', 60)))
+
+
+class RevocationList:
+    """jtis revogados, sincronizados incrementalmente com o banco"""
+
+    def __init__(self, sync_interval: float = SYNC_INTERVAL):
+        self.sync_interval = sync_interval
+        self._revoked: Dict[str, datetime] = {}
+        self._synced_since: Optional[datetime] = None
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+
+    def _sync(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._synced_at < self.sync_interval:
+            return
+        with self._lock:
+            if not force and now - self._synced_at < self.sync_interval:
+                return
+            started = datetime.utcnow()
+            query = db.session.query(RevokedToken.jti, RevokedToken.expires_at).filter(
+                RevokedToken.expires_at > started,
+            )
+            if self._synced_since is not None:
+                query = query.filter(RevokedToken.revoked_at >= self._synced_since - SYNC_MARGIN)
+            for jti, expires_at in query.all():
+                self._revoked[jti] = expires_at
+            self._prune(started)
+            self._synced_since = started
+            self._synced_at = now
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        if not jti:
+            return False
+        self._sync()
+        return jti in self._revoked
+
+    def revoke(self, jti: str, expires_at: datetime, token_type: str, user_id: Optional[int] = None) -> bool:
+        """
+        Revoga o token e torna a revogação visível aos outros processos
+
+        Retorna True só se esta chamada gravou a revogação; False se o jti
+        já estava revogado (aqui ou por outro processo). A restrição única
+        do banco decide a corrida, então só um chamador recebe True.
+        """
+        if not jti or jti in self._revoked:
+            return False
+        db.session.add(RevokedToken(jti=jti, user_id=user_id, token_type=token_type, expires_at=expires_at))
+        try:
+            db.session.commit()
+            inserted = True
+        except IntegrityError:
+            db.session.rollback()  # já revogado por outro processo
+            inserted = False
+        self._revoked[jti] = expires_at
+        return inserted
+
+    def _prune(self, now: datetime) -> None:
+        """Tira da memória os jtis vencidos (chamado com o lock)"""
+        for jti in [jti for jti, expires_at in self._revoked.items() if expires_at <= now]:
+            del self._revoked[jti]
+
+    def purge_expired(self) -> int:
+        """Remove revogações de tokens já vencidos (memória e banco)"""
+        now = datetime.utcnow()
+        with self._lock:
+            self._prune(now)
+        deleted = RevokedToken.query.filter(RevokedToken.expires_at <= now).delete(synchronize_session=False)
+        db.session.commit()
+        logger.info("Revogações vencidas removidas: %s", deleted)
+        return deleted
+
+    def clear(self) -> None:
+        """Esquece o estado em memória (o próximo acesso relê a tabela)"""
+        with self._lock:
+            self._revoked.clear()
+            self._synced_since = None
+            self._synced_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+
+revocation_list = RevocationList()
@@ -0,0 +1,376 @@
+"""
+Tracing leve de requisições: spans de rotas, serviços e consultas SQL
+
+Cada requisição amostrada (``TRACING_SAMPLE_RATE``, de 0 a 1) vira um
+trace com um span raiz e spans filhos para a leitura do JSON, os métodos
+dos serviços decorados com ``trace_methods`` e cada consulta SQL. Quando
+a requisição não é amostrada, os pontos de instrumentação só consultam uma
+``ContextVar`` e seguem direto.
+
+Toda resposta leva ``X-Request-ID``: o recebido do cliente ou um novo. As
+requisições amostradas também levam ``X-Trace-ID``.
+
+Ao terminar, o trace é exportado numa thread de fundo:
+- em JSON lines no arquivo ``TRACING_EXPORT_PATH`` (padrão);
+- ou em OTLP/HTTP JSON para ``TRACING_OTLP_ENDPOINT``, por exemplo um
+  coletor local em ``http://localhost:4318/v1/traces``.
+"""
+
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Dict, Iterator, List, Optional
+
+from flask import Flask, Request, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = float(os.environ.get('TRACING_SAMPLE_RATE', 0))
+EXPORT_PATH = os.environ.get(
+    'TRACING_EXPORT_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'traces', 'spans.jsonl'),
+)
+OTLP_ENDPOINT = os.environ.get('TRACING_OTLP_ENDPOINT')
+MAX_SPANS_PER_TRACE = int(os.environ.get('TRACING_MAX_SPANS', 1000))
+EXPORT_QUEUE_SIZE = 1000
+SQL_STATEMENT_MAX_CHARS = 300
+REQUEST_ID_HEADER = 'X-Request-ID'
+SERVICE_NAME = 'imoveis-backend'
+
+
+class Span:
+    """Trecho cronometrado de um trace"""
+
+    __slots__ = ('trace', 'name', 'span_id', 'parent', 'attributes', 'start', 'started', 'duration', 'error')
+
+    def __init__(self, trace: '_Trace', name: str, parent: Optional['Span'], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent = parent
+        self.attributes = attributes
+        self.start = time.time()
+        self.started = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        self.duration = time.perf_counter() - self.started
+        if error is not None:
+            self.error = f'{type(error).__name__}: {error}'
+        self.trace.record(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'trace_id': self.trace.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent.span_id if self.parent is not None else None,
+            'request_id': self.trace.request_id,
+            'name': self.name,
+            'start': self.start,
+            'duration_ms': round(self.duration * 1000, 3),
+            'attributes': self.attributes,
+            'error': self.error,
+        }
+
+
+class _Trace:
+    def __init__(self, request_id: Optional[str], max_spans: int):
+        self.trace_id = uuid.uuid4().hex
+        self.request_id = request_id
+        self.max_spans = max_spans
+        self.spans: List[Span] = []
+        self.dropped = 0
+
+    def record(self, span: Span) -> None:
+        if len(self.spans) < self.max_spans or span.parent is None:  # a raiz sempre entra
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+
+
+# Span ativo; _UNSAMPLED marca uma requisição fora da amostra
+_UNSAMPLED = object()
+_current_span: ContextVar[Any] = ContextVar('current_span', default=None)
+_request_id: ContextVar[Optional[str]] = ContextVar('request_id', default=None)
+
+
+def current_request_id() -> Optional[str]:
+    """``X-Request-ID`` da requisição em andamento (ou None)"""
+    return _request_id.get()
+
+
+class FileExporter:
+    """Um span por linha (JSON) num arquivo local"""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for span in spans:
+                f.write(json.dumps(span, ensure_ascii=False, default=str) + '\n')
+
+
+class OTLPHttpExporter:
+    """Envia spans no formato OTLP/HTTP JSON para um coletor"""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    @staticmethod
+    def _attribute(key: str, value: Any) -> Dict[str, Any]:
+        if isinstance(value, bool):
+            return {'key': key, 'value': {'boolValue': value}}
+        if isinstance(value, int):
+            return {'key': key, 'value': {'intValue': str(value)}}
+        if isinstance(value, float):
+            return {'key': key, 'value': {'doubleValue': value}}
+        return {'key': key, 'value': {'stringValue': str(value)}}
+
+    def payload(self, spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+        otlp_spans = []
+        for span in spans:
+            start_ns = int(span['start'] * 1e9)
+            attributes = {**span['attributes'], 'request.id': span['request_id']}
+            otlp_spans.append({
+                'traceId': span['trace_id'],
+                'spanId': span['span_id'],
+                'parentSpanId': span['parent_id'] or '',
+                'name': span['name'],
+                'kind': 2 if span['parent_id'] is None else 1,  # SERVER / INTERNAL
+                'startTimeUnixNano': str(start_ns),
+                'endTimeUnixNano': str(start_ns + int(span['duration_ms'] * 1e6)),
+                'attributes': [self._attribute(k, v) for k, v in attributes.items() if v is not None],
+                'status': {'code': 2, 'message': span['error']} if span['error'] else {'code': 1},
+            })
+        return {'resourceSpans': [{
+            'resource': {'attributes': [self._attribute('service.name', SERVICE_NAME)]},
+            'scopeSpans': [{'scope': {'name': __name__}, 'spans': otlp_spans}],
+        }]}
+
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        data = json.dumps(self.payload(spans), default=str).encode('utf-8')
+        req = urllib.request.Request(self.endpoint, data=data, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(req, timeout=self.timeout) as response:
+            response.read()
+
+
+class Tracer:
+    """Amostragem, propagação do span ativo e exportação assíncrona"""
+
+    def __init__(self, sample_rate: float = SAMPLE_RATE, exporter: Any = None,
+                 max_spans: int = MAX_SPANS_PER_TRACE):
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+        self.max_spans = max_spans
+        self.dropped_traces = 0
+        self._queue: 'queue.Queue[List[Dict[str, Any]]]' = queue.Queue(maxsize=EXPORT_QUEUE_SIZE)
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _exporter(self) -> Any:
+        if self.exporter is None:
+            self.exporter = OTLPHttpExporter(OTLP_ENDPOINT) if OTLP_ENDPOINT else FileExporter(EXPORT_PATH)
+        return self.exporter
+
+    # Início e fim de traces
+
+    def start_trace(self, name: str, request_id: Optional[str] = None,
+                    attributes: Optional[Dict[str, Any]] = None) -> Optional[Span]:
+        """Abre o span raiz se o trace for amostrado; marca a execução como fora da amostra caso contrário"""
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            _current_span.set(_UNSAMPLED)
+            return None
+        root = Span(_Trace(request_id, self.max_spans), name, None, attributes or {})
+        _current_span.set(root)
+        return root
+
+    def end_trace(self, root: Optional[Span], error: Optional[BaseException] = None) -> None:
+        _current_span.set(None)
+        if root is None:
+            return
+        if root.trace.dropped:
+            root.set_attribute('spans.dropped', root.trace.dropped)
+        root.finish(error)
+        self._submit([span.to_dict() for span in root.trace.spans])
+
+    # Spans filhos
+
+    def start_span(self, name: str, **attributes) -> Optional[Span]:
+        parent = _current_span.get()
+        if parent is None or parent is _UNSAMPLED:
+            return None
+        span = Span(parent.trace, name, parent, attributes)
+        _current_span.set(span)
+        return span
+
+    def end_span(self, span: Optional[Span], error: Optional[BaseException] = None) -> None:
+        """Fecha um span aberto com ``start_span`` e reativa o pai"""
+        if span is None:
+            return
+        span.finish(error)
+        _current_span.set(span.parent)
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Optional[Span]]:
+        """Span filho do span ativo; não faz nada fora de um trace amostrado"""
+        parent = _current_span.get()
+        if parent is None or parent is _UNSAMPLED:
+            yield None
+            return
+        span = Span(parent.trace, name, parent, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.finish(e)
+            raise
+        else:
+            span.finish()
+        finally:
+            _current_span.reset(token)
+
+    # Exportação
+
+    def _submit(self, spans: List[Dict[str, Any]]) -> None:
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped_traces += 1
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._export_loop, name='tracing-export', daemon=True)
+                self._worker.start()
+
+    def _export_loop(self) -> None:
+        while True:
+            spans = self._queue.get()
+            try:
+                self._exporter().export(spans)
+            except Exception as e:
+                logger.error("Falha ao exportar spans: %s", e)
+            finally:
+                self._queue.task_done()
+
+    def flush(self) -> None:
+        """Espera a exportação dos traces já finalizados"""
+        self._queue.join()
+
+
+tracer = Tracer()
+
+
+def traced(name: str):
+    """Decorador: registra a função como span filho do span ativo"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            parent = _current_span.get()
+            if parent is None or parent is _UNSAMPLED:
+                return fn(*args, **kwargs)
+            with tracer.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def trace_methods(prefix: str):
+    """Decorador de classe: um span por chamada de cada método de instância (exceto os especiais)"""
+    def decorator(cls):
+        for attr, value in list(vars(cls).items()):
+            if inspect.isfunction(value) and not attr.startswith('__'):
+                setattr(cls, attr, traced(f'{prefix}.{attr}')(value))
+        return cls
+    return decorator
+
+
+class TracedRequest(Request):
+    """Request do Flask que cronometra a leitura do corpo JSON"""
+
+    def get_json(self, *args, **kwargs):
+        with tracer.span('request.json'):
+            return super().get_json(*args, **kwargs)
+
+
+# Consultas SQL
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    span = tracer.start_span('db.query', statement=statement[:SQL_STATEMENT_MAX_CHARS])
+    if span is not None:
+        conn.info.setdefault('tracing_spans', []).append(span)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get('tracing_spans')
+    if spans:
+        tracer.end_span(spans.pop())
+
+
+def _handle_error(exception_context):
+    spans = exception_context.connection.info.get('tracing_spans') if exception_context.connection else None
+    if spans:
+        tracer.end_span(spans.pop(), exception_context.original_exception)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Registra spans para cada consulta do engine (idempotente)"""
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(engine, 'handle_error', _handle_error)
+
+
+# Hooks do Flask
+
+def _before_request() -> None:
+    request_id = request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+    _request_id.set(request_id)
+    g.request_id = request_id
+    g._trace_root = tracer.start_trace(
+        f'{request.method} {request.url_rule.rule if request.url_rule else "unmatched"}',
+        request_id=request_id,
+        attributes={'http.method': request.method, 'http.target': request.path},
+    )
+
+
+def _after_request(response):
+    response.headers.setdefault(REQUEST_ID_HEADER, g.get('request_id', ''))
+    root = g.get('_trace_root')
+    if root is not None:
+        root.set_attribute('http.status_code', response.status_code)
+        response.headers['X-Trace-ID'] = root.trace.trace_id
+    return response
+
+
+def _teardown_request(exc) -> None:
+    tracer.end_trace(g.pop('_trace_root', None), exc)
+    _request_id.set(None)
+
+
+def init_app(app: Flask, engine: Optional[Engine] = None) -> None:
+    """Instala os hooks de tracing e, se informado, os eventos do engine"""
+    app.request_class = TracedRequest
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    if engine is not None:
+        instrument_engine(engine)
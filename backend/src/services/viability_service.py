@@ -0,0 +1,259 @@
+"""
+Calculadora de viabilidade (locação x revenda) em lote
+
+Versão vetorizada da ``CalculadoraViabilidade`` de
+``docs/calculadora_viabilidade.py``: cada método recebe arrays (um
+elemento por imóvel) e calcula todos de uma vez. As taxas vêm do arquivo
+de taxas de mercado, o mesmo usado pelo simulador de financiamento, e o
+imposto sobre ganho de capital usa o motor de impostos.
+"""
+
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from src.services.market_rates import market_rates
+from src.services.tax_engine import TaxProfile, compute_capital_gains
+
+VARIACAO_SENSIBILIDADE = 20  # % de variação do aluguel nos cenários
+PRAZO_LOCACAO_ANOS = 10
+PRAZO_VENDA_MESES = 12
+
+
+def _array(value, size: Optional[int] = None) -> np.ndarray:
+    array = np.asarray(value, dtype=np.float64)
+    return np.broadcast_to(array, (size,)).astype(np.float64) if size is not None else array
+
+
+def _clean(value: float) -> Optional[float]:
+    return round(float(value), 2) if np.isfinite(value) else None
+
+
+class ViabilityCalculatorService:
+    """Investimento total, ROI de locação e revenda, sensibilidade e comparação"""
+
+    def taxas(self) -> Dict[str, float]:
+        """Taxas em fração (0.02 = 2%), lidas das taxas de mercado"""
+        rates = market_rates.current()
+        viability = rates['viability']
+        real_estate = rates['real_estate']
+        return {
+            'itbi': viability['itbi'] / 100,
+            'cartorio': viability['cartorio'] / 100,
+            'leilao': viability['leilao'] / 100,
+            'reforma_contingencia': viability['reforma_contingencia'] / 100,
+            'vacancia_anual': real_estate['vacancy_rate'] / 100,
+            'inadimplencia': viability['inadimplencia'] / 100,
+            'administracao': real_estate['management_fee'] / 100,
+            'manutencao_anual': viability['manutencao_anual'] / 100,
+            'iptu_anual': viability['iptu_anual'] / 100,
+            'seguro_anual': viability['seguro_anual'] / 100,
+            'corretagem_venda': viability['corretagem_venda'] / 100,
+            'marketing_venda': viability['marketing_venda'] / 100,
+        }
+
+    def investimento_total(self, valor_arrematacao, valor_reforma=0.0, outros_custos=0.0,
+                           taxas: Optional[Dict[str, float]] = None) -> Dict[str, np.ndarray]:
+        taxas = taxas or self.taxas()
+        valor_arrematacao = _array(valor_arrematacao)
+        valor_reforma = _array(valor_reforma)
+        itbi = valor_arrematacao * taxas['itbi']
+        cartorio = valor_arrematacao * taxas['cartorio']
+        taxa_leilao = valor_arrematacao * taxas['leilao']
+        reforma_total = valor_reforma * (1 + taxas['reforma_contingencia'])
+        outros_custos = _array(outros_custos)
+        return {
+            'valor_arrematacao': valor_arrematacao,
+            'itbi': itbi,
+            'cartorio': cartorio,
+            'taxa_leilao': taxa_leilao,
+            'reforma_bruta': valor_reforma,
+            'reforma_com_contingencia': reforma_total,
+            'outros_custos': outros_custos,
+            'investimento_total': valor_arrematacao + itbi + cartorio + taxa_leilao + reforma_total + outros_custos,
+        }
+
+    def roi_locacao(self, investimento_total, valor_aluguel_mensal, prazo_anos=PRAZO_LOCACAO_ANOS,
+                    taxas: Optional[Dict[str, float]] = None) -> Dict[str, np.ndarray]:
+        taxas = taxas or self.taxas()
+        investimento_total = _array(investimento_total)
+        receita_bruta_anual = _array(valor_aluguel_mensal) * 12
+        vacancia = receita_bruta_anual * taxas['vacancia_anual']
+        inadimplencia = receita_bruta_anual * taxas['inadimplencia']
+        administracao = receita_bruta_anual * taxas['administracao']
+        receita_liquida_anual = receita_bruta_anual - vacancia - inadimplencia - administracao
+
+        manutencao = investimento_total * taxas['manutencao_anual']
+        iptu = investimento_total * taxas['iptu_anual']
+        seguro = investimento_total * taxas['seguro_anual']
+        custos_operacionais = manutencao + iptu + seguro
+        resultado_liquido_anual = receita_liquida_anual - custos_operacionais
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            roi_anual = resultado_liquido_anual / investimento_total * 100
+            payback_anos = np.where(resultado_liquido_anual > 0, investimento_total / resultado_liquido_anual, np.inf)
+        valor_acumulado = resultado_liquido_anual * _array(prazo_anos)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            roi_total = valor_acumulado / investimento_total * 100
+        return {
+            'receita_bruta_anual': receita_bruta_anual,
+            'receita_liquida_anual': receita_liquida_anual,
+            'custos_operacionais_anuais': custos_operacionais,
+            'resultado_liquido_anual': resultado_liquido_anual,
+            'roi_anual_percentual': roi_anual,
+            'payback_anos': payback_anos,
+            'valor_acumulado_prazo': valor_acumulado,
+            'roi_total_prazo': roi_total,
+            'breakdown_custos': {
+                'vacancia': vacancia,
+                'inadimplencia': inadimplencia,
+                'administracao': administracao,
+                'manutencao': manutencao,
+                'iptu': iptu,
+                'seguro': seguro,
+            },
+        }
+
+    def roi_revenda(self, investimento_total, valor_venda_estimado, prazo_meses=PRAZO_VENDA_MESES,
+                    tax_profile: TaxProfile = TaxProfile(),
+                    taxas: Optional[Dict[str, float]] = None) -> Dict[str, np.ndarray]:
+        taxas = taxas or self.taxas()
+        investimento_total = _array(investimento_total)
+        valor_venda_estimado = _array(valor_venda_estimado)
+        prazo_meses = _array(prazo_meses, len(np.atleast_1d(investimento_total)))
+
+        comissao_corretagem = valor_venda_estimado * taxas['corretagem_venda']
+        itbi_venda = valor_venda_estimado * taxas['itbi']
+        custos_marketing = valor_venda_estimado * taxas['marketing_venda']
+
+        # Ganho de capital: corretagem paga reduz o valor de alienação
+        ganho_capital = valor_venda_estimado - comissao_corretagem - investimento_total
+        imposto = compute_capital_gains(np.atleast_1d(ganho_capital), np.atleast_1d(valor_venda_estimado),
+                                        prazo_meses, tax_profile)['tax']
+        imposto_ganho_capital = imposto.reshape(np.shape(ganho_capital))
+
+        custos_venda_total = comissao_corretagem + itbi_venda + custos_marketing + imposto_ganho_capital
+        valor_liquido_venda = valor_venda_estimado - custos_venda_total
+        lucro_liquido = valor_liquido_venda - investimento_total
+        with np.errstate(divide='ignore', invalid='ignore'):
+            roi_total = lucro_liquido / investimento_total * 100
+            roi_anual = roi_total / prazo_meses.reshape(np.shape(roi_total)) * 12
+        return {
+            'valor_venda_estimado': valor_venda_estimado,
+            'custos_venda_total': custos_venda_total,
+            'valor_liquido_venda': valor_liquido_venda,
+            'lucro_liquido': lucro_liquido,
+            'roi_total_percentual': roi_total,
+            'roi_anual_percentual': roi_anual,
+            'prazo_meses': prazo_meses,
+            'breakdown_custos_venda': {
+                'comissao_corretagem': comissao_corretagem,
+                'itbi_venda': itbi_venda,
+                'custos_marketing': custos_marketing,
+                'imposto_ganho_capital': imposto_ganho_capital,
+            },
+        }
+
+    def analise_sensibilidade(self, investimento_total, valor_aluguel_base,
+                              variacao_percentual: float = VARIACAO_SENSIBILIDADE,
+                              taxas: Optional[Dict[str, float]] = None) -> Dict[str, Dict[str, np.ndarray]]:
+        """Cenários pessimista, realista e otimista variando o aluguel"""
+        taxas = taxas or self.taxas()
+        variacao = variacao_percentual / 100
+        valor_aluguel_base = _array(valor_aluguel_base)
+        cenarios = {
+            'pessimista': valor_aluguel_base * (1 - variacao),
+            'realista': valor_aluguel_base,
+            'otimista': valor_aluguel_base * (1 + variacao),
+        }
+        resultados = {}
+        for nome, valor_aluguel in cenarios.items():
+            roi = self.roi_locacao(investimento_total, valor_aluguel, taxas=taxas)
+            resultados[nome] = {
+                'valor_aluguel_mensal': valor_aluguel,
+                'roi_anual': roi['roi_anual_percentual'],
+                'payback_anos': roi['payback_anos'],
+                'resultado_liquido_anual': roi['resultado_liquido_anual'],
+            }
+        return resultados
+
+    def comparar_estrategias(self, roi_locacao: Dict[str, np.ndarray],
+                             roi_revenda: Dict[str, np.ndarray]) -> Dict[str, Any]:
+        """Locação x revenda a partir dos ROIs já calculados"""
+        return {
+            'locacao': {
+                'roi_anual': roi_locacao['roi_anual_percentual'],
+                'payback_anos': roi_locacao['payback_anos'],
+                'resultado_anual': roi_locacao['resultado_liquido_anual'],
+                'estrategia': 'Renda passiva recorrente',
+            },
+            'revenda': {
+                'roi_anual': roi_revenda['roi_anual_percentual'],
+                'payback_anos': roi_revenda['prazo_meses'] / 12,
+                'resultado_total': roi_revenda['lucro_liquido'],
+                'estrategia': 'Ganho de capital único',
+            },
+            'recomendacao': np.where(
+                roi_locacao['roi_anual_percentual'] > roi_revenda['roi_anual_percentual'], 'locacao', 'revenda'
+            ),
+        }
+
+    def relatorio_lote(self, imoveis: List[Dict[str, Any]], prazo_anos: int = PRAZO_LOCACAO_ANOS,
+                       variacao_percentual: float = VARIACAO_SENSIBILIDADE,
+                       tax_profile: TaxProfile = TaxProfile()) -> List[Dict[str, Any]]:
+        """
+        Relatório de viabilidade para uma lista de imóveis, calculado em lote
+
+        Cada imóvel: valor_arrematacao, valor_aluguel_mensal e
+        valor_venda_estimado (obrigatórios); valor_reforma,
+        custos_adicionais (dict ou número) e prazo_venda_meses opcionais.
+        """
+        taxas = self.taxas()
+        size = len(imoveis)
+
+        def column(name, default=0.0):
+            return np.array([float(imovel.get(name) or default) for imovel in imoveis], dtype=np.float64)
+
+        outros = np.array([
+            sum((imovel.get('custos_adicionais') or {}).values())
+            if isinstance(imovel.get('custos_adicionais'), dict) else float(imovel.get('custos_adicionais') or 0)
+            for imovel in imoveis
+        ], dtype=np.float64)
+
+        investimento = self.investimento_total(column('valor_arrematacao'), column('valor_reforma'), outros, taxas)
+        total = investimento['investimento_total']
+        aluguel = column('valor_aluguel_mensal')
+        locacao = self.roi_locacao(total, aluguel, prazo_anos, taxas)
+        revenda = self.roi_revenda(total, column('valor_venda_estimado'),
+                                   column('prazo_venda_meses', PRAZO_VENDA_MESES), tax_profile, taxas)
+        sensibilidade = self.analise_sensibilidade(total, aluguel, variacao_percentual, taxas)
+        comparacao = self.comparar_estrategias(locacao, revenda)
+
+        def row(tree, i):
+            if isinstance(tree, dict):
+                return {key: row(value, i) for key, value in tree.items()}
+            if isinstance(tree, str):
+                return tree
+            value = np.broadcast_to(tree, (size,))[i]
+            return str(value) if isinstance(value, np.str_) else _clean(value)
+
+        return [
+            {
+                'id': imovel.get('id'),
+                'investimento_total': row(investimento, i),
+                'roi_locacao': row(locacao, i),
+                'roi_revenda': row(revenda, i),
+                'analise_sensibilidade': row(sensibilidade, i),
+                'comparacao_estrategias': row(comparacao, i),
+                'metricas_resumo': {
+                    'roi_locacao_anual': _clean(locacao['roi_anual_percentual'][i]),
+                    'roi_revenda_anual': _clean(revenda['roi_anual_percentual'][i]),
+                    'payback_locacao': _clean(locacao['payback_anos'][i]),
+                    'estrategia_recomendada': str(comparacao['recomendacao'][i]),
+                },
+            }
+            for i, imovel in enumerate(imoveis)
+        ]
+
+
+viability_service = ViabilityCalculatorService()
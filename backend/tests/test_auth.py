@@ -10,6 +10,7 @@ os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
 os.environ['SECRET_KEY'] = 'test-secret'
 
 from src.main import app, db  # noqa: E402
+from src.models.user import User  # noqa: E402
 
 
 @pytest.fixture()
@@ -44,3 +45,49 @@ def test_register_and_login_returns_token_and_user(client):
     assert 'user' in login_data
     assert login_data['user']['email'] == payload['email']
 
+
+
+def test_register_conflicts_return_409(client):
+    payload = {'username': 'testuser', 'email': 'test@example.com', 'password': 'secret'}
+    assert client.post('/api/register', json=payload).status_code == 201
+    assert client.post('/api/register', json={**payload, 'email': 'other@example.com'}).status_code == 409
+    assert client.post('/api/register', json={**payload, 'username': 'other'}).status_code == 409
+
+
+def test_update_user_reports_unique_conflicts(client):
+    for name in ('alice', 'bob'):
+        client.post('/api/register', json={'username': name, 'email': f'{name}@example.com', 'password': 'pw'})
+    bob = User.query.filter_by(username='bob').one().to_dict()
+
+    resp = client.put(f"/api/users/{bob['id']}", json={'username': 'alice', 'email': 'bob@example.com'})
+    assert resp.status_code == 400
+    assert resp.get_json()['error'] == 'Nome de usuário já existe'
+
+    resp = client.put(f"/api/users/{bob['id']}", json={'username': 'bob', 'email': 'alice@example.com'})
+    assert resp.status_code == 400
+    assert resp.get_json()['error'] == 'Email já cadastrado'
+
+    resp = client.put(f"/api/users/{bob['id']}", json={'username': 'robert', 'email': 'bob@example.com'})
+    assert resp.status_code == 200
+    assert resp.get_json()['username'] == 'robert'
+
+
+def test_users_listing_is_keyset_paginated(client):
+    db.session.add_all([User(username=f'user{i}', email=f'user{i}@example.com', password='x') for i in range(5)])
+    db.session.commit()
+
+    first = client.get('/api/users?limit=2&fields=username').get_json()
+    assert first['count'] == 2
+    assert first['users'] == [{'id': 1, 'username': 'user0'}, {'id': 2, 'username': 'user1'}]
+    assert first['next_after_id'] == 2
+
+    seen = [u['id'] for u in first['users']]
+    after_id = first['next_after_id']
+    while after_id is not None:
+        page = client.get(f'/api/users?limit=2&after_id={after_id}').get_json()
+        seen += [u['id'] for u in page['users']]
+        after_id = page['next_after_id']
+    assert seen == [1, 2, 3, 4, 5]
+    assert set(page['users'][0]) == {'id', 'username', 'email'}
+
+    assert client.get('/api/users?fields=password').status_code == 400
@@ -0,0 +1,85 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Ensure backend package is on path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Configure test environment before importing app
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+os.environ['SECRET_KEY'] = 'test-secret'
+
+from src.main import app  # noqa: E402
+from src.routes import analysis as analysis_routes  # noqa: E402
+from src.services.bid_simulator import bid_simulator  # noqa: E402
+from src.services.financing_calculator import FinancingCalculatorService, FinancingInputs  # noqa: E402
+
+PROPERTY = {'codigo': '1', 'valor_venda': 150000, 'valor_avaliacao': 260000, 'cidade': 'SAO PAULO'}
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def test_batch_matches_single_calculation():
+    calculator = FinancingCalculatorService()
+    bids = np.array([150000.0, 200000.0, 250000.0])
+    base = dict(declared_value=0, interest_rate=10.5, sale_price=300000, monthly_rent=1500, iptu_arrears=900)
+    batch = calculator.calculate_financing_batch(FinancingInputs(property_value=0, **base), bids, bids * 0.2)
+    for i, bid in enumerate(bids):
+        single = calculator.calculate_financing(
+            FinancingInputs(property_value=bid, down_payment=bid * 0.2, **base)
+        )
+        assert batch['monthly_payment'][i] == pytest.approx(single.monthly_payment)
+        assert batch['capital_gains_tax'][i] == pytest.approx(single.capital_gains_tax, abs=0.01)
+        assert batch['final_profit'][i] == pytest.approx(single.final_profit, abs=0.01)
+        assert batch['annual_return'][i] == pytest.approx(single.annual_return)
+        assert batch['irr_annual'][i] == pytest.approx(single.cash_flow['irr_annual'], abs=1e-3)
+
+
+def test_ladder_returns_decrease_and_max_bid_meets_target():
+    ladder = bid_simulator.simulate(PROPERTY, {'target_return': 30})
+    returns = [point['annual_return'] for point in ladder['curve']]
+    assert returns == sorted(returns, reverse=True)
+    assert ladder['curve'][0]['bid'] == 150000 and ladder['curve'][-1]['bid'] == 260000
+    assert ladder['max_bid'] is not None
+    assert ladder['annual_return_at_max_bid'] >= 30
+    # Um lance um pouco maior já fica abaixo do alvo
+    higher = bid_simulator.simulate({**PROPERTY, 'valor_venda': ladder['max_bid'] + 500}, {'target_return': 30})
+    assert higher['curve'][0]['annual_return'] < 30
+
+
+def test_capital_limits_max_bid():
+    free = bid_simulator.simulate(PROPERTY, {'target_return': 0})
+    limited = bid_simulator.simulate(PROPERTY, {'target_return': 0, 'available_capital': 60000})
+    assert limited['max_bid'] < free['max_bid']
+    assert limited['capital_at_max_bid'] <= 60000
+    assert bid_simulator.simulate(PROPERTY, {'target_return': 1000})['max_bid'] is None
+
+
+def test_bid_ladder_endpoint_and_prompt(client, monkeypatch):
+    response = client.post('/api/analysis/bid-ladder', json={
+        'property_data': PROPERTY, 'user_profile': {'risk_tolerance': 'agressivo'}, 'steps': 11,
+    })
+    assert response.status_code == 200
+    assert len(response.get_json()['bid_ladder']['curve']) == 11
+    assert client.post('/api/analysis/bid-ladder', json={'property_data': {'cidade': 'X'}}).status_code == 400
+
+    captured = {}
+
+    def fake_invoke(prompt, max_tokens=2000):
+        captured['prompt'] = prompt
+        return '{"lance_maximo_recomendado": 1}'
+
+    monkeypatch.setattr(analysis_routes.bedrock_service, '_invoke_claude', fake_invoke)
+    response = client.post('/api/analysis/auction-strategy', json={
+        'property_data': PROPERTY, 'user_profile': {'available_capital': 80000},
+    })
+    assert response.status_code == 200
+    assert response.get_json()['bid_ladder']['max_bid'] is not None
+    assert 'SIMULAÇÃO DE LANCES' in captured['prompt']
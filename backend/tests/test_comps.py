@@ -0,0 +1,109 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Ensure backend package is on path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Configure test environment before importing app
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+os.environ['SECRET_KEY'] = 'test-secret'
+
+from src.main import app  # noqa: E402
+from src.models.user import db  # noqa: E402
+from src.models.imovel import Imovel  # noqa: E402
+from src.services.comps_service import KDTree, comps_engine  # noqa: E402
+
+
+def make_imovel(numero, bairro, preco, area, quartos, tipo='Apartamento', cidade='SAO PAULO'):
+    return Imovel(numero_imovel=numero, uf='SP', cidade=cidade, bairro=bairro, endereco='RUA X',
+                  preco=preco, area_total=area, quartos=quartos, tipo_imovel=tipo)
+
+
+@pytest.fixture
+def client():
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            make_imovel('1', 'MOOCA', 200000, 50, 2),
+            make_imovel('2', 'MOOCA', 210000, 52, 2),
+            make_imovel('3', 'TATUAPE', 235000, 58, 2),
+            make_imovel('4', 'MOOCA', 900000, 180, 4),
+            make_imovel('5', 'MOOCA', 220000, 55, 2, tipo='Casa'),
+            make_imovel('6', 'CENTRO', 200000, 50, 2, cidade='CAMPINAS'),
+        ])
+        db.session.commit()
+        comps_engine.invalidate()
+        yield app.test_client()
+        comps_engine.invalidate()
+        db.session.remove()
+        db.drop_all()
+
+
+def test_kdtree_matches_brute_force():
+    rng = np.random.default_rng(7)
+    points = rng.normal(size=(2000, 3))
+    tree = KDTree(points)
+    for query in rng.normal(size=(25, 3)):
+        distances, index = tree.query(query, 8)
+        brute = np.sqrt(((points - query) ** 2).sum(axis=1))
+        assert list(index) == list(np.argsort(brute)[:8])
+        assert np.allclose(distances, np.sort(brute)[:8])
+
+
+def test_comps_ranked_within_same_city_and_type(client):
+    res = client.get('/api/imoveis/1/comps', query_string={'k': 3})
+    body = res.get_json()
+    assert res.status_code == 200
+    ids = [c['id'] for c in body['comps']]
+    # Mesmo tipo primeiro, do mais parecido ao menos parecido; outra cidade nunca entra
+    assert ids[:2] == [2, 3]
+    assert 1 not in ids and 6 not in ids
+    assert body['comps'][0]['similarity'] > body['comps'][-1]['similarity']
+    assert body['summary']['preco_m2_median'] is not None
+
+
+def test_comps_fill_with_other_types_when_needed(client):
+    res = client.post('/api/imoveis/comps', json={
+        'uf': 'SP', 'cidade': 'São Paulo', 'tipo_imovel': 'Casa', 'area_total': 55,
+        'quartos': 2, 'valor_venda': 215000, 'k': 3,
+    })
+    comps = res.get_json()['comps']
+    assert comps[0]['id'] == 5
+    assert len(comps) == 3
+
+
+def test_prompt_context_is_compact_text(client):
+    context = comps_engine.prompt_context({
+        'uf': 'SP', 'cidade': 'SAO PAULO', 'bairro': 'MOOCA', 'tipo_imovel': 'Apartamento',
+        'area_total': 50, 'valor_venda': 199000,
+    }, k=2)
+    lines = context.splitlines()
+    assert lines[0].startswith('COMPARÁVEIS')
+    assert len(lines) == 4
+    assert 'MOOCA' in lines[1]
+
+
+def test_prompt_context_without_uf_matches_city_name(client):
+    context = comps_engine.prompt_context({
+        'cidade': 'São Paulo', 'bairro': 'MOOCA', 'tipo_imovel': 'Apartamento',
+        'area_total': 50, 'valor_venda': 199000,
+    }, k=2)
+    assert context.startswith('COMPARÁVEIS') and 'MOOCA' in context
+
+
+def test_prompt_context_excludes_listing_identified_by_codigo(client):
+    context = comps_engine.prompt_context({
+        'codigo': '1', 'uf': 'SP', 'cidade': 'SAO PAULO', 'bairro': 'MOOCA', 'tipo_imovel': 'Apartamento',
+        'area_total': 50, 'valor_venda': 200000,
+    }, k=1)
+    # Sem excluir o próprio imóvel, o comparável mais próximo seria ele (50 m², R$ 200.000)
+    assert 'R$ 200,000.00' not in context
+    assert '52 m²' in context
+
+
+def test_comps_rejects_non_numeric_k(client):
+    res = client.post('/api/imoveis/comps', json={'uf': 'SP', 'cidade': 'SAO PAULO', 'k': 'abc'})
+    assert res.status_code == 400
@@ -0,0 +1,100 @@
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+# Ensure backend package is on path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Configure test environment before importing app
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+os.environ['SECRET_KEY'] = 'test-secret'
+
+from src.main import app  # noqa: E402
+from src.services import db_pool  # noqa: E402
+from src.services.db_pool import (  # noqa: E402
+    DatabaseProbe, InstrumentedQueuePool, PoolMetrics, engine_options, pool_config, pool_metrics,
+)
+
+
+@pytest.fixture
+def client():
+    with app.app_context():
+        yield app.test_client()
+
+
+def test_engine_options_from_env(monkeypatch):
+    monkeypatch.setenv('DB_POOL_SIZE', '8')
+    monkeypatch.setenv('DB_MAX_OVERFLOW', '2')
+    monkeypatch.setenv('DB_POOL_PRE_PING', 'false')
+    monkeypatch.setenv('WEB_CONCURRENCY', '4')
+    options = engine_options('postgresql://u:p@localhost/db')
+    assert options['poolclass'] is InstrumentedQueuePool
+    assert (options['pool_size'], options['max_overflow'], options['pool_pre_ping']) == (8, 2, False)
+    assert options['connect_args'] == {'connect_timeout': 10}
+    assert pool_config(options)['max_connections_total'] == 40
+    assert engine_options('sqlite:///:memory:') == {}
+
+
+def test_pool_metrics_count_checkouts_waits_and_timeouts(monkeypatch):
+    metrics = PoolMetrics()
+    monkeypatch.setattr(db_pool, 'pool_metrics', metrics)
+    engine = create_engine('sqlite://', poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05)
+    metrics.attach(engine)
+    with engine.connect() as connection:
+        connection.execute(text('SELECT 1'))
+        assert metrics.snapshot(engine)['checked_out'] == 1
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+    snapshot = metrics.snapshot(engine)
+    assert snapshot['checkouts'] == 1 and snapshot['checked_out'] == 0 and snapshot['peak_checked_out'] == 1
+    assert snapshot['checkout_timeouts'] == 1
+    assert snapshot['max_wait_ms'] >= 50
+    assert snapshot['size'] == 1 and snapshot['checked_in'] == 1
+
+
+def test_health_reports_database_and_pool(client):
+    response = client.get('/health')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['services']['database'] == 'connected'
+    assert data['database']['latency_ms'] >= 0
+    assert data['database']['pool']['metrics']['checkouts'] >= 1
+    assert pool_metrics.snapshot()['checked_out'] == 0
+
+
+def test_health_probe_times_out(client, monkeypatch):
+    probe = DatabaseProbe(timeout=0.05)
+    monkeypatch.setattr(probe, '_query', lambda engine: time.sleep(0.3))
+    monkeypatch.setattr('src.main.database_probe', probe)
+    response = client.get('/health')
+    assert response.status_code == 503
+    assert response.get_json()['services']['database'] == 'unavailable'
+    # A sonda travada não empilha outra: a próxima chamada aguarda a mesma
+    pending = probe._pending
+    assert 'timeout' in probe.check(None)['error']
+    assert probe._pending is pending
+
+
+def test_concurrent_health_checks_share_one_probe(monkeypatch):
+    probe = DatabaseProbe(timeout=1)
+    calls = []
+    monkeypatch.setattr(probe, '_query', lambda engine: (calls.append(engine), time.sleep(0.1)))
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(probe.check, [None] * 4))
+    assert [r['status'] for r in results] == ['connected'] * 4
+    assert len(calls) == 1
+
+
+def test_health_probe_hides_driver_errors(monkeypatch):
+    probe = DatabaseProbe(timeout=1)
+
+    def fail(engine):
+        raise RuntimeError('password authentication failed for user "app"')
+
+    monkeypatch.setattr(probe, '_query', fail)
+    assert probe.check(None) == {'status': 'unavailable', 'error': 'falha na conexão com o banco'}
@@ -0,0 +1,113 @@
+import os
+import sys
+
+import pytest
+
+# Ensure backend package is on path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Configure test environment before importing app
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+os.environ['SECRET_KEY'] = 'test-secret'
+
+from src.main import app  # noqa: E402
+from src.models.user import db  # noqa: E402
+from src.models.imovel import Imovel  # noqa: E402
+from src.models.property_analysis import PropertyAnalysis  # noqa: E402
+from src.routes import analysis as analysis_routes  # noqa: E402
+from src.services.dedup_service import find_clusters, normalize_address  # noqa: E402
+from src.services.listing_loader import ListingLoader, parse_listing_row  # noqa: E402
+
+DESCRICAO = 'Apartamento, 55.00 de área total, 2 qto(s), 1 vaga(s).'
+
+
+@pytest.fixture
+def client():
+    with app.app_context():
+        db.create_all()
+        yield app.test_client()
+        db.session.remove()
+        db.drop_all()
+
+
+def record(imovel_id, endereco, cidade='SAO PAULO', area=55.0, quartos=2, tipo='Apartamento'):
+    return {'id': imovel_id, 'uf': 'SP', 'cidade': cidade, 'endereco': endereco,
+            'tipo_imovel': tipo, 'quartos': quartos, 'area_total': area}
+
+
+def row(numero, endereco, preco, descricao=DESCRICAO):
+    return parse_listing_row([numero, 'SP', 'SAO PAULO', 'MOOCA', endereco, preco, '300.000,00', '',
+                              descricao, 'Venda Online', f'http://x/{numero}'])
+
+
+def test_normalize_address_expands_abbreviations():
+    assert normalize_address('R. dos Trilhos, nº 1.200 - Apto. 31') == 'RUA TRILHOS 1 200 APTO 31'
+    assert normalize_address('Rua dos Trilhos 1200, Ap 31') == 'RUA TRILHOS 1200 APTO 31'
+
+
+def test_clusters_relistings_but_not_neighbouring_units():
+    records = [
+        record(1, 'RUA DOS TRILHOS, N. 1200, APTO 31, BLOCO B'),
+        record(2, 'R DOS TRILHOS 1200 APTO 31 BL B'),  # relistagem
+        record(3, 'RUA DOS TRILHOS, N. 1200, APTO 32, BLOCO B'),  # vizinho do mesmo prédio
+        record(4, 'RUA DOS TRILHOS, N. 1200, APTO 31, BLOCO B', cidade='CAMPINAS'),
+        record(5, 'RUA DOS TRILHOS, N. 1200, APTO 31, BLOCO B', area=90.0),
+        record(6, 'AVENIDA PAULISTA 900 APTO 12'),
+    ]
+    assert find_clusters(records) == [1, 1, 3, 4, 5, 6]
+
+
+def test_relisting_shares_price_history(client):
+    loader = ListingLoader()
+    loader.load([row('100', 'RUA DOS TRILHOS, 1200, APTO 31', '250.000,00')], source='snapshot-1')
+    loader.load([row('100', 'RUA DOS TRILHOS, 1200, APTO 31', '250.000,00'),
+                 row('200', 'R. DOS TRILHOS 1200 AP 31', '230.000,00')], source='snapshot-2')
+
+    original = Imovel.query.filter_by(numero_imovel='100').one()
+    relisted = Imovel.query.filter_by(numero_imovel='200').one()
+    assert relisted.cluster_id == original.id
+
+    res = client.get(f'/api/imoveis/{relisted.id}/history')
+    body = res.get_json()
+    assert res.status_code == 200
+    assert body['relistings'] == ['100']
+    # Preço repetido na segunda carga não gera nova observação
+    assert [(h['numero_imovel'], h['preco']) for h in body['history']] == [('100', 250000), ('200', 230000)]
+
+
+def test_property_analysis_reused_for_relisting(client, monkeypatch):
+    ListingLoader().load([row('100', 'RUA DOS TRILHOS, 1200, APTO 31', '250.000,00'),
+                          row('200', 'R. DOS TRILHOS 1200 AP 31', '250.000,00')], source='snapshot')
+    calls = []
+
+    def fake_analysis(property_data, comps_context=''):
+        calls.append(property_data['codigo'])
+        return {'score': 77, 'recomendacao': 'compra'}
+
+    monkeypatch.setattr(analysis_routes.bedrock_service, 'analyze_property_opportunity', fake_analysis)
+    payload = {'codigo': '100', 'valor_avaliacao': 300000, 'valor_venda': 250000}
+    first = client.post('/api/analysis/property-analysis', json=payload).get_json()
+    assert first['analysis']['score'] == 77 and 'reused' not in first
+
+    second = client.post('/api/analysis/property-analysis', json={**payload, 'codigo': '200'}).get_json()
+    assert second['reused'] is True
+    assert second['reused_from'] == '100'
+    assert second['analysis']['score'] == 77
+
+    # Preço diferente exige nova análise
+    client.post('/api/analysis/property-analysis', json={**payload, 'codigo': '200', 'valor_venda': 200000})
+    assert calls == ['100', '200']
+    assert PropertyAnalysis.query.count() == 2
+
+
+def test_fallback_analysis_is_not_stored(client, monkeypatch):
+    fallback = analysis_routes.bedrock_service._get_fallback_analysis()
+    monkeypatch.setattr(analysis_routes.bedrock_service, 'analyze_property_opportunity',
+                        lambda property_data, comps_context='': dict(fallback))
+    payload = {'codigo': '100', 'valor_avaliacao': 300000, 'valor_venda': 250000}
+    response = client.post('/api/analysis/property-analysis', json=payload).get_json()
+    assert response['analysis']['fallback'] is True
+    assert PropertyAnalysis.query.count() == 0
+    # Uma análise real com os mesmos campos não é confundida com o fallback
+    unmarked = {key: value for key, value in fallback.items() if key != 'fallback'}
+    assert not analysis_routes.bedrock_service.is_fallback_analysis(unmarked)
@@ -0,0 +1,86 @@
+import os
+import sys
+
+import pytest
+from sqlalchemy import event
+
+# Ensure backend package is on path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Configure test environment before importing app
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+os.environ['SECRET_KEY'] = 'test-secret'
+
+from src.main import app  # noqa: E402
+from src.models.user import db  # noqa: E402
+from src.models.imovel import Imovel  # noqa: E402
+from src.services.geo_service import GeoService, geohash_encode, gazetteer  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Imovel(numero_imovel='1', uf='PE', cidade='RECIFE', bairro='BOA VIAGEM', endereco='X'),
+            Imovel(numero_imovel='2', uf='PE', cidade='Recife', bairro='Várzea', endereco='X'),
+            Imovel(numero_imovel='3', uf='PE', cidade='OLINDA', bairro='CARMO', endereco='X'),
+            Imovel(numero_imovel='4', uf='SP', cidade='SÃO PAULO', bairro='MOOCA', endereco='X'),
+            Imovel(numero_imovel='5', uf='PI', cidade='CIDADE DESCONHECIDA', endereco='X'),
+        ])
+        db.session.commit()
+        GeoService().geocode_missing()
+        yield app.test_client()
+        db.session.remove()
+        db.drop_all()
+
+
+def test_geohash_matches_reference():
+    assert geohash_encode(57.64911, 10.40744, 11) == 'u4pruydqqvj'
+
+
+def test_gazetteer_falls_back_to_city_centroid():
+    assert gazetteer.geocode('pe', 'Recife', 'Boa Viagem') == (-8.1196, -34.9014)
+    assert gazetteer.geocode('PE', 'OLINDA', 'BAIRRO QUALQUER') == (-8.0089, -34.8553)
+    assert gazetteer.geocode('PI', 'CIDADE DESCONHECIDA') is None
+
+
+def test_nearby_orders_by_distance(client):
+    boa_viagem = Imovel.query.filter_by(numero_imovel='1').one()
+    res = client.get('/api/imoveis/nearby', query_string={'imovel_id': boa_viagem.id, 'radius_km': 15})
+    assert res.status_code == 200
+    results = res.get_json()['results']
+    assert [r['numero_imovel'] for r in results] == ['1', '2', '3']
+    assert results[0]['distance_km'] == 0
+
+    res = client.get('/api/imoveis/nearby', query_string={'lat': -8.1196, 'lon': -34.9014, 'radius_km': 5})
+    assert [r['numero_imovel'] for r in res.get_json()['results']] == ['1']
+
+
+def test_bbox_returns_listings_inside(client):
+    res = client.get('/api/imoveis/bbox', query_string={
+        'min_lat': -24, 'min_lon': -47, 'max_lat': -23, 'max_lon': -46,
+    })
+    assert [r['numero_imovel'] for r in res.get_json()['results']] == ['4']
+
+    res = client.get('/api/imoveis/bbox', query_string={'min_lat': -24})
+    assert res.status_code == 400
+
+
+def test_nearby_loads_full_rows_only_for_the_limit(client):
+    for numero in range(10, 20):
+        db.session.add(Imovel(numero_imovel=str(numero), uf='PE', cidade='RECIFE', bairro='BOA VIAGEM',
+                              endereco='X', latitude=-8.1196, longitude=-34.9014,
+                              geohash=geohash_encode(-8.1196, -34.9014)))
+    db.session.commit()
+    db.session.expunge_all()
+
+    loaded = []
+    listener = lambda target, context: loaded.append(target.id)  # noqa: E731
+    event.listen(Imovel, 'load', listener)
+    try:
+        results = GeoService().nearby(-8.1196, -34.9014, radius_km=1, limit=3)
+    finally:
+        event.remove(Imovel, 'load', listener)
+    assert [r['numero_imovel'] for r in results] == ['1', '10', '11']
+    assert len(loaded) == 3
@@ -0,0 +1,118 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+# Ensure backend package is on path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Configure test environment before importing app
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+os.environ['SECRET_KEY'] = 'test-secret'
+
+from src.main import app  # noqa: E402
+from src.models.user import db  # noqa: E402
+from src.models.imovel import Imovel  # noqa: E402
+from src.models.listing_financial import ListingFinancial  # noqa: E402
+from src.services import listing_financials as financials_module  # noqa: E402
+from src.services.listing_financials import ListingFinancialsService  # noqa: E402
+from src.services.market_rates import MarketRatesService, market_rates  # noqa: E402
+
+
+@pytest.fixture
+def rates(tmp_path, monkeypatch):
+    path = tmp_path / 'market_rates.json'
+    shutil.copy(market_rates.defaults_path, path)
+    service = MarketRatesService(path=str(path), check_interval=0)
+    monkeypatch.setattr(financials_module, 'market_rates', service)
+    return service
+
+
+@pytest.fixture
+def client(rates):
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Imovel(numero_imovel='1', uf='SP', cidade='SAO PAULO', endereco='RUA A', preco=200000),
+            Imovel(numero_imovel='2', uf='SP', cidade='SAO PAULO', endereco='RUA B', preco=350000),
+            Imovel(numero_imovel='3', uf='SP', cidade='SAO PAULO', endereco='RUA C', preco=None),
+        ])
+        db.session.commit()
+        yield app.test_client()
+        db.session.remove()
+        db.drop_all()
+
+
+def test_precomputed_price_matches_quick_estimate(client):
+    ListingFinancialsService().refresh()
+    assert ListingFinancial.query.count() == 8
+
+    stored = client.get('/api/imoveis/1/financials').get_json()['financials']['caixa_price_20']
+    estimate = client.post('/api/financing/quick-estimate', json={
+        'property_value': 200000, 'down_payment': 40000, 'interest_rate': 7.3,
+    }).get_json()['quick_estimate']
+
+    assert stored['first_payment'] == estimate['monthly_payment']
+    assert stored['total_interest'] == estimate['total_interest']
+    assert stored['documentation_costs'] == estimate['documentation_costs']
+    assert stored['estimated_rent'] == estimate['estimated_monthly_rent']
+    assert stored['gross_yield'] == estimate['gross_yield']
+
+
+def test_sac_profile_matches_amortization_table(client):
+    sac = ListingFinancialsService().get(2)['caixa_sac_30']
+    table = client.post('/api/financing/amortization-table', json={
+        'property_value': 350000, 'down_payment': 105000, 'interest_rate': 7.1, 'system': 'sac',
+    }).get_json()['amortization']
+
+    assert sac['first_payment'] == table['table'][0]['monthly_payment']
+    assert sac['total_interest'] == pytest.approx(table['summary']['total_interest'], abs=1)
+
+
+def test_rate_change_invalidates_stored_metrics(client, rates):
+    service = ListingFinancialsService()
+    service.refresh()
+    old = service.get(1)['caixa_sac_20']
+    assert service.refresh_stale() == 0
+
+    rates.update('financing', {'caixa_sac': 9.0})
+    new = service.get(1)['caixa_sac_20']
+    assert new['interest_rate'] == 9.0
+    assert new['rates_version'] != old['rates_version']
+    assert new['first_payment'] > old['first_payment']
+
+    # A leitura recalcula em memória; a tabela continua com a versão antiga
+    assert service.refresh_stale() == 8
+    assert {r.rates_version for r in ListingFinancial.query.all()} == {rates.version}
+
+
+def test_read_of_uncached_listing_does_not_write(client):
+    financials = ListingFinancialsService().get(1)
+    assert set(financials) == {'caixa_sac_20', 'caixa_sac_30', 'caixa_price_20', 'caixa_price_30'}
+    assert ListingFinancial.query.count() == 0
+
+
+def test_quick_estimate_by_imovel_id_reads_stored_metrics(client):
+    res = client.post('/api/financing/quick-estimate', json={'imovel_id': 1})
+    body = res.get_json()
+    assert res.status_code == 200
+    assert body['precomputed'] is True
+    assert set(body['financials']) == {'caixa_sac_20', 'caixa_sac_30', 'caixa_price_20', 'caixa_price_30'}
+
+    assert client.post('/api/financing/quick-estimate', json={'imovel_id': 3}).status_code == 404
+    assert client.post('/api/financing/quick-estimate', json={'imovel_id': 'abc'}).status_code == 400
+
+
+def test_rate_update_writes_instance_file_not_tracked_defaults(tmp_path):
+    defaults = tmp_path / 'defaults.json'
+    shutil.copy(market_rates.defaults_path, defaults)
+    original = defaults.read_text(encoding='utf-8')
+    service = MarketRatesService(path=str(tmp_path / 'instance' / 'rates.json'), check_interval=0,
+                                 defaults_path=str(defaults))
+    version = service.version
+
+    assert service.update('financing', {'caixa_sac': 9.5}) != version
+    assert service.financing_rate('caixa_sac') == 9.5
+    assert (tmp_path / 'instance' / 'rates.json').exists()
+    assert defaults.read_text(encoding='utf-8') == original
@@ -0,0 +1,97 @@
+import os
+import sys
+
+import pytest
+
+# Ensure backend package is on path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Configure test environment before importing app
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+os.environ['SECRET_KEY'] = 'test-secret'
+
+from src.main import app  # noqa: E402
+from src.models.user import db  # noqa: E402
+from src.models.imovel import Imovel  # noqa: E402
+from src.models.listing_load import ListingLoad  # noqa: E402
+
+HEADER = (
+    "Lista de Imóveis da Caixa\n"
+    "\n"
+    "N° do imóvel;UF;Cidade;Bairro;Endereço;Preço;Valor de avaliação;Desconto;Descrição;Modalidade de venda;Link de acesso\n"
+)
+
+
+@pytest.fixture
+def app_ctx():
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def write_csv(tmp_path, lines):
+    path = tmp_path / 'lista.csv'
+    path.write_text(HEADER + '\n'.join(lines) + '\n', encoding='utf-8')
+    return str(path)
+
+
+def test_load_command_upserts_and_audits(app_ctx, tmp_path):
+    path = write_csv(tmp_path, [
+        '100; SP ;SAO PAULO;MOOCA;RUA A, 1;150.000,00;200.000,00;25,00;'
+        'Apartamento, 55.00 de área total, 2 qto(s), 1 vaga(s).;Venda Online;http://x/100',
+        '200;RJ;NITEROI;ICARAI;RUA B, 2;300000,00;400000,00;25;Casa, 3 qto(s).;Leilão;http://x/200',
+        'linha quebrada',
+    ])
+
+    runner = app_ctx.test_cli_runner()
+    result = runner.invoke(args=['imoveis', 'load', path])
+    assert result.exit_code == 0, result.output
+
+    imovel = Imovel.query.filter_by(numero_imovel='100').one()
+    assert imovel.uf == 'SP'
+    assert imovel.preco == 150000.0
+    assert imovel.tipo_imovel == 'Apartamento'
+    assert imovel.quartos == 2 and imovel.vagas_garagem == 1
+    assert imovel.area_total == 55.0
+
+    audit = ListingLoad.query.one()
+    assert (audit.status, audit.rows_read, audit.rows_upserted, audit.rows_rejected) == ('success', 3, 2, 1)
+
+    # Segunda carga atualiza o preço sem duplicar o imóvel
+    path = write_csv(tmp_path, [
+        '100;SP;SAO PAULO;MOOCA;RUA A, 1;140.000,00;200.000,00;30,00;Apartamento.;Venda Online;http://x/100',
+    ])
+    assert runner.invoke(args=['imoveis', 'load', path]).exit_code == 0
+    db.session.expire_all()
+    assert Imovel.query.count() == 2
+    assert Imovel.query.filter_by(numero_imovel='100').one().preco == 140000.0
+
+
+def test_load_keeps_last_duplicate_and_preserves_unmapped_columns(app_ctx, tmp_path):
+    db.session.add(Imovel(numero_imovel='100', uf='SP', cidade='SAO PAULO', endereco='RUA A, 1',
+                          aceita_financiamento=True, status_ocupacao='Desocupado'))
+    db.session.commit()
+    path = write_csv(tmp_path, [
+        '100;SP;SAO PAULO;MOOCA;RUA A, 1;150.000,00;200.000,00;25,00;Apartamento.;Venda Online;http://x/100',
+        '100;SP;SAO PAULO;MOOCA;RUA A, 1;145.000,00;200.000,00;27,50;Apartamento.;Venda Online;http://x/100',
+    ])
+    assert app_ctx.test_cli_runner().invoke(args=['imoveis', 'load', path]).exit_code == 0
+    db.session.expire_all()
+
+    imovel = Imovel.query.filter_by(numero_imovel='100').one()
+    assert imovel.preco == 145000.0
+    assert imovel.aceita_financiamento is True and imovel.status_ocupacao == 'Desocupado'
+
+
+def test_rows_without_address_are_rejected(app_ctx, tmp_path):
+    path = write_csv(tmp_path, [
+        '100;SP;SAO PAULO;MOOCA; ;150.000,00;200.000,00;25,00;Apartamento.;Venda Online;http://x/100',
+        '200;RJ;NITEROI;ICARAI;RUA B, 2;300000,00;400000,00;25;Casa.;Leilão;http://x/200',
+    ])
+    assert app_ctx.test_cli_runner().invoke(args=['imoveis', 'load', path]).exit_code == 0
+
+    audit = ListingLoad.query.one()
+    assert (audit.status, audit.rows_upserted, audit.rows_rejected) == ('success', 1, 1)
+    assert [i.numero_imovel for i in Imovel.query.all()] == ['200']
@@ -0,0 +1,89 @@
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+# Ensure backend package is on path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Configure test environment before importing app
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+os.environ['SECRET_KEY'] = 'test-secret'
+
+from src.main import app  # noqa: E402
+from src.models.user import db  # noqa: E402
+from src.models.imovel import Imovel  # noqa: E402
+from src.models.market_stat import MarketStat  # noqa: E402
+from src.services.market_stats import MarketStatsService, stats_version  # noqa: E402
+
+
+def make_imovel(numero, uf, cidade, bairro, preco, desconto, area, tipo='Apartamento'):
+    return Imovel(numero_imovel=numero, uf=uf, cidade=cidade, bairro=bairro, endereco='RUA X',
+                  preco=preco, desconto=desconto, area_total=area, tipo_imovel=tipo)
+
+
+@pytest.fixture
+def client():
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            make_imovel('1', 'SP', 'SAO PAULO', 'MOOCA', 100000, 20, 50),
+            make_imovel('2', 'SP', 'SAO PAULO', 'MOOCA', 200000, 40, 100),
+            make_imovel('3', 'SP', 'CAMPINAS', 'CENTRO', 300000, 30, 100, tipo='Casa'),
+            make_imovel('4', 'PE', 'RECIFE', 'BOA VIAGEM', 400000, 10, 80),
+        ])
+        db.session.commit()
+        MarketStatsService().refresh()
+        yield app.test_client()
+        db.session.remove()
+        db.drop_all()
+
+
+def test_stats_for_city_and_national(client):
+    res = client.get('/api/market/stats', query_string={'uf': 'sp', 'cidade': 'Sao Paulo'})
+    assert res.status_code == 200
+    stats = res.get_json()['stats']
+    assert stats['count'] == 2
+    assert stats['preco']['p50'] == 150000
+    assert stats['preco_m2']['p50'] == 2000
+    assert stats['desconto']['mean'] == 30
+
+    national = client.get('/api/market/stats').get_json()['stats']
+    assert national['count'] == 4
+
+
+def test_group_by_lists_cities_ordered_by_count(client):
+    res = client.get('/api/market/stats', query_string={'uf': 'SP', 'group_by': 'cidade'})
+    stats = res.get_json()['stats']
+    assert [(s['cidade'], s['count']) for s in stats] == [('SAO PAULO', 2), ('CAMPINAS', 1)]
+
+    res = client.get('/api/market/stats', query_string={'uf': 'SP', 'group_by': 'tipo_imovel'})
+    assert {s['tipo_imovel']: s['count'] for s in res.get_json()['stats']} == {'Apartamento': 2, 'Casa': 1}
+
+
+def test_incremental_refresh_only_rewrites_affected_uf(client):
+    db.session.add(make_imovel('5', 'PE', 'RECIFE', 'BOA VIAGEM', 500000, 10, 100))
+    db.session.commit()
+    MarketStatsService().refresh(ufs=['PE'])
+
+    recife = client.get('/api/market/stats', query_string={'uf': 'PE', 'cidade': 'RECIFE'}).get_json()['stats']
+    assert recife['count'] == 2
+    assert client.get('/api/market/stats').get_json()['stats']['count'] == 5
+    assert client.get('/api/market/stats', query_string={'uf': 'SP'}).get_json()['stats']['count'] == 3
+
+
+def test_unknown_slice_returns_404(client):
+    assert client.get('/api/market/stats', query_string={'uf': 'AM'}).status_code == 404
+
+
+def test_refresh_from_another_process_reaches_cached_workers(client):
+    assert client.get('/api/market/stats').get_json()['stats']['count'] == 4
+
+    # Outro processo regrava os agregados; o cache local deste não é limpo
+    MarketStat.query.filter_by(uf='', tipo_imovel='').update({'count': 7, 'refreshed_at': datetime.utcnow()})
+    db.session.commit()
+    assert client.get('/api/market/stats').get_json()['stats']['count'] == 4
+
+    stats_version._checked_at = 0.0  # passou o intervalo de releitura da versão
+    assert client.get('/api/market/stats').get_json()['stats']['count'] == 7
@@ -0,0 +1,93 @@
+import io
+import json
+import os
+import sys
+
+import pytest
+
+# Ensure backend package is on path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Configure test environment before importing app
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+os.environ['SECRET_KEY'] = 'test-secret'
+
+from src.main import app  # noqa: E402
+from src.services.bedrock_service import BedrockService  # noqa: E402
+from src.services.cache import TTLCache  # noqa: E402
+from src.services.metrics import MetricsRegistry  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    with app.app_context():
+        yield app.test_client()
+
+
+def sample(text, line_prefix):
+    return [float(line.rsplit(' ', 1)[1]) for line in text.splitlines() if line.startswith(line_prefix)]
+
+
+def test_metrics_endpoint_counts_routes(client):
+    client.get('/health')
+    client.get('/health')
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    text = response.get_data(as_text=True)
+    assert sample(text, 'http_requests_total{blueprint="",route="/health",method="GET",status="200"}')[0] >= 2
+    assert sample(text, 'http_request_duration_seconds_count{blueprint="",route="/health",method="GET"}')[0] >= 2
+    assert '# TYPE http_request_duration_seconds histogram' in text
+    # A própria requisição de /metrics está em andamento
+    assert sample(text, 'http_requests_in_flight{blueprint="metrics"}') == [1.0]
+
+
+def test_cache_hit_ratio_is_exposed(client):
+    cache = TTLCache(name='test_metrics_cache')
+    cache.set('a', 1)
+    cache.get('a')
+    cache.get('b')
+    text = client.get('/metrics').get_data(as_text=True)
+    assert sample(text, 'cache_hits_total{cache="test_metrics_cache"}') == [1.0]
+    assert sample(text, 'cache_hit_ratio{cache="test_metrics_cache"}') == [0.5]
+
+
+def test_bedrock_duration_and_tokens(client):
+    service = BedrockService.__new__(BedrockService)
+    service.model_id = 'test-model'
+
+    class Runtime:
+        def invoke_model(self, **kwargs):
+            body = {'content': [{'text': 'ok'}], 'usage': {'input_tokens': 12, 'output_tokens': 5}}
+            return {'body': io.BytesIO(json.dumps(body).encode())}
+
+    service.bedrock_runtime = Runtime()
+    assert service._invoke_claude('prompt') == 'ok'
+    text = client.get('/metrics').get_data(as_text=True)
+    assert sample(text, 'bedrock_tokens_total{model="test-model",direction="input"}')[0] >= 12
+    assert sample(text, 'bedrock_request_duration_seconds_count{model="test-model",outcome="success"}')[0] >= 1
+
+
+def test_multiprocess_aggregation(tmp_path):
+    def worker():
+        metrics = MetricsRegistry(multiproc_dir=str(tmp_path))
+        return (metrics, metrics.counter('jobs_total', 'Jobs', ('kind',)), metrics.gauge('busy', 'Busy'),
+                metrics.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0)))
+
+    metrics, jobs, busy, latency = worker()
+    jobs.inc(('a',), 2)
+    busy.inc()
+    latency.observe((), 0.5)
+    metrics.flush()
+
+    # Outro worker vivo (pid 1) e um que já terminou
+    (tmp_path / '1.json').write_text(json.dumps(
+        {'jobs_total': [[['a'], 3]], 'busy': [[[], 4]], 'latency_seconds': [[[], [1, 0, 0, 0.05]]]}))
+    (tmp_path / '999999999.json').write_text(json.dumps({'jobs_total': [[['a'], 5]], 'busy': [[[], 7]]}))
+
+    text = metrics.render()
+    assert sample(text, 'jobs_total{kind="a"}') == [10.0]
+    assert sample(text, 'busy ') == [5.0]
+    assert sample(text, 'latency_seconds_bucket{le="0.1"}') == [1.0]
+    assert sample(text, 'latency_seconds_bucket{le="1.0"}') == [2.0]
+    assert sample(text, 'latency_seconds_count') == [2.0]
@@ -0,0 +1,77 @@
+import os
+import sys
+
+import pytest
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# Ensure backend package is on path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Configure test environment before importing app
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+os.environ['SECRET_KEY'] = 'test-secret'
+
+from src.main import app  # noqa: E402
+from src.models.user import User, db  # noqa: E402
+from src.routes import auth as auth_routes  # noqa: E402
+from src.services.password_hasher import HashingBusyError, PasswordHasher  # noqa: E402
+
+FAST_METHOD = 'pbkdf2:sha256:1000'
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(auth_routes, 'password_hasher', PasswordHasher(method=FAST_METHOD, workers=0))
+    with app.app_context():
+        db.create_all()
+        yield app.test_client()
+        db.session.remove()
+        db.drop_all()
+
+
+def test_pool_hash_and_verify():
+    hasher = PasswordHasher(method=FAST_METHOD, workers=1)
+    try:
+        stored = hasher.hash('secret')
+        assert stored.startswith('pbkdf2:sha256:1000$')
+        assert hasher.verify(stored, 'secret') == (True, None)
+        assert hasher.verify(stored, 'wrong') == (False, None)
+    finally:
+        hasher.shutdown()
+
+
+def test_rehash_when_method_changes():
+    hasher = PasswordHasher(method=FAST_METHOD, workers=0)
+    old = generate_password_hash('secret', method='pbkdf2:sha256:2000')
+    assert hasher.needs_rehash(old)
+    valid, new_hash = hasher.verify(old, 'secret')
+    assert valid and new_hash.startswith('pbkdf2:sha256:1000$')
+    assert check_password_hash(new_hash, 'secret')
+    assert hasher.verify(old, 'wrong') == (False, None)
+
+
+def test_busy_pool_rejects(monkeypatch):
+    hasher = PasswordHasher(method=FAST_METHOD, workers=1)
+    monkeypatch.setattr(hasher._slots, 'acquire', lambda blocking=True: False)
+    with pytest.raises(HashingBusyError):
+        hasher.hash('secret')
+
+
+def test_login_rehashes_stored_password(client):
+    user = User(username='tester', email='test@example.com',
+                password=generate_password_hash('password', method='pbkdf2:sha256:2000'))
+    db.session.add(user)
+    db.session.commit()
+
+    credentials = {'username': 'tester', 'email': 'test@example.com', 'password': 'password'}
+    response = client.post('/api/login', json=credentials)
+    assert response.status_code == 200
+    assert db.session.get(User, user.id).password.startswith('pbkdf2:sha256:1000$')
+
+    assert client.post('/api/login', json={**credentials, 'password': 'nope'}).status_code == 401
+
+
+def test_register_hashes_with_configured_method(client):
+    response = client.post('/api/register', json={'username': 'new', 'email': 'new@example.com', 'password': 'pw'})
+    assert response.status_code == 201
+    assert User.query.filter_by(username='new').one().password.startswith('pbkdf2:sha256:1000$')
@@ -0,0 +1,117 @@
+import itertools
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Ensure backend package is on path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Configure test environment before importing app
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+os.environ['SECRET_KEY'] = 'test-secret'
+
+from src.main import app  # noqa: E402
+from src.models.user import db  # noqa: E402
+from src.models.imovel import Imovel  # noqa: E402
+from src.services.portfolio_optimizer import solve_knapsack  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    with app.app_context():
+        db.create_all()
+        yield app.test_client()
+        db.session.remove()
+        db.drop_all()
+
+
+def brute_force(weights, profits, capacity, groups, limits):
+    best = 0.0
+    for size in range(len(weights) + 1):
+        for subset in itertools.combinations(range(len(weights)), size):
+            subset = list(subset)
+            if weights[subset].sum() > capacity:
+                continue
+            if any(np.bincount(g[subset], minlength=g.max() + 1).max(initial=0) > limit
+                   for g, limit in zip(groups, limits)):
+                continue
+            best = max(best, profits[subset].sum())
+    return best
+
+
+def test_knapsack_matches_brute_force():
+    rng = np.random.default_rng(7)
+    for _ in range(20):
+        weights = rng.uniform(1, 10, 10)
+        profits = rng.uniform(-3, 10, 10)
+        cities = rng.integers(0, 3, 10)
+        result = solve_knapsack(weights, profits, 20.0, [cities], [2])
+        assert result['optimal']
+        assert result['profit'] == pytest.approx(brute_force(weights, profits, 20.0, [cities], [2]))
+        assert weights[result['selected']].sum() <= 20.0
+
+
+def test_knapsack_beats_greedy():
+    # Guloso pega o item de maior razão e perde os dois que enchem a mochila
+    result = solve_knapsack(np.array([6.0, 5.0, 5.0]), np.array([7.0, 5.0, 5.0]), 10.0)
+    assert result['selected'] == [1, 2]
+    assert result['profit'] == 10.0
+
+
+def add_listing(numero, cidade, tipo, preco, avaliacao, desconto, cluster_id=None, financiamento=True):
+    imovel = Imovel(numero_imovel=numero, uf='SP', cidade=cidade, endereco=f'RUA {numero}',
+                    tipo_imovel=tipo, preco=preco, valor_avaliacao=avaliacao, desconto=desconto,
+                    aceita_financiamento=financiamento, cluster_id=cluster_id)
+    db.session.add(imovel)
+    db.session.flush()
+    return imovel
+
+
+def test_portfolio_optimizer_endpoint_respects_constraints(client):
+    a = add_listing('1', 'SAO PAULO', 'Apartamento', 200000, 320000, 37.5)
+    add_listing('2', 'SAO PAULO', 'Apartamento', 210000, 330000, 36.4)
+    c = add_listing('3', 'CAMPINAS', 'Casa', 180000, 260000, 30.8)
+    add_listing('4', 'CAMPINAS', 'Casa', 150000, 155000, 3.2)  # desconto baixo
+    add_listing('5', 'SAO PAULO', 'Apartamento', 90000, 200000, 55.0, financiamento=False)
+    db.session.commit()
+    relisting = add_listing('6', 'SAO PAULO', 'Apartamento', 200000, 320000, 37.5)
+    relisting.cluster_id = a.id
+    a.cluster_id = a.id
+    db.session.commit()
+
+    response = client.post('/api/analysis/portfolio-optimizer', json={
+        'budget': 200000, 'max_per_city': 1, 'min_discount': 10,
+    })
+    assert response.status_code == 200
+    data = response.get_json()
+    ids = [item['id'] for item in data['selected']]
+    assert len(ids) == 2
+    assert c.id in ids
+    assert data['summary']['optimal']
+    assert data['summary']['capital_used'] <= 200000
+    assert data['summary']['candidates'] == 4  # sem o 4 (desconto) e o 5 (não financia)
+
+    response = client.post('/api/analysis/portfolio-optimizer', json={'budget': 200000, 'profile': 'x'})
+    assert response.status_code == 400
+    assert client.post('/api/analysis/portfolio-optimizer', json={}).status_code == 400
+    response = client.post('/api/analysis/portfolio-optimizer', json={'budget': 200000, 'imovel_ids': ['a']})
+    assert response.status_code == 400
+
+
+def test_city_filter_applies_before_candidate_limit(client, monkeypatch):
+    monkeypatch.setattr('src.services.portfolio_optimizer.MAX_CANDIDATES', 2)
+    add_listing('1', 'SAO PAULO', 'Apartamento', 200000, 320000, 37.5)
+    add_listing('2', 'SAO PAULO', 'Apartamento', 210000, 330000, 36.4)
+    campinas = add_listing('3', 'Campinas', 'Casa', 180000, 260000, 30.8)
+    db.session.commit()
+
+    summary = client.post('/api/analysis/portfolio-optimizer', json={
+        'budget': 200000, 'cidades': ['CAMPINAS'],
+    }).get_json()
+    assert [item['id'] for item in summary['selected']] == [campinas.id]
+    assert summary['summary']['truncated'] is False
+
+    summary = client.post('/api/analysis/portfolio-optimizer', json={'budget': 200000}).get_json()['summary']
+    assert summary['truncated'] is True and summary['optimal'] is False
@@ -0,0 +1,95 @@
+import os
+import sys
+
+import pytest
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+# Ensure backend package is on path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Configure test environment before importing app
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+os.environ['SECRET_KEY'] = 'test-secret'
+
+from src.main import app  # noqa: E402
+from src.models.user import User, db  # noqa: E402
+from src.routes.auth import _generate_token, _token_required  # noqa: E402
+from src.services.principal_cache import principal_cache  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    with app.app_context():
+        db.create_all()
+        principal_cache.clear()
+        yield app.test_client()
+        db.session.remove()
+        db.drop_all()
+        principal_cache.stateless = False
+
+
+@pytest.fixture
+def user(client):
+    user = User(username='tester', email='test@example.com', password=generate_password_hash('password'))
+    db.session.add(user)
+    db.session.commit()
+    db.session.refresh(user)
+    return user
+
+
+@_token_required
+def whoami(current_user):
+    return current_user.to_dict()
+
+
+def call_with(token):
+    with app.test_request_context(headers={'Authorization': f'Bearer {token}'}):
+        return whoami()
+
+
+@pytest.fixture
+def statements(user):
+    executed = []
+
+    def record(conn, cursor, statement, *args):
+        executed.append(statement)
+
+    db.session.expunge_all()  # força a ida ao banco na primeira resolução
+    event.listen(db.engine, 'before_cursor_execute', record)
+    yield executed
+    event.remove(db.engine, 'before_cursor_execute', record)
+
+
+def test_principal_is_cached_between_requests(user, statements):
+    token = _generate_token(user)
+    assert call_with(token)['username'] == 'tester'
+    for _ in range(5):
+        assert call_with(token)['email'] == 'test@example.com'
+    assert len([s for s in statements if 'FROM users' in s]) == 1
+
+
+def test_update_and_delete_invalidate_cache(client, user):
+    token = _generate_token(user)
+    call_with(token)
+
+    response = client.put(f'/api/users/{user.id}', json={'username': 'renamed', 'email': 'test@example.com'})
+    assert response.status_code == 200
+    assert call_with(token)['username'] == 'renamed'
+
+    assert client.delete(f'/api/users/{user.id}').status_code == 204
+    response, status = call_with(token)
+    assert status == 401
+
+
+def test_stateless_mode_trusts_claims(user, statements):
+    principal_cache.stateless = True
+    token = _generate_token(user)
+    assert call_with(token)['username'] == 'tester'
+    assert statements == []
+    assert len(principal_cache.cache) == 0
+
+
+def test_invalid_token_is_rejected(user):
+    response, status = call_with('not-a-token')
+    assert status == 401
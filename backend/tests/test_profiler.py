@@ -0,0 +1,88 @@
+import os
+import pstats
+import sys
+import time
+
+import pytest
+from flask import Flask
+
+# Ensure backend package is on path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Configure test environment before importing app
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+os.environ['SECRET_KEY'] = 'test-secret'
+
+from src.main import app as main_app  # noqa: E402
+from src.routes.profiling import profiling_bp  # noqa: E402
+from src.services import profiler as profiler_module  # noqa: E402
+from src.services.profiler import RequestProfiler  # noqa: E402
+
+TOKEN = 'admin-secret'
+
+
+def slow_handler():
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+    return {'ok': True}
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler_module, 'profiler',
+                        RequestProfiler(directory=str(tmp_path), admin_token=TOKEN, interval=0.001, max_files=2))
+    monkeypatch.setattr('src.routes.profiling.profiler', profiler_module.profiler)
+    app = Flask(__name__)
+    app.add_url_rule('/slow', view_func=slow_handler)
+    app.register_blueprint(profiling_bp, url_prefix='/api/admin')
+    profiler_module.init_app(app)
+    return app.test_client()
+
+
+def test_disabled_profiler_installs_no_hooks(monkeypatch):
+    monkeypatch.setattr(profiler_module, 'profiler', RequestProfiler(admin_token='', sample_rate=0))
+    app = Flask(__name__)
+    profiler_module.init_app(app)
+    assert not app.before_request_funcs and not app.after_request_funcs
+    assert main_app.test_client().get('/api/admin/profiles').status_code == 404
+
+
+def test_admin_header_profiles_request(client, tmp_path):
+    assert 'X-Profile-Id' not in client.get('/slow').headers
+    assert 'X-Profile-Id' not in client.get('/slow', headers={'X-Profile-Request': 'wrong'}).headers
+
+    response = client.get('/slow', headers={'X-Profile-Request': TOKEN})
+    assert response.get_json() == {'ok': True}
+    name = response.headers['X-Profile-Id']
+    assert name.endswith('GET_slow')
+
+    stats = pstats.Stats(str(tmp_path / f'{name}.prof'))
+    assert any(func[2] == 'slow_handler' for func in stats.stats)
+    collapsed = (tmp_path / f'{name}.collapsed').read_text()
+    assert 'slow_handler (test_profiler.py' in collapsed
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in collapsed.splitlines())
+
+
+def test_admin_endpoints_list_download_and_prune(client):
+    for _ in range(3):
+        client.get('/slow', headers={'X-Profile-Request': TOKEN})
+
+    assert client.get('/api/admin/profiles').status_code == 403
+    listing = client.get('/api/admin/profiles', headers={'X-Admin-Token': TOKEN}).get_json()
+    assert listing['count'] == 4  # dois perfis mais recentes, .prof e .collapsed
+
+    name = next(p['name'] for p in listing['profiles'] if p['name'].endswith('.collapsed'))
+    download = client.get(f'/api/admin/profiles/{name}', headers={'X-Admin-Token': TOKEN})
+    assert download.status_code == 200 and b'slow_handler' in download.data
+    assert client.get('/api/admin/profiles/..%2Fsecret.prof', headers={'X-Admin-Token': TOKEN}).status_code == 404
+
+
+def test_sampling_rate_profiles_without_header(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler_module, 'profiler',
+                        RequestProfiler(directory=str(tmp_path), sample_rate=1.0, collapsed=False))
+    app = Flask(__name__)
+    app.add_url_rule('/slow', view_func=slow_handler)
+    profiler_module.init_app(app)
+    name = app.test_client().get('/slow').headers['X-Profile-Id']
+    assert os.listdir(tmp_path) == [f'{name}.prof']
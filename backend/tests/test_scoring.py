@@ -0,0 +1,119 @@
+import json
+import os
+import random
+import sys
+
+import numpy as np
+import pytest
+
+# Ensure backend package is on path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Configure test environment before importing app
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+os.environ['SECRET_KEY'] = 'test-secret'
+
+from src.main import app  # noqa: E402
+from src.models.user import db  # noqa: E402
+from src.models.imovel import Imovel  # noqa: E402
+from src.services.scoring import quick_score, ranking_engine  # noqa: E402
+from src.services.profiler import RequestProfiler  # noqa: E402
+from src.services.scoring_rules import RuleEngine, rule_engine  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    with app.app_context():
+        db.create_all()
+        ranking_engine.invalidate()
+        db.session.add_all([
+            Imovel(numero_imovel='1', uf='SP', cidade='SAO PAULO', endereco='X', preco=120000,
+                   valor_avaliacao=240000, area_total=60, aceita_financiamento=True),
+            Imovel(numero_imovel='2', uf='SP', cidade='CAMPINAS', endereco='X', preco=250000,
+                   valor_avaliacao=280000, area_total=120, aceita_financiamento=False),
+            Imovel(numero_imovel='3', uf='SP', cidade='SAO PAULO', endereco='X', preco=450000,
+                   valor_avaliacao=900000, area_total=150, aceita_financiamento=True),
+            Imovel(numero_imovel='4', uf='RJ', cidade='RIO DE JANEIRO', endereco='X', preco=100000,
+                   valor_avaliacao=200000, area_total=80, aceita_financiamento=True),
+        ])
+        db.session.commit()
+        yield app.test_client()
+        ranking_engine.invalidate()
+        db.session.remove()
+        db.drop_all()
+
+
+def test_quick_score_endpoint(client):
+    res = client.post('/api/analysis/quick-score', json={
+        'valor_avaliacao': 200000, 'valor_venda': 110000, 'aceita_financiamento': True,
+        'situacao_ocupacao': 'desocupado', 'area_total': 70, 'cidade': 'São Paulo',
+    })
+    analysis = res.get_json()['quick_analysis']
+    assert analysis['score'] == 97
+    assert analysis['recommendation'] == 'forte_compra'
+    assert analysis['factors'][0] == 'Excelente desconto: 45.0%'
+
+
+def test_vectorized_score_matches_scalar_rules():
+    rng = random.Random(7)
+    cases = []
+    for _ in range(500):
+        cases.append({
+            'valor_avaliacao': rng.choice([0, rng.uniform(50000, 900000)]),
+            'valor_venda': rng.uniform(30000, 900000),
+            'aceita_financiamento': rng.random() < 0.5,
+            'situacao_ocupacao': rng.choice(['desocupado', 'ocupado']),
+            'area_total': rng.choice([0, rng.uniform(20, 300)]),
+            'cidade': rng.choice(['Recife', 'Olinda', 'BRASILIA', 'Campinas']),
+        })
+
+    vectorized = rule_engine.current().score_batch({
+        field: np.array([c[field] for c in cases], dtype=object if field in ('cidade', 'situacao_ocupacao') else None)
+        for field in cases[0]
+    })
+    assert list(vectorized) == [quick_score(c)['score'] for c in cases]
+
+
+def test_rank_filters_and_orders(client):
+    res = client.post('/api/analysis/rank', json={'uf': 'SP', 'max_price': 300000, 'limit': 10})
+    assert res.status_code == 200
+    results = res.get_json()['results']
+    assert [r['numero_imovel'] for r in results] == ['1', '2']
+    assert results[0]['score'] == 40 + 20 + 7 + 10
+
+    res = client.post('/api/analysis/rank', json={'cidade': 'São Paulo', 'limit': 1})
+    assert [r['numero_imovel'] for r in res.get_json()['results']] == ['3']
+
+
+def test_rank_rejects_non_numeric_parameters(client):
+    assert client.post('/api/analysis/rank', json={'limit': 'dez'}).status_code == 400
+    assert client.post('/api/analysis/rank', json={'min_price': 'barato'}).status_code == 400
+
+
+def test_rules_hot_reload_and_invalid_file_keeps_previous(tmp_path):
+    path = tmp_path / 'rules.json'
+    definition = json.loads(open(rule_engine.path, encoding='utf-8').read())
+    path.write_text(json.dumps(definition), encoding='utf-8')
+    engine = RuleEngine(path=str(path), check_interval=0)
+    assert engine.current().evaluate({'aceita_financiamento': True})['score'] == 25
+
+    definition['version'] = '2024.2'
+    definition['factors'][1]['points'] = 30
+    path.write_text(json.dumps(definition), encoding='utf-8')
+    os.utime(path, ns=(1, 10 ** 18))
+    rules = engine.current()
+    assert rules.version == '2024.2'
+    assert rules.evaluate({'aceita_financiamento': True})['score'] == 35
+
+    path.write_text('{invalid', encoding='utf-8')
+    os.utime(path, ns=(1, 2 * 10 ** 18))
+    assert engine.current().version == '2024.2'
+    assert [h['version'] for h in engine.history] == ['2024.1', '2024.2']
+
+
+def test_rules_reload_requires_admin_token(client, monkeypatch):
+    assert client.post('/api/analysis/scoring-rules/reload').status_code == 404
+    monkeypatch.setattr('src.routes.profiling.profiler', RequestProfiler(admin_token='admin-secret'))
+    assert client.post('/api/analysis/scoring-rules/reload', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+    res = client.post('/api/analysis/scoring-rules/reload', headers={'X-Admin-Token': 'admin-secret'})
+    assert res.status_code == 200 and res.get_json()['version'] == rule_engine.current().version
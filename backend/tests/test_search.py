@@ -0,0 +1,56 @@
+import os
+import sys
+
+import pytest
+
+# Ensure backend package is on path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Configure test environment before importing app
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+os.environ['SECRET_KEY'] = 'test-secret'
+
+from src.main import app  # noqa: E402
+from src.models.user import db  # noqa: E402
+from src.models.imovel import Imovel  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Imovel(numero_imovel='1', uf='PE', cidade='RECIFE', bairro='BOA VIAGEM',
+                   endereco='RUA DOS NAVEGANTES, 100',
+                   descricao='Apartamento, 60.00 de área total, 2 qto(s), 1 vaga(s), sala.'),
+            Imovel(numero_imovel='2', uf='PE', cidade='RECIFE', bairro='CASA AMARELA',
+                   endereco='RUA BOA VIAGEM, 20',
+                   descricao='Casa, 120.00 de área total, 3 qto(s), sala.'),
+            Imovel(numero_imovel='3', uf='SP', cidade='SÃO PAULO', bairro='MOOCA',
+                   endereco='RUA DA MOOCA, 5',
+                   descricao='Apartamento, 45.00 de área total, 2 qto(s), 1 vaga(s).'),
+        ])
+        db.session.commit()
+        yield app.test_client()
+        db.session.remove()
+        db.drop_all()
+
+
+def test_search_ranks_matching_listing(client):
+    res = client.get('/api/imoveis/search', query_string={'q': 'apartamento 2 qto(s) vaga Boa Viagem'})
+    assert res.status_code == 200
+    data = res.get_json()
+    assert [r['numero_imovel'] for r in data['results']] == ['1']
+
+
+def test_search_is_accent_insensitive_and_filters_by_uf(client):
+    res = client.get('/api/imoveis/search', query_string={'q': 'mooca apartamento', 'uf': 'sp'})
+    assert [r['numero_imovel'] for r in res.get_json()['results']] == ['3']
+
+    res = client.get('/api/imoveis/search', query_string={'q': 'area total', 'uf': 'PE'})
+    assert {r['numero_imovel'] for r in res.get_json()['results']} == {'1', '2'}
+
+
+def test_search_requires_query(client):
+    res = client.get('/api/imoveis/search')
+    assert res.status_code == 400
@@ -0,0 +1,92 @@
+import io
+import json
+import logging
+import os
+import sys
+
+import pytest
+
+# Ensure backend package is on path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Configure test environment before importing app
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+os.environ['SECRET_KEY'] = 'test-secret'
+
+from src.main import app  # noqa: E402
+from src.models.user import db  # noqa: E402
+from src.services.structured_logging import (  # noqa: E402
+    AsyncQueueHandler, SamplingFilter, configure_logging, flush_logs, parse_sample_rates,
+)
+
+
+@pytest.fixture
+def output():
+    stream = io.StringIO()
+    configure_logging(level='INFO', fmt='json', sample_rates='', output=logging.StreamHandler(stream))
+    yield stream
+    configure_logging()
+
+
+@pytest.fixture
+def client():
+    with app.app_context():
+        db.create_all()
+        yield app.test_client()
+        db.session.remove()
+        db.drop_all()
+
+
+def records(stream):
+    flush_logs()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_request_logs_are_json_with_context(client, output):
+    payload = {'property_value': 300000, 'down_payment': 60000, 'interest_rate': 10, 'loan_term': 360}
+    client.post('/api/financing/calculate', json=payload, headers={'X-Request-ID': 'req-42'})
+    logged = [r for r in records(output) if r.get('request_id') == 'req-42']
+
+    message = next(r for r in logged if r['logger'] == 'src.routes.financing')
+    assert message['message'].endswith('R$ 300000')
+    assert message['route'] == '/api/financing/calculate' and message['method'] == 'POST'
+
+    access = next(r for r in logged if r['logger'] == 'src.access')
+    assert access['status'] == 200 and access['latency_ms'] > 0 and access['level'] == 'INFO'
+
+
+def test_user_id_and_exception_are_recorded(client, output):
+    tokens = client.post('/api/register', json={'username': 'u', 'email': 'u@example.com', 'password': 'pw'}).get_json()
+    client.post('/api/logout', headers={'Authorization': f"Bearer {tokens['token']}"})
+    logout = next(r for r in records(output) if r.get('route') == '/api/logout')
+    assert logout['user_id'] == tokens['user']['id']
+
+    try:
+        raise ValueError('boom')
+    except ValueError as e:
+        logging.getLogger('test').exception('Falhou: %s', e)
+    error = records(output)[-1]
+    assert error['message'] == 'Falhou: boom' and 'ValueError: boom' in error['exception']
+
+
+def test_queue_handler_defers_formatting():
+    record = logging.LogRecord('test', logging.INFO, __file__, 1, 'valor %s', (1,), None)
+    prepared = AsyncQueueHandler(None).prepare(record)
+    assert prepared.msg == 'valor %s' and prepared.args == (1,)
+
+
+def test_level_sampling():
+    rates = parse_sample_rates('INFO=0, DEBUG=0.5')
+    assert rates == {logging.INFO: 0.0, logging.DEBUG: 0.5}
+    sampler = SamplingFilter(rates)
+
+    def make(level, **extra):
+        record = logging.LogRecord('test', level, __file__, 1, 'msg', (), None)
+        record.__dict__.update(extra)
+        return record
+
+    assert not sampler.filter(make(logging.INFO))
+    assert sampler.filter(make(logging.INFO, log_always=True))
+    assert sampler.filter(make(logging.WARNING))
+    with pytest.raises(ValueError):
+        parse_sample_rates('ERROR=0.1')
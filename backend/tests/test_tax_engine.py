@@ -0,0 +1,100 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Ensure backend package is on path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Configure test environment before importing app
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+os.environ['SECRET_KEY'] = 'test-secret'
+
+from src.main import app  # noqa: E402
+from src.services.tax_engine import (  # noqa: E402
+    TaxProfile, capital_gains_tax, compute_capital_gains, progressive_tax, reduction_factors, tax_cache,
+)
+from src.services.financing_calculator import FinancingCalculatorService, FinancingInputs  # noqa: E402
+
+
+def test_progressive_brackets_are_marginal():
+    taxes = progressive_tax([100_000, 5_000_000, 6_000_000, 40_000_000])
+    assert taxes[0] == pytest.approx(15_000)
+    assert taxes[1] == pytest.approx(750_000)
+    assert taxes[2] == pytest.approx(750_000 + 175_000)
+    assert taxes[3] == pytest.approx(750_000 + 875_000 + 4_000_000 + 2_250_000)
+
+
+def test_reduction_factors():
+    assert reduction_factors([0])['factor'][0] == 1
+    assert reduction_factors([12])['factor'][0] == pytest.approx(1.0035 ** -12)
+    # Adquirido em 1980: 45% de redução, FR1 sobre jan/1996-nov/2005 e FR2 no restante
+    old = reduction_factors([500], acquisition_year=1980)
+    assert old['pre_1989_reduction'][0] == pytest.approx(0.45)
+    assert old['factor'][0] == pytest.approx(0.55 * 1.006 ** -119 * 1.0035 ** -381)
+
+
+def test_fr1_counts_january_1996_through_november_2005():
+    # 1996: jan/1996 a nov/2005 = 9 anos + 11 meses = 119 meses de FR1
+    assert reduction_factors([119], acquisition_year=1996)['factor'][0] == pytest.approx(0.490727, abs=1e-6)
+    # 2005: jan a nov = 11 meses de FR1, o resto em FR2
+    assert reduction_factors([20], acquisition_year=2005)['factor'][0] == pytest.approx(1.006 ** -11 * 1.0035 ** -9)
+
+
+def test_exemptions():
+    only = TaxProfile(only_property=True)
+    result = compute_capital_gains(np.array([50_000, 50_000, 10_000]), np.array([400_000, 500_000, 30_000]),
+                                   np.array([0, 0, 0]), only)
+    assert result['tax'].tolist() == [0, 7_500, 0]
+    assert result['exempt'].tolist() == [True, False, True]
+
+    # Isenção de único imóvel não vale se houve venda nos últimos 5 anos
+    recent = TaxProfile(only_property=True, sold_property_last_5_years=True)
+    assert compute_capital_gains([50_000], [400_000], [0], recent)['tax'][0] == pytest.approx(7_500)
+
+    half = TaxProfile(reinvest_fraction=0.5)
+    assert compute_capital_gains([100_000], [800_000], [0], half)['tax'][0] == pytest.approx(7_500)
+
+
+def test_scalar_matches_batch_and_is_cached():
+    tax_cache.clear()
+    profile = TaxProfile()
+    gains = np.linspace(-10_000, 2_000_000, 500)
+    batch = compute_capital_gains(gains, gains + 500_000, np.full(500, 24), profile)
+    for i in (0, 137, 499):
+        scalar = capital_gains_tax(gains[i], gains[i] + 500_000, 24, profile)
+        assert scalar['tax'] == pytest.approx(batch['tax'][i], abs=0.01)
+
+    hits = tax_cache.hits
+    capital_gains_tax(gains[137], gains[137] + 500_000, 24, profile)
+    assert tax_cache.hits == hits + 1
+
+
+def test_financing_uses_tax_engine():
+    inputs = FinancingInputs(property_value=500_000, declared_value=500_000, sale_price=900_000,
+                             is_first_property=False, will_reinvest=False, time_to_sell=12)
+    result = FinancingCalculatorService().calculate_financing(inputs)
+    gain = 900_000 * 0.94 - 500_000 * 1.10
+    assert result.breakdown['capital_gain'] == pytest.approx(gain)
+    assert result.capital_gains_tax == pytest.approx(gain * 1.0035 ** -12 * 0.15, abs=0.01)
+
+    reinvest = FinancingInputs(property_value=500_000, declared_value=500_000, sale_price=900_000,
+                               is_first_property=False, will_reinvest=True)
+    assert FinancingCalculatorService().calculate_financing(reinvest).capital_gains_tax == 0
+
+
+def test_capital_gains_endpoint_batch():
+    client = app.test_client()
+    res = client.post('/api/financing/capital-gains-tax', json={
+        'sales': [{'gain': 100_000, 'sale_price': 600_000, 'holding_months': 0},
+                  {'gain': -5_000, 'sale_price': 600_000, 'holding_months': 0}],
+    })
+    body = res.get_json()
+    assert res.status_code == 200
+    assert body['taxes'] == [15_000, 0]
+
+    single = client.post('/api/financing/capital-gains-tax', json={'gain': 100_000, 'sale_price': 400_000,
+                                                                   'profile': {'only_property': True}})
+    assert single.get_json()['tax']['exempt'] is True
+    assert client.post('/api/financing/capital-gains-tax', json={'gain': 1}).status_code == 400
@@ -0,0 +1,125 @@
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import jwt
+import pytest
+
+# Ensure backend package is on path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Configure test environment before importing app
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+os.environ['SECRET_KEY'] = 'test-secret'
+
+from src.main import app  # noqa: E402
+from src.models.user import User, db  # noqa: E402
+from src.models.revoked_token import RevokedToken  # noqa: E402
+from src.routes import auth as auth_routes  # noqa: E402
+from src.services.password_hasher import PasswordHasher  # noqa: E402
+from src.services.principal_cache import principal_cache  # noqa: E402
+from src.services.token_revocation import RevocationList, revocation_list  # noqa: E402
+
+CREDENTIALS = {'username': 'tester', 'email': 'test@example.com', 'password': 'secret'}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(auth_routes, 'password_hasher', PasswordHasher(method='pbkdf2:sha256:1000', workers=0))
+    with app.app_context():
+        db.create_all()
+        revocation_list.clear()
+        principal_cache.clear()
+        yield app.test_client()
+        db.session.remove()
+        db.drop_all()
+
+
+def logout(client, tokens, **body):
+    return client.post('/api/logout', headers={'Authorization': f"Bearer {tokens['token']}"}, json=body)
+
+
+def test_login_returns_refresh_token_and_refresh_rotates(client):
+    tokens = client.post('/api/register', json=CREDENTIALS).get_json()
+    assert tokens['refresh_token'] and tokens['expires_in'] == auth_routes.ACCESS_TOKEN_TTL
+
+    refreshed = client.post('/api/token/refresh', json={'refresh_token': tokens['refresh_token']})
+    assert refreshed.status_code == 200
+    new_tokens = refreshed.get_json()
+    assert new_tokens['user']['username'] == 'tester'
+    assert new_tokens['token'] != tokens['token']
+
+    # O refresh token usado foi revogado; o novo funciona
+    assert client.post('/api/token/refresh', json={'refresh_token': tokens['refresh_token']}).status_code == 401
+    assert client.post('/api/token/refresh', json={'refresh_token': new_tokens['refresh_token']}).status_code == 200
+
+
+def test_access_token_cannot_refresh_and_refresh_token_cannot_authenticate(client):
+    tokens = client.post('/api/register', json=CREDENTIALS).get_json()
+    assert client.post('/api/token/refresh', json={'refresh_token': tokens['token']}).status_code == 401
+    assert logout(client, {'token': tokens['refresh_token']}).status_code == 401
+
+
+def test_logout_revokes_access_and_refresh_tokens(client):
+    tokens = client.post('/api/register', json=CREDENTIALS).get_json()
+    assert logout(client, tokens, refresh_token=tokens['refresh_token']).status_code == 200
+    assert logout(client, tokens).status_code == 401
+    assert client.post('/api/token/refresh', json={'refresh_token': tokens['refresh_token']}).status_code == 401
+    assert RevokedToken.query.count() == 2
+
+
+def test_revocations_from_other_processes_are_synced(client):
+    other_process = RevocationList(sync_interval=0)
+    db.session.add(RevokedToken(jti='abc', token_type='access', expires_at=datetime.utcnow() + timedelta(hours=1)))
+    db.session.add(RevokedToken(jti='old', token_type='access', expires_at=datetime.utcnow() - timedelta(hours=1)))
+    db.session.commit()
+    assert other_process.is_revoked('abc')
+    assert not other_process.is_revoked('old')
+    assert len(other_process) == 1
+
+    assert other_process.purge_expired() == 1
+    assert RevokedToken.query.count() == 1
+
+
+def test_refresh_token_is_single_use_across_workers(client):
+    tokens = client.post('/api/register', json=CREDENTIALS).get_json()
+    assert client.post('/api/token/refresh', json={'refresh_token': tokens['refresh_token']}).status_code == 200
+
+    # Outro worker: sincronizou logo antes da rotação e ainda não vê a revogação
+    revocation_list.clear()
+    revocation_list._synced_at = time.monotonic()
+    jti = jwt.decode(tokens['refresh_token'], options={'verify_signature': False})['jti']
+    assert not revocation_list.is_revoked(jti)
+    assert client.post('/api/token/refresh', json={'refresh_token': tokens['refresh_token']}).status_code == 401
+
+
+def test_refresh_loads_user_from_database_in_stateless_mode(client, monkeypatch):
+    monkeypatch.setattr(principal_cache, 'stateless', True)
+    tokens = client.post('/api/register', json=CREDENTIALS).get_json()
+    db.session.delete(db.session.get(User, tokens['user']['id']))
+    db.session.commit()
+    assert client.post('/api/token/refresh', json={'refresh_token': tokens['refresh_token']}).status_code == 401
+
+
+def test_sync_sees_rows_committed_out_of_id_order(client):
+    other_process = RevocationList(sync_interval=0)
+    expires = datetime.utcnow() + timedelta(hours=1)
+    db.session.add(RevokedToken(id=10, jti='high', token_type='access', expires_at=expires))
+    db.session.commit()
+    assert other_process.is_revoked('high')
+
+    # Id menor, reservado antes mas com commit depois da leitura acima
+    db.session.add(RevokedToken(id=5, jti='late', token_type='access', expires_at=expires,
+                                revoked_at=datetime.utcnow() - timedelta(seconds=2)))
+    db.session.commit()
+    assert other_process.is_revoked('late')
+
+
+def test_sync_prunes_expired_entries_from_memory(client):
+    worker = RevocationList(sync_interval=0)
+    worker.revoke('soon', datetime.utcnow() + timedelta(milliseconds=50), 'access')
+    assert len(worker) == 1
+    time.sleep(0.1)
+    assert not worker.is_revoked('other')
+    assert len(worker) == 0
@@ -0,0 +1,97 @@
+import os
+import sys
+
+import pytest
+
+# Ensure backend package is on path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Configure test environment before importing app
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+os.environ['SECRET_KEY'] = 'test-secret'
+
+from sqlalchemy import text  # noqa: E402
+
+from src.main import app  # noqa: E402
+from src.models.user import db  # noqa: E402
+from src.services.tracing import OTLPHttpExporter, tracer  # noqa: E402
+
+
+class MemoryExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    exporter = MemoryExporter()
+    monkeypatch.setattr(tracer, 'exporter', exporter)
+    monkeypatch.setattr(tracer, 'sample_rate', 1.0)
+    return exporter
+
+
+@pytest.fixture
+def client():
+    with app.app_context():
+        db.create_all()
+        yield app.test_client()
+        db.session.remove()
+        db.drop_all()
+
+
+def spans_by_name(spans):
+    return {span['name']: span for span in spans}
+
+
+def test_request_id_is_propagated_without_sampling(client):
+    response = client.get('/health', headers={'X-Request-ID': 'abc-123'})
+    assert response.headers['X-Request-ID'] == 'abc-123'
+    assert 'X-Trace-ID' not in response.headers
+    assert client.get('/health').headers['X-Request-ID']
+
+
+def test_sampled_request_records_route_service_and_db_spans(client, exporter):
+    payload = {'property_value': 300000, 'down_payment': 60000, 'interest_rate': 10, 'loan_term': 360}
+    response = client.post('/api/financing/calculate', json=payload, headers={'X-Request-ID': 'req-1'})
+    client.get('/health')
+    tracer.flush()
+
+    spans = [span for span in exporter.spans if span['request_id'] == 'req-1']
+    names = spans_by_name(spans)
+    root = names['POST /api/financing/calculate']
+    assert root['parent_id'] is None
+    assert root['attributes']['http.status_code'] == response.status_code
+    assert response.headers['X-Trace-ID'] == root['trace_id']
+    assert names['request.json']['parent_id'] == root['span_id']
+    assert names['financing.calculate_financing']['parent_id'] == root['span_id']
+    assert {span['trace_id'] for span in spans} == {root['trace_id']}
+
+
+def test_sql_queries_become_spans(client, exporter):
+    root = tracer.start_trace('job')
+    db.session.execute(text('SELECT 1'))
+    tracer.end_trace(root)
+    tracer.flush()
+    query = spans_by_name(exporter.spans)['db.query']
+    assert query['attributes']['statement'] == 'SELECT 1'
+    assert query['parent_id'] == root.span_id
+
+
+def test_span_cap_and_otlp_payload(client, exporter, monkeypatch):
+    monkeypatch.setattr(tracer, 'max_spans', 3)
+    root = tracer.start_trace('job')
+    for _ in range(5):
+        with tracer.span('step', n=1):
+            pass
+    tracer.end_trace(root)
+    tracer.flush()
+    assert len(exporter.spans) == 4
+    assert exporter.spans[-1]['attributes']['spans.dropped'] == 2
+
+    otlp = OTLPHttpExporter('http://localhost:4318/v1/traces').payload(exporter.spans)
+    otlp_spans = otlp['resourceSpans'][0]['scopeSpans'][0]['spans']
+    assert otlp_spans[0]['attributes'][0] == {'key': 'n', 'value': {'intValue': '1'}}
+    assert otlp_spans[-1]['parentSpanId'] == ''
@@ -0,0 +1,89 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Ensure backend package is on path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Configure test environment before importing app
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+os.environ['SECRET_KEY'] = 'test-secret'
+
+from src.main import app  # noqa: E402
+from src.services.viability_service import viability_service  # noqa: E402
+
+EXEMPLO = {
+    'id': 'exemplo',
+    'valor_arrematacao': 200000,
+    'valor_reforma': 30000,
+    'valor_aluguel_mensal': 1800,
+    'valor_venda_estimado': 280000,
+    'custos_adicionais': {'documentacao': 2000, 'mudanca': 1000},
+}
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def test_investimento_total_matches_original_calculator():
+    result = viability_service.investimento_total([200000], [30000], [3000])
+    # 200k + ITBI 2% + cartório 1,5% + leilão 5% + reforma com 25% + extras
+    assert result['investimento_total'][0] == pytest.approx(257500)
+    assert result['reforma_com_contingencia'][0] == pytest.approx(37500)
+
+
+def test_roi_locacao_uses_shared_rates():
+    taxas = viability_service.taxas()
+    result = viability_service.roi_locacao(np.array([257500.0]), np.array([1800.0]), taxas=taxas)
+    bruta = 1800 * 12
+    liquida = bruta * (1 - taxas['vacancia_anual'] - taxas['inadimplencia'] - taxas['administracao'])
+    custos = 257500 * (taxas['manutencao_anual'] + taxas['iptu_anual'] + taxas['seguro_anual'])
+    assert result['resultado_liquido_anual'][0] == pytest.approx(liquida - custos)
+    assert result['roi_anual_percentual'][0] == pytest.approx((liquida - custos) / 257500 * 100)
+
+
+def test_payback_is_null_when_rent_does_not_cover_costs():
+    report = viability_service.relatorio_lote([{**EXEMPLO, 'valor_aluguel_mensal': 100}])[0]
+    assert report['roi_locacao']['payback_anos'] is None
+    assert report['metricas_resumo']['payback_locacao'] is None
+
+
+def test_batch_matches_single_reports():
+    imoveis = [EXEMPLO, {**EXEMPLO, 'id': 2, 'valor_arrematacao': 150000, 'prazo_venda_meses': 6}]
+    batch = viability_service.relatorio_lote(imoveis)
+    for imovel, report in zip(imoveis, batch):
+        assert viability_service.relatorio_lote([imovel])[0] == report
+    assert batch[1]['roi_revenda']['prazo_meses'] == 6
+    assert batch[0]['analise_sensibilidade']['otimista']['roi_anual'] > \
+        batch[0]['analise_sensibilidade']['pessimista']['roi_anual']
+
+
+def test_revenda_tax_uses_tax_engine():
+    report = viability_service.relatorio_lote([EXEMPLO])[0]
+    venda = report['roi_revenda']
+    ganho = 280000 * 0.94 - 257500
+    assert 0 < venda['breakdown_custos_venda']['imposto_ganho_capital'] < 0.15 * ganho + 0.01
+    assert report['comparacao_estrategias']['recomendacao'] in ('locacao', 'revenda')
+
+
+def test_viability_endpoints(client):
+    response = client.post('/api/financing/viability', json={'properties': [EXEMPLO]})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['count'] == 1
+    assert data['results'][0]['investimento_total']['investimento_total'] == 257500
+
+    response = client.post('/api/financing/viability/compare', json={'properties': [EXEMPLO, EXEMPLO]})
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert len(results) == 2 and 'estrategia_recomendada' in results[0]
+
+    response = client.post('/api/financing/viability', json={'properties': [{'valor_arrematacao': 1}]})
+    assert response.status_code == 400
+    assert response.get_json()['missing_fields'] == ['valor_aluguel_mensal', 'valor_venda_estimado']
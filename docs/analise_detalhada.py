@@ -1,8 +1,14 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # renderização sem display, inclusive nos workers
 import matplotlib.pyplot as plt
 import seaborn as sns
 from collections import Counter
@@ -12,6 +18,22 @@ import re
 plt.rcParams['font.family'] = ['DejaVu Sans']
 plt.rcParams['figure.figsize'] = (12, 8)
 
+CSV_ENTRADA = '/home/ubuntu/lista_imoveis_utf8.csv'
+CSV_SAIDA = '/home/ubuntu/dados_processados.csv'
+DIRETORIO_GRAFICOS = '/home/ubuntu'
+
+COLUNAS = ['numero_imovel', 'uf', 'cidade', 'bairro', 'endereco', 
+           'preco', 'valor_avaliacao', 'desconto', 'descricao', 
+           'modalidade_venda', 'link_acesso']
+
+FAIXAS_PRECO = [
+    (0, 100000, "Até R$ 100k"),
+    (100000, 300000, "R$ 100k - R$ 300k"),
+    (300000, 500000, "R$ 300k - R$ 500k"),
+    (500000, 1000000, "R$ 500k - R$ 1M"),
+    (1000000, float('inf'), "Acima de R$ 1M")
+]
+
 def limpar_preco(preco_str):
     """Limpa e converte string de preço para float"""
     if pd.isna(preco_str) or preco_str == '':
@@ -66,96 +88,150 @@ def extrair_info_descricao(descricao):
     
     return info
 
-def analisar_dados_completa():
-    """Análise completa e detalhada dos dados"""
+def processar_particao(df):
+    """Converte preços e extrai dados da descrição de uma partição do catálogo"""
+    df = df.copy()
+    df['preco_num'] = df['preco'].apply(limpar_preco)
+    df['valor_avaliacao_num'] = df['valor_avaliacao'].apply(limpar_preco)
+    df['desconto_num'] = df['desconto'].apply(limpar_preco)
+    
+    info_estruturada = []
+    for idx, descricao in df['descricao'].items():
+        info = extrair_info_descricao(descricao)
+        info['index'] = idx
+        info_estruturada.append(info)
+    
+    df_info = pd.DataFrame(info_estruturada, columns=['tipo', 'quartos', 'vagas', 'area_total',
+                                                      'area_privativa', 'area_terreno', 'index'])
+    return df.merge(df_info, left_index=True, right_on='index')
+
+def agregar_particao(df):
+    """Agregados parciais (somáveis entre partições) de uma partição processada"""
+    precos = df['preco_num'].dropna()
+    return {
+        'total': len(df),
+        'precos_validos': len(precos),
+        'soma_precos': precos.sum(),
+        'menor_preco': precos.min() if len(precos) else np.nan,
+        'maior_preco': precos.max() if len(precos) else np.nan,
+        'faixas': pd.Series([((precos >= min_val) & (precos < max_val)).sum()
+                             for min_val, max_val, _ in FAIXAS_PRECO]),
+        'tipos': df.groupby('tipo')['preco_num'].agg(['size', 'count', 'sum']),
+        'quartos': df['quartos'].value_counts(),
+    }
+
+def combinar_agregados(parciais):
+    """Combina os agregados parciais de várias partições"""
+    combinado = {
+        'total': sum(p['total'] for p in parciais),
+        'precos_validos': sum(p['precos_validos'] for p in parciais),
+        'soma_precos': sum(p['soma_precos'] for p in parciais),
+        'menor_preco': np.nanmin([p['menor_preco'] for p in parciais]),
+        'maior_preco': np.nanmax([p['maior_preco'] for p in parciais]),
+    }
+    for chave in ('faixas', 'tipos', 'quartos'):
+        total = parciais[0][chave]
+        for parcial in parciais[1:]:
+            total = total.add(parcial[chave], fill_value=0)
+        combinado[chave] = total
+    return combinado
+
+def _processar_uf(df_uf):
+    df_processado = processar_particao(df_uf)
+    return df_processado, agregar_particao(df_processado)
+
+def processar_em_paralelo(df, workers=None):
+    """
+    Divide o catálogo por UF e processa as partições em um pool de processos
+    
+    Returns:
+        (df_completo, agregados) equivalentes ao processamento sequencial
+    """
+    # dropna=False: linhas sem UF formam uma partição própria, como no modo sequencial
+    particoes = [grupo for _, grupo in df.groupby(df['uf'].str.strip(), sort=False, dropna=False)]
+    # Partições maiores primeiro para equilibrar a carga entre os processos
+    particoes.sort(key=len, reverse=True)
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        resultados = list(executor.map(_processar_uf, particoes))
+    
+    df_completo = pd.concat([r[0] for r in resultados]).sort_values('index')
+    return df_completo, combinar_agregados([r[1] for r in resultados])
+
+def analisar_dados_completa(paralelo=False, workers=None):
+    """
+    Análise completa e detalhada dos dados
+    
+    Args:
+        paralelo: processa as UFs em processos separados (mesma saída do modo sequencial)
+        workers: número de processos (padrão: número de CPUs)
+    """
     
     print("🏠 ANÁLISE DETALHADA DOS DADOS DE IMÓVEIS DA CAIXA")
     print("=" * 60)
     
     # Carregar dados
-    df = pd.read_csv('/home/ubuntu/lista_imoveis_utf8.csv', 
+    df = pd.read_csv(CSV_ENTRADA, 
                     sep=';', 
                     skiprows=2,
                     encoding='utf-8')
     
     # Renomear colunas
-    df.columns = ['numero_imovel', 'uf', 'cidade', 'bairro', 'endereco', 
-                 'preco', 'valor_avaliacao', 'desconto', 'descricao', 
-                 'modalidade_venda', 'link_acesso']
+    df.columns = COLUNAS
     
     # Limpeza de dados
     df = df.dropna(subset=['numero_imovel'])
     df = df[df['numero_imovel'] != '']
     
-    # Converter preços
-    df['preco_num'] = df['preco'].apply(limpar_preco)
-    df['valor_avaliacao_num'] = df['valor_avaliacao'].apply(limpar_preco)
-    df['desconto_num'] = df['desconto'].apply(limpar_preco)
+    # Converter preços e extrair informações estruturadas
+    print(f"\n🔍 EXTRAINDO INFORMAÇÕES ESTRUTURADAS...")
+    if paralelo:
+        df_completo, agregados = processar_em_paralelo(df, workers)
+    else:
+        df_completo = processar_particao(df)
+        agregados = agregar_particao(df_completo)
     
-    print(f"📊 Total de imóveis: {len(df)}")
-    print(f"📊 Imóveis com preço válido: {df['preco_num'].notna().sum()}")
+    print(f"📊 Total de imóveis: {agregados['total']}")
+    print(f"📊 Imóveis com preço válido: {agregados['precos_validos']}")
     
     # Análise de preços válidos
-    precos_validos = df[df['preco_num'].notna()]
-    if len(precos_validos) > 0:
+    if agregados['precos_validos'] > 0:
         print(f"\n💰 ANÁLISE DE PREÇOS (imóveis com preço válido):")
-        print(f"   Preço médio: R$ {precos_validos['preco_num'].mean():,.2f}")
-        print(f"   Preço mediano: R$ {precos_validos['preco_num'].median():,.2f}")
-        print(f"   Menor preço: R$ {precos_validos['preco_num'].min():,.2f}")
-        print(f"   Maior preço: R$ {precos_validos['preco_num'].max():,.2f}")
+        print(f"   Preço médio: R$ {agregados['soma_precos'] / agregados['precos_validos']:,.2f}")
+        print(f"   Preço mediano: R$ {df_completo['preco_num'].median():,.2f}")
+        print(f"   Menor preço: R$ {agregados['menor_preco']:,.2f}")
+        print(f"   Maior preço: R$ {agregados['maior_preco']:,.2f}")
         
         # Faixas de preço
         print(f"\n💵 FAIXAS DE PREÇO:")
-        faixas = [
-            (0, 100000, "Até R$ 100k"),
-            (100000, 300000, "R$ 100k - R$ 300k"),
-            (300000, 500000, "R$ 300k - R$ 500k"),
-            (500000, 1000000, "R$ 500k - R$ 1M"),
-            (1000000, float('inf'), "Acima de R$ 1M")
-        ]
-        
-        for min_val, max_val, label in faixas:
-            count = len(precos_validos[(precos_validos['preco_num'] >= min_val) & 
-                                     (precos_validos['preco_num'] < max_val)])
-            print(f"   {label}: {count:,} imóveis")
-    
-    # Extrair informações estruturadas
-    print(f"\n🔍 EXTRAINDO INFORMAÇÕES ESTRUTURADAS...")
-    info_estruturada = []
-    for idx, row in df.iterrows():
-        info = extrair_info_descricao(row['descricao'])
-        info['index'] = idx
-        info_estruturada.append(info)
-    
-    df_info = pd.DataFrame(info_estruturada)
-    df_completo = df.merge(df_info, left_index=True, right_on='index')
+        for (_, _, label), count in zip(FAIXAS_PRECO, agregados['faixas']):
+            print(f"   {label}: {int(count):,} imóveis")
     
     # Análise por tipo de imóvel
     print(f"\n🏘️  ANÁLISE POR TIPO DE IMÓVEL:")
-    tipos = df_completo['tipo'].value_counts()
-    for tipo, count in tipos.items():
-        subset = df_completo[df_completo['tipo'] == tipo]
-        preco_medio = subset['preco_num'].mean()
-        if not pd.isna(preco_medio):
-            print(f"   {tipo}: {count:,} imóveis (preço médio: R$ {preco_medio:,.2f})")
+    tipos = agregados['tipos'].sort_values('size', ascending=False)
+    for tipo, linha in tipos.iterrows():
+        if linha['count'] > 0:
+            preco_medio = linha['sum'] / linha['count']
+            print(f"   {tipo}: {int(linha['size']):,} imóveis (preço médio: R$ {preco_medio:,.2f})")
         else:
-            print(f"   {tipo}: {count:,} imóveis")
+            print(f"   {tipo}: {int(linha['size']):,} imóveis")
     
     # Análise de quartos
     print(f"\n🛏️  ANÁLISE DE QUARTOS:")
-    quartos_stats = df_completo['quartos'].value_counts().sort_index()
+    quartos_stats = agregados['quartos'].sort_index()
     for quartos, count in quartos_stats.items():
         if not pd.isna(quartos):
-            print(f"   {int(quartos)} quartos: {count:,} imóveis")
+            print(f"   {int(quartos)} quartos: {int(count):,} imóveis")
     
     # Salvar dados processados
-    df_completo.to_csv('/home/ubuntu/dados_processados.csv', index=False, encoding='utf-8')
+    df_completo.to_csv(CSV_SAIDA, index=False, encoding='utf-8')
     
-    # Criar visualizações
+    # Criar visualizações (um único arquivo nos dois modos)
     criar_visualizacoes(df_completo)
     
     print(f"\n✅ Análise completa finalizada!")
-    print(f"📁 Dados processados salvos em: /home/ubuntu/dados_processados.csv")
+    print(f"📁 Dados processados salvos em: {CSV_SAIDA}")
     
     return df_completo
 
@@ -198,11 +274,18 @@ def criar_visualizacoes(df):
     plt.xticks(rotation=45)
     
     plt.tight_layout()
-    plt.savefig('/home/ubuntu/analise_imoveis.png', dpi=300, bbox_inches='tight')
+    caminho = os.path.join(DIRETORIO_GRAFICOS, 'analise_imoveis.png')
+    plt.savefig(caminho, dpi=300, bbox_inches='tight')
     plt.close()
     
-    print(f"📊 Gráficos salvos em: /home/ubuntu/analise_imoveis.png")
+    print(f"📊 Gráficos salvos em: {caminho}")
 
 if __name__ == "__main__":
-    df = analisar_dados_completa()
+    parser = argparse.ArgumentParser(description='Análise detalhada dos imóveis da Caixa')
+    parser.add_argument('--paralelo', action='store_true',
+                        help='processa cada UF em um processo separado')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='número de processos (padrão: número de CPUs)')
+    args = parser.parse_args()
+    df = analisar_dados_completa(paralelo=args.paralelo, workers=args.workers)
 